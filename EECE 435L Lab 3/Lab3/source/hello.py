@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import ttk
+import ast
 import re
 import csv
+import json
+import os
 
 class Validator:
     """
@@ -55,6 +58,8 @@ class Person:
         from_dict(data): Create a Person object from a dictionary.
     """
 
+    __slots__ = ('name', 'age', '_email')
+
     def __init__(self, name, age, email):
         self.name = name
         self.age = age
@@ -84,9 +89,13 @@ class Student(Person):
     Methods:
         register_course(course): Add a course to the student's list of registered courses.
         to_dict(): Convert the object to a dictionary.
+        to_record(): Convert the object to a dictionary with course IDs as references.
+        to_row(): Convert the object to a row of the normalized students table.
         from_dict(data): Create a Student object from a dictionary.
     """
 
+    __slots__ = ('student_id', 'registered_courses')
+
     def __init__(self, name, age, email, student_id):
         super().__init__(name, age, email)
         self.student_id = student_id
@@ -104,6 +113,18 @@ class Student(Person):
             'registered_courses': [course.to_dict() for course in self.registered_courses]
         }
 
+    def to_record(self):
+        """Convert the student object into a dictionary that refers to its courses by ID."""
+        return {
+            **super().to_dict(),
+            'student_id': self.student_id,
+            'registered_courses': [course.course_id for course in self.registered_courses]
+        }
+
+    def to_row(self):
+        """Convert the student object into a row of the normalized students table."""
+        return {**super().to_dict(), 'student_id': self.student_id}
+
     @staticmethod
     def from_dict(data):
         """Create a Student object from a dictionary."""
@@ -120,9 +141,13 @@ class Instructor(Person):
     Methods:
         assign_course(course): Assign a course to the instructor.
         to_dict(): Convert the object to a dictionary.
+        to_record(): Convert the object to a dictionary with course IDs as references.
+        to_row(): Convert the object to a row of the normalized instructors table.
         from_dict(data): Create an Instructor object from a dictionary.
     """
 
+    __slots__ = ('instructor_id', 'assigned_courses')
+
     def __init__(self, name, age, email, instructor_id):
         super().__init__(name, age, email)
         self.instructor_id = instructor_id
@@ -140,6 +165,18 @@ class Instructor(Person):
             'assigned_courses': [course.to_dict() for course in self.assigned_courses]
         }
 
+    def to_record(self):
+        """Convert the instructor object into a dictionary that refers to its courses by ID."""
+        return {
+            **super().to_dict(),
+            'instructor_id': self.instructor_id,
+            'assigned_courses': [course.course_id for course in self.assigned_courses]
+        }
+
+    def to_row(self):
+        """Convert the instructor object into a row of the normalized instructors table."""
+        return {**super().to_dict(), 'instructor_id': self.instructor_id}
+
     @staticmethod
     def from_dict(data):
         """Create an Instructor object from a dictionary."""
@@ -160,9 +197,13 @@ class Course:
     Methods:
         add_student(student): Enroll a student in the course.
         to_dict(): Convert the object to a dictionary.
+        to_record(): Convert the object to a dictionary with people IDs as references.
+        to_row(): Convert the object to a row of the normalized courses table.
         from_dict(data): Create a Course object from a dictionary.
     """
 
+    __slots__ = ('course_id', 'course_name', 'instructor', 'enrolled_students')
+
     def __init__(self, course_id, course_name, instructor):
         self.course_id = course_id
         self.course_name = course_name
@@ -182,6 +223,23 @@ class Course:
             'enrolled_students': [student.to_dict() for student in self.enrolled_students]
         }
 
+    def to_record(self):
+        """Convert the course object into a dictionary that refers to its instructor and students by ID."""
+        return {
+            'course_id': self.course_id,
+            'course_name': self.course_name,
+            'instructor': self.instructor.instructor_id if self.instructor else None,
+            'enrolled_students': [student.student_id for student in self.enrolled_students]
+        }
+
+    def to_row(self):
+        """Convert the course object into a row of the normalized courses table."""
+        return {
+            'course_id': self.course_id,
+            'course_name': self.course_name,
+            'instructor_id': self.instructor.instructor_id if self.instructor else ''
+        }
+
     @staticmethod
     def from_dict(data):
         """Create a Course object from a dictionary."""
@@ -195,41 +253,327 @@ class Course:
         return course
 
 
+class ReferenceSerializer:
+    """
+    Serializes students, instructors and courses as one graph of ID references.
+
+    Unlike ``to_dict``, which nests every related object inside its owner and
+    therefore repeats shared objects and never ends once students and courses
+    refer to each other, each entity is written exactly once under its ID,
+    using its ``to_record`` method. On load, an identity map per entity type
+    makes sure each ID is materialized as exactly one object, which every
+    relation then shares.
+
+    Methods:
+        dump(students, instructors, courses): Converts the objects to a dictionary of records keyed by ID.
+        load(data): Rebuilds the objects and their relations from such a dictionary.
+        save_to_file(filename, students, instructors, courses): Saves the objects to a JSON file.
+        load_from_file(filename): Loads the objects from a JSON file.
+    """
+
+    @staticmethod
+    def dump(students, instructors, courses):
+        """
+        Converts the objects to a dictionary of records keyed by ID.
+
+        Objects that are only reachable through a relation, such as the
+        instructor of a listed course, are included as well, so that every
+        reference in the result can be resolved.
+
+        :param students: The students to serialize.
+        :type students: list
+        :param instructors: The instructors to serialize.
+        :type instructors: list
+        :param courses: The courses to serialize.
+        :type courses: list
+        :return: A dictionary with ``students``, ``instructors`` and ``courses``
+            sections, each mapping IDs to records.
+        :rtype: dict
+        """
+        student_map, instructor_map, course_map = {}, {}, {}
+        pending = [*students, *instructors, *courses]
+        for obj in pending:
+            if isinstance(obj, Student):
+                if obj.student_id not in student_map:
+                    student_map[obj.student_id] = obj
+                    pending.extend(obj.registered_courses)
+            elif isinstance(obj, Instructor):
+                if obj.instructor_id not in instructor_map:
+                    instructor_map[obj.instructor_id] = obj
+                    pending.extend(obj.assigned_courses)
+            elif obj.course_id not in course_map:
+                course_map[obj.course_id] = obj
+                pending.extend(obj.enrolled_students)
+                if obj.instructor is not None:
+                    pending.append(obj.instructor)
+        return {
+            'students': {key: student.to_record() for key, student in student_map.items()},
+            'instructors': {key: instructor.to_record() for key, instructor in instructor_map.items()},
+            'courses': {key: course.to_record() for key, course in course_map.items()},
+        }
+
+    @staticmethod
+    def load(data):
+        """
+        Rebuilds the objects and their relations from a dictionary made by :meth:`dump`.
+
+        Every record is turned into one object first, and the references are
+        then resolved through the resulting identity maps. References to IDs
+        that are not in the data are dropped.
+
+        :param data: The dictionary of records keyed by ID.
+        :type data: dict
+        :return: The lists of students, instructors and courses.
+        :rtype: tuple
+        """
+        students = {key: Student.from_dict(record) for key, record in data.get('students', {}).items()}
+        instructors = {key: Instructor.from_dict(record) for key, record in data.get('instructors', {}).items()}
+        courses = {}
+        for key, record in data.get('courses', {}).items():
+            courses[key] = Course(record['course_id'], record['course_name'], instructors.get(record['instructor']))
+            courses[key].enrolled_students = [students[ref] for ref in record['enrolled_students'] if ref in students]
+        for key, record in data.get('students', {}).items():
+            students[key].registered_courses = [courses[ref] for ref in record['registered_courses'] if ref in courses]
+        for key, record in data.get('instructors', {}).items():
+            instructors[key].assigned_courses = [courses[ref] for ref in record['assigned_courses'] if ref in courses]
+        return list(students.values()), list(instructors.values()), list(courses.values())
+
+    @staticmethod
+    def save_to_file(filename, students, instructors, courses):
+        """
+        Saves the objects to a JSON file of ID-keyed records.
+
+        Like :meth:`DataManager.save_to_file`, the file is written under a
+        temporary name and then renamed.
+
+        :param filename: The name of the JSON file.
+        :type filename: str
+        :param students: The students to save.
+        :type students: list
+        :param instructors: The instructors to save.
+        :type instructors: list
+        :param courses: The courses to save.
+        :type courses: list
+        """
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'w') as file:
+            json.dump(ReferenceSerializer.dump(students, instructors, courses), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, filename)
+
+    @staticmethod
+    def load_from_file(filename):
+        """
+        Loads the objects from a JSON file written by :meth:`save_to_file`.
+
+        :param filename: The name of the JSON file.
+        :type filename: str
+        :return: The lists of students, instructors and courses.
+        :rtype: tuple
+        """
+        with open(filename, 'r') as file:
+            return ReferenceSerializer.load(json.load(file))
+
 
 import csv
 
+try:
+    # The streaming JSON reader of the PyQt front end, when it is importable
+    from loaders import JsonStreamReader
+except ImportError:
+    JsonStreamReader = None
+
+
+def json_records(file):
+    """
+    Yields the records of a JSON document made of arrays of records.
+
+    The document may be a top-level array or an object whose values are
+    arrays; other object values are skipped. When the PyQt front end's
+    ``loaders`` module can be imported, its ``JsonStreamReader`` reads the
+    document incrementally. Otherwise the lab runs on its own and the whole
+    document is parsed with :func:`json.load`.
+
+    :param file: A text file opened for reading.
+    :type file: file
+    :return: An iterator of ``(key, record)`` pairs, where ``key`` is the
+        object key holding the array, or None for a top-level array.
+    :rtype: iterator
+    :raises ValueError: If the document is not an array or an object.
+    """
+    if JsonStreamReader is not None:
+        yield from JsonStreamReader(file).items()
+        return
+    document = json.load(file)
+    if isinstance(document, list):
+        yield from ((None, record) for record in document)
+    elif isinstance(document, dict):
+        for key, records in document.items():
+            if isinstance(records, list):
+                yield from ((key, record) for record in records)
+    else:
+        raise ValueError("Expected a JSON array or object")
+
+
+class Journal:
+    """
+    An append-only log of records kept next to a CSV snapshot.
+
+    Every appended object is written as one JSON line and flushed right away.
+    The file is fsynced once every ``sync_every`` appends, or when
+    :meth:`sync` is called, so bursts of inserts share a single disk sync.
+
+    :param filename: The name of the CSV snapshot the journal belongs to.
+    :type filename: str
+    :param sync_every: The number of appends between two fsync calls.
+    :type sync_every: int
+
+    Methods:
+        append(obj): Append one object to the journal.
+        sync(): Force pending appends to disk.
+        replay(): Iterate over the records stored in the journal.
+        truncate(): Empty the journal once its records are in the snapshot.
+        close(): Sync and close the journal file.
+    """
+
+    def __init__(self, filename, sync_every=32):
+        self.path = filename + '.journal'
+        self.sync_every = sync_every
+        self.pending = 0
+        self.count = sum(1 for _ in self.replay())
+        self._file = None
+
+    def append(self, obj):
+        """
+        Append one object to the journal.
+
+        :param obj: The object to record. It must be a dictionary or have a `to_dict` method.
+        :return: The number of records now held in the journal.
+        :rtype: int
+        """
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        record = obj if isinstance(obj, dict) else obj.to_dict()
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.sync_every:
+            self.sync()
+        return self.count
+
+    def sync(self):
+        """Force pending appends to disk."""
+        if self._file is not None and self.pending:
+            os.fsync(self._file.fileno())
+        self.pending = 0
+
+    def replay(self):
+        """
+        Iterate over the records stored in the journal.
+
+        A partially written last line, left behind by a crash, is skipped.
+
+        :return: An iterator of dictionaries, oldest first.
+        :rtype: iterator
+        """
+        try:
+            with open(self.path, 'r') as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def truncate(self):
+        """Empty the journal once its records are in the snapshot."""
+        self.close()
+        open(self.path, 'w').close()
+        self.count = 0
+
+    def close(self):
+        """Sync and close the journal file."""
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
 class DataManager:
     """
     A class responsible for managing file I/O operations for students, instructors, and courses.
-    
+
+    Besides full snapshots, objects can be appended one at a time to a
+    :class:`Journal` kept next to the snapshot. The journal is folded back into
+    the snapshot by :meth:`compact` once it holds ``compact_every`` records.
+
+    The whole catalogue can also be kept as a normalized set of tables, one
+    CSV file each, listed in ``tables``: people and courses hold only their
+    own fields, a course refers to its instructor by ID, and the
+    ``enrollments`` table joins course IDs to student IDs. Each table has its
+    own journal, so enrolling a student only appends to the enrollments.
+
     Methods:
         save_to_file(data, filename): Saves a list of objects to a CSV file.
-        load_from_file(filename, obj_class): Loads data from a CSV file and creates objects of the given class.
+        load_from_file(filename, obj_class): Loads data from a CSV file and its journal and creates objects of the given class.
+        iter_from_file(filename, obj_class, key=None): Yields objects one at a time from a CSV or JSON file and its journal.
+        append_to_file(obj, filename): Appends one object to the journal of a CSV file.
+        compact(data, filename): Rewrites the CSV snapshot and empties its journal.
+        sync_journals(): Forces the pending appends of every open journal to disk.
+        close_journals(): Syncs and closes every open journal.
+        save_tables(students, instructors, courses, directory): Saves the catalogue as normalized tables.
+        load_tables(directory): Loads the catalogue from normalized tables, joining them by ID.
+        read_table(table, directory): Reads the rows of one normalized table and its journal.
+        migrate_course_row(row, students, instructors, enrollments): Converts a course row of the old layout into a normalized one.
+        append_row(table, row, directory): Appends one row to the journal of a normalized table.
+        compact_tables(students, instructors, courses, directory): Rewrites the normalized tables and empties their journals.
     """
 
+    journals = {}
+    compact_every = 1000
+    tables = {
+        'students': ['name', 'age', 'email', 'student_id'],
+        'instructors': ['name', 'age', 'email', 'instructor_id'],
+        'courses': ['course_id', 'course_name', 'instructor_id'],
+        'enrollments': ['course_id', 'student_id'],
+    }
+
     @staticmethod
     def save_to_file(data, filename):
         """
         Saves a list of objects to a CSV file.
 
+        The file is written under a temporary name and then renamed, so a crash
+        never leaves a half-written snapshot behind.
+
         :param data: A list of objects to be saved. Each object must have a `to_dict` method.
         :type data: list
         :param filename: The name of the CSV file to save the data in.
         :type filename: str
         """
-        with open(filename, 'w', newline='') as file:
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'w', newline='') as file:
             if data:
                 headers = data[0].to_dict().keys()
                 writer = csv.DictWriter(file, fieldnames=headers)
                 writer.writeheader()
                 for obj in data:
                     writer.writerow(obj.to_dict())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, filename)
 
     @staticmethod
     def load_from_file(filename, obj_class):
         """
         Loads data from a CSV file and creates a list of objects of the given class.
 
+        Records appended to the file's journal since the last compaction are
+        replayed after the snapshot rows.
+
         :param filename: The name of the CSV file to load the data from.
         :type filename: str
         :param obj_class: The class to instantiate objects from the loaded data.
@@ -237,15 +581,277 @@ class DataManager:
         :return: A list of objects created from the data in the file.
         :rtype: list
         """
-        data_list = []
+        return list(DataManager.iter_from_file(filename, obj_class))
+
+    @staticmethod
+    def iter_from_file(filename, obj_class, key=None):
+        """
+        Yields objects of the given class one at a time from a data file.
+
+        Files ending in ``.json`` are parsed incrementally and may hold either an
+        array of records or an object of arrays, in which case ``key`` selects
+        the array to read. Any other file is read as CSV. Only one record is held
+        in memory at a time, followed by the records of the file's journal.
+
+        :param filename: The name of the file to load the data from.
+        :type filename: str
+        :param obj_class: The class to instantiate objects from the loaded data.
+        :type obj_class: class
+        :param key: The object key of the array to read from a JSON file.
+        :type key: str, optional
+        :return: An iterator of objects created from the data in the file.
+        :rtype: iterator
+        """
         try:
-            with open(filename, 'r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    data_list.append(obj_class.from_dict(row))
+            with open(filename, 'r', newline='') as file:
+                if filename.endswith('.json'):
+                    for section, record in json_records(file):
+                        if section == key:
+                            yield obj_class.from_dict(record)
+                else:
+                    for row in csv.DictReader(file):
+                        yield obj_class.from_dict(row)
         except FileNotFoundError:
             print(f"No file named {filename} found, starting with an empty list.")
-        return data_list
+        for record in DataManager.journal_for(filename).replay():
+            yield obj_class.from_dict(record)
+
+    @staticmethod
+    def journal_for(filename):
+        """
+        Returns the journal of a CSV file, opening it on first use.
+
+        :param filename: The name of the CSV snapshot.
+        :type filename: str
+        :return: The journal kept next to the snapshot.
+        :rtype: Journal
+        """
+        if filename not in DataManager.journals:
+            DataManager.journals[filename] = Journal(filename)
+        return DataManager.journals[filename]
+
+    @staticmethod
+    def append_to_file(obj, filename):
+        """
+        Appends one object to the journal of a CSV file.
+
+        :param obj: The object to append. It must have a `to_dict` method.
+        :param filename: The name of the CSV snapshot.
+        :type filename: str
+        :return: True if the journal is due for compaction.
+        :rtype: bool
+        """
+        return DataManager.journal_for(filename).append(obj) >= DataManager.compact_every
+
+    @staticmethod
+    def compact(data, filename):
+        """
+        Rewrites the CSV snapshot from the full list and empties its journal.
+
+        :param data: The complete list of objects, including journaled ones.
+        :type data: list
+        :param filename: The name of the CSV snapshot.
+        :type filename: str
+        """
+        journal = DataManager.journal_for(filename)
+        journal.sync()
+        DataManager.save_to_file(data, filename)
+        journal.truncate()
+
+    @staticmethod
+    def sync_journals():
+        """Forces the pending appends of every open journal to disk."""
+        for journal in DataManager.journals.values():
+            journal.sync()
+
+    @staticmethod
+    def close_journals():
+        """Syncs and closes every open journal."""
+        for journal in DataManager.journals.values():
+            journal.close()
+
+    @staticmethod
+    def save_tables(students, instructors, courses, directory='.'):
+        """
+        Saves the catalogue as normalized tables.
+
+        Writes ``students.csv``, ``instructors.csv``, ``courses.csv`` and
+        ``enrollments.csv`` into the directory, each under a temporary name
+        that is then renamed.
+
+        :param students: The students to save.
+        :type students: list
+        :param instructors: The instructors to save.
+        :type instructors: list
+        :param courses: The courses to save. Their enrolled students make up the enrollments table.
+        :type courses: list
+        :param directory: The directory of the tables.
+        :type directory: str
+        """
+        rows = {
+            'students': (student.to_row() for student in students),
+            'instructors': (instructor.to_row() for instructor in instructors),
+            'courses': (course.to_row() for course in courses),
+            'enrollments': ({'course_id': course.course_id, 'student_id': student.student_id}
+                            for course in courses for student in course.enrolled_students),
+        }
+        for table, fieldnames in DataManager.tables.items():
+            filename = os.path.join(directory, table + '.csv')
+            temp_filename = filename + '.tmp'
+            with open(temp_filename, 'w', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(rows[table])
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_filename, filename)
+
+    @staticmethod
+    def read_table(table, directory='.'):
+        """
+        Reads the rows of one normalized table, followed by those of its journal.
+
+        :param table: The name of the table, a key of ``tables``.
+        :type table: str
+        :param directory: The directory of the tables.
+        :type directory: str
+        :return: An iterator of dictionaries, one per row.
+        :rtype: iterator
+        """
+        filename = os.path.join(directory, table + '.csv')
+        try:
+            with open(filename, 'r', newline='') as file:
+                yield from csv.DictReader(file)
+        except FileNotFoundError:
+            print(f"No file named {filename} found, starting with an empty table.")
+        yield from DataManager.journal_for(filename).replay()
+
+    @staticmethod
+    def load_tables(directory='.'):
+        """
+        Loads the catalogue from normalized tables.
+
+        Each table is read once. People are indexed by ID as they are read,
+        and courses and enrollments are joined to them through those indexes,
+        so loading takes linear time. A later row with the same ID, such as
+        one replayed from a journal, replaces the earlier one, and rows that
+        refer to unknown IDs are skipped. Course rows in the older layout,
+        which nested the instructor and the enrolled students, are migrated
+        with :meth:`migrate_course_row`, so the next compaction writes them
+        out as normalized rows.
+
+        :param directory: The directory of the tables.
+        :type directory: str
+        :return: The lists of students, instructors and courses.
+        :rtype: tuple
+        :raises ValueError: If an old-layout course row cannot be read.
+        """
+        students = {row['student_id']: Student.from_dict(row) for row in DataManager.read_table('students', directory)}
+        instructors = {row['instructor_id']: Instructor.from_dict(row) for row in DataManager.read_table('instructors', directory)}
+        course_rows = {}
+        migrated = []
+        for row in DataManager.read_table('courses', directory):
+            if 'instructor_id' not in row and 'instructor' in row:
+                row = DataManager.migrate_course_row(row, students, instructors, migrated)
+            course_rows[row['course_id']] = row
+        if migrated:
+            print(f"Migrated the courses of {os.path.join(directory, 'courses.csv')} from the old layout.")
+        courses = {}
+        for course_id, row in course_rows.items():
+            instructor = instructors.get(row.get('instructor_id'))
+            courses[course_id] = course = Course(course_id, row['course_name'], instructor)
+            if instructor is not None:
+                instructor.assign_course(course)
+        enrollments = dict.fromkeys(migrated)
+        enrollments.update(dict.fromkeys((row['course_id'], row['student_id']) for row in DataManager.read_table('enrollments', directory)))
+        for course_id, student_id in enrollments:
+            course = courses.get(course_id)
+            student = students.get(student_id)
+            if course is not None and student is not None:
+                course.add_student(student)
+                student.register_course(course)
+        return list(students.values()), list(instructors.values()), list(courses.values())
+
+    @staticmethod
+    def migrate_course_row(row, students, instructors, enrollments):
+        """
+        Converts a course row of the old layout into a normalized one.
+
+        Old ``courses.csv`` files and their journals stored each course with
+        ``to_dict``: the instructor as a nested record and the enrolled
+        students as a list of records, written to CSV as Python literals.
+        The people found there are added to the indexes unless their ID is
+        already known, and the enrollments are collected.
+
+        :param row: The old-layout row.
+        :type row: dict
+        :param students: The students indexed by ID, updated in place.
+        :type students: dict
+        :param instructors: The instructors indexed by ID, updated in place.
+        :type instructors: dict
+        :param enrollments: The ``(course_id, student_id)`` pairs found, extended in place.
+        :type enrollments: list
+        :return: The row with an ``instructor_id`` column.
+        :rtype: dict
+        :raises ValueError: If the nested records cannot be read.
+        """
+        try:
+            instructor = row['instructor']
+            enrolled = row.get('enrolled_students') or []
+            if isinstance(instructor, str):
+                instructor = ast.literal_eval(instructor) if instructor else None
+            if isinstance(enrolled, str):
+                enrolled = ast.literal_eval(enrolled)
+            instructor_id = None
+            if instructor:
+                instructor_id = instructor['instructor_id']
+                if instructor_id not in instructors:
+                    instructors[instructor_id] = Instructor.from_dict(instructor)
+            for student in enrolled:
+                if student['student_id'] not in students:
+                    students[student['student_id']] = Student.from_dict(student)
+                enrollments.append((row['course_id'], student['student_id']))
+        except (ValueError, SyntaxError, TypeError, KeyError) as e:
+            raise ValueError(f"Cannot migrate course {row.get('course_id')} from the old layout: {e}") from e
+        return {'course_id': row['course_id'], 'course_name': row['course_name'], 'instructor_id': instructor_id}
+
+    @staticmethod
+    def append_row(table, row, directory='.'):
+        """
+        Appends one row to the journal of a normalized table.
+
+        :param table: The name of the table, a key of ``tables``.
+        :type table: str
+        :param row: The row, as returned by a ``to_row`` method or, for the
+            enrollments table, a ``course_id`` and ``student_id`` dictionary.
+        :type row: dict
+        :param directory: The directory of the tables.
+        :type directory: str
+        :return: True if the journal is due for compaction.
+        :rtype: bool
+        """
+        return DataManager.journal_for(os.path.join(directory, table + '.csv')).append(row) >= DataManager.compact_every
+
+    @staticmethod
+    def compact_tables(students, instructors, courses, directory='.'):
+        """
+        Rewrites the normalized tables from the full lists and empties their journals.
+
+        :param students: The complete list of students.
+        :type students: list
+        :param instructors: The complete list of instructors.
+        :type instructors: list
+        :param courses: The complete list of courses.
+        :type courses: list
+        :param directory: The directory of the tables.
+        :type directory: str
+        """
+        journals = [DataManager.journal_for(os.path.join(directory, table + '.csv')) for table in DataManager.tables]
+        for journal in journals:
+            journal.sync()
+        DataManager.save_tables(students, instructors, courses, directory)
+        for journal in journals:
+            journal.truncate()
 
 
 import tkinter as tk
@@ -280,7 +886,8 @@ def run_gui(student_list, instructor_list, course_list):
         try:
             new_student = Student(name, age, email, student_id)
             student_list.append(new_student)
-            DataManager.save_to_file(student_list, 'students.csv')
+            if DataManager.append_row('students', new_student.to_row()):
+                DataManager.compact_tables(student_list, instructor_list, course_list)
             student_name_var.set("")
             student_age_var.set("")
             student_email_var.set("")
@@ -301,7 +908,8 @@ def run_gui(student_list, instructor_list, course_list):
         try:
             new_instructor = Instructor(name, age, email, instructor_id)
             instructor_list.append(new_instructor)
-            DataManager.save_to_file(instructor_list, 'instructors.csv')
+            if DataManager.append_row('instructors', new_instructor.to_row()):
+                DataManager.compact_tables(student_list, instructor_list, course_list)
             update_instructor_dropdown()
             instructor_name_var.set("")
             instructor_age_var.set("")
@@ -324,8 +932,10 @@ def run_gui(student_list, instructor_list, course_list):
         
         if instructor:
             new_course = Course(course_id, course_name, instructor)
+            instructor.assign_course(new_course)
             course_list.append(new_course)
-            DataManager.save_to_file(course_list, 'courses.csv')
+            if DataManager.append_row('courses', new_course.to_row()):
+                DataManager.compact_tables(student_list, instructor_list, course_list)
             course_id_var.set("")
             course_name_var.set("")
             selected_instructor_var.set("")
@@ -400,14 +1010,32 @@ def run_gui(student_list, instructor_list, course_list):
     # Initial call to populate the instructor dropdown
     update_instructor_dropdown()
 
+    # Function to sync the journal appends that have not reached a batched fsync yet
+    def sync_journals():
+        """
+        Syncs every open journal to disk, then schedules itself again in one second.
+        """
+        DataManager.sync_journals()
+        root.after(1000, sync_journals)
+
+    # Function to fold the journals into the tables when the window closes
+    def on_close():
+        """
+        Compacts the tables, closes their journals and closes the window.
+        """
+        DataManager.compact_tables(student_list, instructor_list, course_list)
+        DataManager.close_journals()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    sync_journals()
+
     # Start the GUI event loop
     root.mainloop()
 
 
 # Load data at the beginning of the program
-student_list = DataManager.load_from_file('students.csv', Student)
-instructor_list = DataManager.load_from_file('instructors.csv', Instructor)
-course_list = DataManager.load_from_file('courses.csv', Course)
+student_list, instructor_list, course_list = DataManager.load_tables()
 
 # Main entry point
 if __name__ == "__main__":
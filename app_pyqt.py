@@ -1,250 +1,658 @@
-from PyQt5.QtWidgets import QMainWindow, QLineEdit, QTreeView, QMessageBox, QFileDialog, QInputDialog, QApplication, QVBoxLayout, QWidget
-from PyQt5.QtGui import QStandardItemModel, QStandardItem
-import json
-import csv
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QTreeView, QFileDialog, QMessageBox, QInputDialog, QTabWidget, QTableWidget, QTableWidgetItem
-import json
-import csv
-import re
+"""
+The PyQt GUI of the School Management System.
+
+The people and course classes live in :mod:`models` and are re-exported
+here for existing importers. Importing this module neither creates a
+``QApplication`` nor opens a window; run the application with
+``python app_pyqt.py`` or by calling :func:`main`.
+"""
+import bisect
+import functools
+import glob
+import itertools
+import os
+import sqlite3
 import sys
+import threading
+from operator import itemgetter
 
+from PyQt5.QtCore import Qt, QAbstractTableModel, QAbstractListModel, QModelIndex, QTimer, QObject, QRunnable, QThreadPool, QStandardPaths, QLockFile, pyqtSignal
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QFileDialog, QMessageBox, QInputDialog, QTabWidget, QTableView, QAbstractItemView, QProgressBar, QPlainTextEdit, QCompleter
 
-class Person:
+from bulk_import import import_rows
+from changes import ChangeTracker, apply_delta
+from diagnostics import Diagnostics, StallWatchdog, name_of
+from export import export_catalogue, export_rosters
+from models import Person, Student, Instructor, Course, save_data, load_data, validate_email, validate_age, export_to_csv, record_values
+from persistence import OperationCancelled, snapshot
+from registry import Registry
+from service import DEFAULT_HOST, DEFAULT_PORT, close_client, open_client, send_request
+from storage import SECTIONS, SqliteBackend, copy_catalogue, copy_database, copy_snapshot, load_catalogue, open_snapshot, save_catalogue, save_changes
+
+
+class RecordTableModel(QAbstractTableModel):
     """
-    A class to represent a person.
-
-    :param name: The name of the person.
-    :type name: str
-    :param age: The age of the person.
-    :type age: int
-    :param email: The email of the person.
-    :type email: str
+    A table model presenting students, instructors and courses as rows.
+
+    The model only keeps references to the records. Cell text is produced
+    in :meth:`data` when the view asks for it, so only the visible rows
+    cost anything to display.
+
+    :param registry: The registry whose records are displayed.
+    :type registry: Registry
     """
-    def __init__(self, name, age, email):
-        """
-        Constructs all the necessary attributes for the person object.
+    HEADERS = ["Type", "Name", "ID", "Course"]
 
-        :param name: The name of the person.
-        :type name: str
-        :param age: The age of the person.
-        :type age: int
-        :param email: The email of the person.
-        :type email: str
+    def __init__(self, registry, parent=None):
         """
-        self.name = name
-        self.age = age
-        self._email = email
+        Constructs an empty record model.
 
-    def introduce(self):
-        """
-        Prints a brief introduction of the person.
+        :param registry: The registry whose records are displayed.
+        :type registry: Registry
+        :param parent: The parent Qt object.
+        :type parent: QObject, optional
         """
-        print(f"Hello, I am {self.name}. I am {self.age} years old. My email is {self._email}.")
+        super().__init__(parent)
+        self.registry = registry
+        self._records = []
 
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._records)
 
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
 
-class Student(Person):
-    """
-    A class to represent a student, inheriting from Person.
-
-    :param name: The name of the student.
-    :type name: str
-    :param age: The age of the student.
-    :type age: int
-    :param email: The email of the student.
-    :type email: str
-    :param student_id: The ID of the student.
-    :type student_id: str
-    """
-    def __init__(self, name, age, email, student_id):
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return str(record_values(self._records[index.row()])[index.column()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def record_at(self, row):
         """
-        Constructs all the necessary attributes for the student object.
+        Returns the record shown in a row.
 
-        :param name: The name of the student.
-        :type name: str
-        :param age: The age of the student.
-        :type age: int
-        :param email: The email of the student.
-        :type email: str
-        :param student_id: The ID of the student.
-        :type student_id: str
+        :param row: The row number.
+        :type row: int
+        :return: The student, instructor or course in that row.
         """
-        super().__init__(name, age, email)
-        self.student_id = student_id
-        self.registered_courses = []
+        return self._records[row]
 
-    def register_course(self, course):
+    def refresh(self, records=None):
         """
-        Registers the student for a course.
+        Points the model at a new set of records with a single layout change.
 
-        :param course: The course to register the student in.
-        :type course: Course
+        :param records: The records to show. Defaults to every student,
+            instructor and course in the registry.
+        :type records: list, optional
         """
-        self.registered_courses.append(course)
-        print(f"{self.name} registered for {course.course_name}.")
+        if records is None:
+            records = [*self.registry.students, *self.registry.instructors, *self.registry.courses]
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [QModelIndex()] * len(persistent))
+        self._records = records
+        self.layoutChanged.emit()
+
+
+class DatabaseTableModel(QAbstractTableModel):
+    """
+    A table model paging students, instructors and courses out of a database
+    or an opened snapshot.
+
+    Rows are fetched a page at a time as the view scrolls, so only the
+    pages that have been shown are held in memory.
+
+    :param backend: The database or snapshot to read from.
+    :type backend: storage.SqliteBackend or storage.SnapshotCatalogue
+    """
+    HEADERS = RecordTableModel.HEADERS
+    PAGE_SIZE = 500
+
+    def __init__(self, backend, parent=None):
+        """
+        Constructs an empty database model.
+
+        :param backend: The database or snapshot to read from.
+        :type backend: storage.SqliteBackend or storage.SnapshotCatalogue
+        :param parent: The parent Qt object.
+        :type parent: QObject, optional
+        """
+        super().__init__(parent)
+        self.backend = backend
+        self.query = None
+        self._rows = []
+        self._section = len(SECTIONS)
+        self._after = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return str(self._rows[index.row()][index.column() + 1])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._section < len(SECTIONS)
+
+    def fetchMore(self, parent=QModelIndex()):
+        rows = []
+        while self._section < len(SECTIONS) and len(rows) < self.PAGE_SIZE:
+            wanted = self.PAGE_SIZE - len(rows)
+            page = self.backend.page(SECTIONS[self._section], self._after, wanted, self.query)
+            rows += page
+            if len(page) < wanted:
+                self._section += 1
+                self._after = 0
+            else:
+                self._after = page[-1][0]
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+            self._rows += rows
+            self.endInsertRows()
+
+    def refresh(self, query=None):
+        """
+        Starts again from the first page.
+
+        :param query: Only show records whose name starts with this text or
+            whose ID equals it.
+        :type query: str, optional
+        """
+        self.beginResetModel()
+        self.query = query or None
+        self._rows = []
+        self._section = 0
+        self._after = 0
+        self.endResetModel()
+        self.fetchMore()
+
+
+class RegistryListModel(QAbstractListModel):
+    """
+    A list model mirroring one registry collection, for use by comboboxes.
 
+    The model subscribes to the collection and turns each add, rename and
+    remove into a single row notification, so views never rebuild their
+    item lists. Rows show ``name (ID)`` and carry the record ID in
+    ``Qt.UserRole``.
 
-class Instructor(Person):
+    :param collection: The collection to mirror.
+    :type collection: registry.EntityIndex
     """
-    A class to represent an instructor, inheriting from Person.
-
-    :param name: The name of the instructor.
-    :type name: str
-    :param age: The age of the instructor.
-    :type age: int
-    :param email: The email of the instructor.
-    :type email: str
-    :param instructor_id: The ID of the instructor.
-    :type instructor_id: str
+    def __init__(self, collection, parent=None):
+        """
+        Constructs the model from the records already in the collection.
+
+        :param collection: The collection to mirror.
+        :type collection: registry.EntityIndex
+        :param parent: The parent Qt object.
+        :type parent: QObject, optional
+        """
+        super().__init__(parent)
+        self.collection = collection
+        self._records = []
+        # Each record gets an increasing insertion number, so the numbers of
+        # the rows stay sorted and a row is found by bisecting them
+        self._numbers = []
+        self._number_of = {}
+        self._next_number = 0
+        self._append(list(collection))
+        collection.subscribe(self.collection_changed)
+
+    def _append(self, records):
+        """
+        Appends records to the rows, numbering them.
+
+        :param records: The records to append.
+        :type records: list
+        """
+        numbers = range(self._next_number, self._next_number + len(records))
+        self._next_number += len(records)
+        self._records.extend(records)
+        self._numbers.extend(numbers)
+        self._number_of.update(zip(records, numbers))
+
+    def row_of(self, record):
+        """
+        Returns the row of a record in O(log n).
+
+        :param record: A record of the model.
+        :return: Its row.
+        :rtype: int
+        """
+        return bisect.bisect_left(self._numbers, self._number_of[record])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._records)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self._records[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return f"{self.collection.name_of(record)} ({self.collection.key_of(record)})"
+        if role == Qt.UserRole:
+            return self.collection.key_of(record)
+        return None
+
+    def collection_changed(self, event, record):
+        """
+        Applies one change of the collection to the model.
+
+        :param event: The kind of change.
+        :type event: str
+        :param record: The record that changed.
+        """
+        if event == "added":
+            row = len(self._records)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._append([record])
+            self.endInsertRows()
+        elif event == "added_many":
+            if record:
+                row = len(self._records)
+                self.beginInsertRows(QModelIndex(), row, row + len(record) - 1)
+                self._append(record)
+                self.endInsertRows()
+        elif event == "removed":
+            row = self.row_of(record)
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._records[row]
+            del self._numbers[row]
+            del self._number_of[record]
+            self.endRemoveRows()
+        elif event == "renamed":
+            index = self.index(self.row_of(record))
+            self.dataChanged.emit(index, index)
+        elif event == "cleared":
+            self.beginResetModel()
+            self._records = []
+            self._numbers = []
+            self._number_of = {}
+            self.endResetModel()
+
+
+def bind_combobox(combobox, model):
     """
-    def __init__(self, name, age, email, instructor_id):
+    Backs a combobox with a shared list model and a contains-filter completer.
+
+    :param combobox: The combobox to set up.
+    :type combobox: QComboBox
+    :param model: The model listing the choices.
+    :type model: RegistryListModel
+    """
+    combobox.setModel(model)
+    combobox.setEditable(True)
+    combobox.setInsertPolicy(QComboBox.NoInsert)
+    combobox.view().setUniformItemSizes(True)
+    completer = QCompleter(model, combobox)
+    completer.setFilterMode(Qt.MatchContains)
+    completer.setCaseSensitivity(Qt.CaseInsensitive)
+    combobox.setCompleter(completer)
+
+
+def selected_record(combobox, collection):
+    """
+    Returns the record chosen in a combobox bound with :func:`bind_combobox`.
+
+    :param combobox: The combobox to read.
+    :type combobox: QComboBox
+    :param collection: The collection the choices come from.
+    :type collection: registry.EntityIndex
+    :return: The selected record, or None if the typed text matches no choice.
+    """
+    index = combobox.currentIndex()
+    if index < 0 or combobox.currentText() != combobox.itemText(index):
+        return None
+    return collection.get(combobox.itemData(index))
+
+
+class WorkerSignals(QObject):
+    """
+    The signals a :class:`PersistenceWorker` uses to report back to the GUI thread.
+    """
+    progress = pyqtSignal(int)
+    batch = pyqtSignal(object)
+    finished = pyqtSignal()
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class PersistenceWorker(QRunnable):
+    """
+    Runs a function from :mod:`persistence` on a thread pool.
+
+    The function receives ``progress`` and ``cancelled`` keyword arguments,
+    and its outcome is reported through :attr:`signals`.
+
+    :param function: The function to run.
+    :type function: callable
+    :param args: The positional arguments of the function.
+    :param batches: Whether to pass a callback emitting the ``batch`` signal
+        as the last positional argument.
+    :type batches: bool
+    """
+    def __init__(self, function, *args, batches=False):
         """
-        Constructs all the necessary attributes for the instructor object.
+        Constructs a worker that has not started yet.
 
-        :param name: The name of the instructor.
-        :type name: str
-        :param age: The age of the instructor.
-        :type age: int
-        :param email: The email of the instructor.
-        :type email: str
-        :param instructor_id: The ID of the instructor.
-        :type instructor_id: str
+        :param function: The function to run.
+        :type function: callable
+        :param args: The positional arguments of the function.
+        :param batches: Whether to pass a callback emitting the ``batch``
+            signal as the last positional argument.
+        :type batches: bool
         """
-        super().__init__(name, age, email)
-        self.instructor_id = instructor_id
-        self.assigned_courses = []
+        super().__init__()
+        self.setAutoDelete(False)
+        self.function = function
+        self.args = args
+        self.batches = batches
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        """
+        Runs the function and emits the signal matching its outcome.
+        """
+        args = (*self.args, self.signals.batch.emit) if self.batches else self.args
+        try:
+            self.function(*args, progress=self.report_progress, cancelled=self.cancel_event)
+        except OperationCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit()
 
-    def assign_course(self, course):
+    def report_progress(self, done, total):
         """
-        Assigns the instructor to a course.
+        Emits the progress of the function as a percentage.
 
-        :param course: The course to assign the instructor to.
-        :type course: Course
+        :param done: The amount of work done.
+        :type done: int
+        :param total: The total amount of work.
+        :type total: int
         """
-        if course not in self.assigned_courses:
-            self.assigned_courses.append(course)
-            course.instructor = self
-            print(f"{self.name} is assigned to {course.course_name}.")
-        else:
-            print("Already Assigned")
+        self.signals.progress.emit(done * 100 // total if total else 100)
 
+    def cancel(self):
+        """
+        Asks the function to stop at its next checkpoint.
+        """
+        self.cancel_event.set()
 
-class Course:
+
+class AutosaveService(QObject):
     """
-    A class to represent a course.
-
-    :param course_id: The ID of the course.
-    :type course_id: str
-    :param course_name: The name of the course.
-    :type course_name: str
-    :param instructor: The instructor assigned to the course (default is None).
-    :type instructor: Instructor, optional
+    Saves the catalogue in the background as it changes, for crash recovery.
+
+    Changes are picked up by a :class:`changes.ChangeTracker` and coalesced:
+    the first change starts a timer, and when it fires, everything changed
+    in the meantime is written as one delta on a dedicated thread, so a
+    burst of edits costs one write and the handlers that made them only
+    pay for marking the records dirty. Deltas are appended to the recovery
+    journal, the ``.delta`` file of the autosave file, which is itself only
+    ever replaced by an atomic rename: a copy of the file just loaded, or
+    an empty catalogue in a new session.
+
+    Every session writes its own files, named after :attr:`name`, and holds
+    a ``QLockFile`` next to them while it runs, so several windows can
+    autosave to the same directory. The files are removed when the window
+    closes normally, so finding files whose lock is no longer held by a
+    running process means that session crashed.
+
+    :param registry: The registry to save.
+    :type registry: registry.Registry
+    :param directory: The directory of the autosave files.
+    :type directory: str
+    :param delay_ms: How long changes are collected before they are written.
+    :type delay_ms: int
+    :param parent: The parent object.
+    :type parent: QObject, optional
     """
-    def __init__(self, course_id, course_name, instructor=None):
+    BASENAME = "autosave"
+    failed = pyqtSignal(str)
+    sessions = itertools.count()
+
+    def __init__(self, registry, directory, delay_ms=2000, parent=None):
+        """
+        Constructs a service that has written nothing yet.
+
+        :param registry: The registry to save.
+        :type registry: registry.Registry
+        :param directory: The directory of the autosave files.
+        :type directory: str
+        :param delay_ms: How long changes are collected before they are written.
+        :type delay_ms: int
+        :param parent: The parent object.
+        :type parent: QObject, optional
+        """
+        super().__init__(parent)
+        self.registry = registry
+        self.directory = directory
+        self.name = f"{self.BASENAME}-{os.getpid()}-{next(self.sessions)}"
+        self.lock = None
+        self.orphan = None
+        self.filename = None
+        self.changes = ChangeTracker(registry)
+        self.writing = None
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.flush)
+        for collection in (registry.students, registry.instructors, registry.courses):
+            collection.subscribe(lambda event, record: self.schedule())
+
+    def lock_file(self, name):
+        """
+        Returns the lock of a session's autosave files.
+
+        The lock never goes stale with age, only when the process holding it
+        is no longer running.
+
+        :param name: The :attr:`name` of the session.
+        :type name: str
+        :return: The lock, not acquired.
+        :rtype: QLockFile
         """
-        Constructs all the necessary attributes for the course object.
+        lock = QLockFile(os.path.join(self.directory, name + ".lock"))
+        lock.setStaleLockTime(0)
+        return lock
 
-        :param course_id: The ID of the course.
-        :type course_id: str
-        :param course_name: The name of the course.
-        :type course_name: str
-        :param instructor: The instructor assigned to the course (default is None).
-        :type instructor: Instructor, optional
+    def recovery_file(self):
         """
-        self.course_id = course_id
-        self.course_name = course_name
-        self.instructor = instructor
-        self.enrolled_students = []
+        Returns the autosave file left behind by a session that crashed.
 
-    def add_students(self, student):
+        The lock of that session is taken over, so no other window offers
+        the same file, until :meth:`discard_recovery` is called.
+
+        :return: The file name, or None if there is none.
+        :rtype: str
         """
-        Adds a student to the course.
+        for match in sorted(glob.glob(os.path.join(glob.escape(self.directory), self.BASENAME + "*.*"))):
+            if match.endswith((".delta", ".tmp", ".lock")):
+                continue
+            name = os.path.splitext(os.path.basename(match))[0]
+            if name == self.name or (self.orphan is not None and name == self.orphan[0]):
+                continue
+            lock = self.lock_file(name)
+            if lock.tryLock(0):
+                self.discard_recovery(remove=False)
+                self.orphan = (name, lock)
+                return match
+        return None
 
-        :param student: The student to add to the course.
-        :type student: Student
+    def discard_recovery(self, remove=True):
         """
-        student.register_course(self)
-        self.enrolled_students.append(student)
-        print(f"{student.name} added to {self.course_name}.")
+        Lets go of the files of a crashed session found by :meth:`recovery_file`.
 
+        :param remove: Whether to delete the files, or leave them to be
+            offered again at the next start.
+        :type remove: bool
+        """
+        if self.orphan is None:
+            return
+        name, lock = self.orphan
+        if remove:
+            self.remove_files(name)
+        lock.unlock()
+        self.orphan = None
 
-def save_data(data, filename):
-    """
-    Saves data to a JSON file.
+    def touch(self, *records):
+        """
+        Marks records changed outside the registry's events, such as an enrollment.
 
-    :param data: The data to save.
-    :type data: dict
-    :param filename: The name of the file to save the data to.
-    :type filename: str
-    """
-    with open(filename, 'w') as file:
-        json.dump(data, file)
+        :param records: The students, instructors or courses that changed.
+        """
+        self.changes.touch(*records)
+        self.schedule()
 
+    def schedule(self):
+        """
+        Starts the coalescing timer, unless it is already running.
+        """
+        if self.changes.tracking and not self.timer.isActive():
+            self.timer.start()
 
-def load_data(filename):
-    """
-    Loads data from a JSON file.
+    def flush(self):
+        """
+        Writes what changed since the last write on the autosave thread.
 
-    :param filename: The name of the file to load the data from.
-    :type filename: str
-    :return: The loaded data.
-    :rtype: dict
-    """
-    with open(filename, 'r') as file:
-        return json.load(file)
+        Only one write runs at a time; changes made while it runs are
+        written when it finishes.
+        """
+        if self.writing is not None or not self.changes.tracking or not self.changes.is_dirty:
+            return
+        if self.filename is None or self.changes.needs_full_save:
+            self.filename = os.path.join(self.directory, self.name + ".sms")
+            self.remove_files()
+            worker = PersistenceWorker(save_catalogue, snapshot(self.registry), self.filename)
+            saved = (self.filename, self.changes.version, None)
+        else:
+            delta, version, hashes = self.changes.take_delta()
+            if delta is None:
+                self.changes.saved(self.filename, version, hashes)
+                return
+            worker = PersistenceWorker(save_changes, delta, self.filename)
+            saved = (self.filename, version, hashes)
+        self.start(worker, functools.partial(self.changes.saved, *saved))
 
+    def rebase(self, source):
+        """
+        Makes a copy of a file that was just loaded the new autosave file.
 
-def validate_email(email):
-    """
-    Validates an email address.
+        Changes made while the copy is written stay dirty and are written
+        after it. When the file is a crashed session's autosave being
+        restored, that session's files are removed once the copy is done.
 
-    :param email: The email address to validate.
-    :type email: str
-    :return: True if the email is valid, False otherwise.
-    :rtype: bool
-    """
-    pattern = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-    return re.match(pattern, email)
+        :param source: The file loaded.
+        :type source: str
+        """
+        self.pool.waitForDone()
+        filename = os.path.join(self.directory, self.name + os.path.splitext(source)[1].lower())
+        if os.path.abspath(source) == os.path.abspath(filename):
+            self.filename = filename
+            self.changes.loaded(filename)
+            return
+        self.remove_files()
+        self.filename = filename
+        worker = PersistenceWorker(copy_catalogue, source, filename)
+        if self.orphan is not None and os.path.splitext(os.path.basename(source))[0] == self.orphan[0]:
+            worker.signals.finished.connect(self.discard_recovery)
+        self.start(worker, functools.partial(self.changes.saved, filename, self.changes.version))
 
+    def start(self, worker, done):
+        """
+        Runs a write on the autosave thread.
 
-def validate_age(age):
-    """
-    Validates an age.
+        :param worker: The write.
+        :type worker: PersistenceWorker
+        :param done: Called on the GUI thread once the write succeeds.
+        :type done: callable
+        """
+        self.writing = worker
+        worker.signals.finished.connect(done)
+        worker.signals.finished.connect(self.written)
+        worker.signals.failed.connect(self.write_failed)
+        os.makedirs(self.directory, exist_ok=True)
+        if self.lock is None:
+            self.lock = self.lock_file(self.name)
+            self.lock.tryLock(0)
+        self.pool.start(worker)
 
-    :param age: The age to validate.
-    :type age: int or str
-    :return: True if the age is valid, False otherwise.
-    :rtype: bool
-    """
-    if isinstance(age, int) or age.isnumeric():
-        return age >= 0 and age <= 100
-    else:
-        return False
+    def written(self):
+        """
+        Schedules the next write if anything changed during the last one.
+        """
+        self.writing = None
+        if self.changes.is_dirty:
+            self.schedule()
 
+    def write_failed(self, error):
+        """
+        Reports a failed write; the next change retries with a full save.
 
-def export_to_csv(students, instructors, courses, filename):
-    """
-    Exports data to a CSV file.
-
-    :param students: The list of students.
-    :type students: list
-    :param instructors: The list of instructors.
-    :type instructors: list
-    :param courses: The list of courses.
-    :type courses: list
-    :param filename: The name of the file to save the data to.
-    :type filename: str
-    """
-    with open(filename, 'w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["Type", "Name", "ID", "Course"])
+        :param error: The error message.
+        :type error: str
+        """
+        self.writing = None
+        self.changes.needs_full_save = True
+        self.changes.tracking = True
+        self.failed.emit(error)
+
+    def remove_files(self, name=None):
+        """
+        Deletes the autosave files of a session, except its lock.
+
+        :param name: The :attr:`name` of the session. Defaults to this one.
+        :type name: str, optional
+        """
+        for filename in glob.glob(os.path.join(glob.escape(self.directory), glob.escape(name or self.name) + ".*")):
+            if not filename.endswith(".lock"):
+                os.remove(filename)
+
+    def close(self):
+        """
+        Stops the service after a normal shutdown, deletes its files and
+        releases its lock. The files of a crashed session that were not
+        restored are kept for the next start.
+        """
+        self.timer.stop()
+        self.changes.tracking = False
+        self.pool.waitForDone()
+        self.remove_files()
+        self.discard_recovery(remove=False)
+        if self.lock is not None:
+            self.lock.unlock()
 
-        for student in students:
-            writer.writerow(["Student", student.name, student.student_id, "N/A"])
-        for instructor in instructors:
-            writer.writerow(["Instructor", instructor.name, instructor.instructor_id, "N/A"])
-        for course in courses:
-            writer.writerow(["Course", course.course_name, course.course_id, ", ".join(student.name for student in course.enrolled_students)])
 
 class SchoolManagementSystemGUI(QMainWindow):
     """
@@ -252,34 +660,204 @@ class SchoolManagementSystemGUI(QMainWindow):
 
     Inherits from QMainWindow to create the main window for the application.
     """
-    def __init__(self):
+    SEARCH_LIMIT = 1000
+    SEARCH_DEBOUNCE_MS = 150
+    STALL_THRESHOLD_MS = 50
+    AUTOSAVE_DELAY_MS = 2000
+    TABS = [
+        ("Professor", "create_professor_section", None),
+        ("Student", "create_student_section", None),
+        ("Course", "create_course_section", None),
+        ("Student Course Registration", "create_registration_section", None),
+        ("Instructor Assignment", "create_instructor_assignment_section", None),
+        ("Display Records", "create_display_section", "display"),
+        ("Search Records", "create_search_section", "search"),
+        ("Edit/Delete Records", "create_edit_delete_section", "edit"),
+        ("Save/Load Data", "create_save_load_section", None),
+        ("Export to CSV", "create_export_csv_section", None),
+        ("Bulk Import", "create_bulk_import_section", None),
+        ("Diagnostics", "create_diagnostics_section", "diagnostics"),
+    ]
+    INSTRUMENTED_SLOTS = (
+        "tab_changed", "add_professor", "add_student", "add_course", "bulk_import", "add_imported_rows",
+        "register_student_for_course", "assign_instructor_to_course", "display_records",
+        "search_records", "load_records", "edit_record", "delete_record", "save_data", "save_changes",
+        "load_data", "add_loaded_batch", "export_to_csv", "export_rosters", "cancel_job",
+        "job_finished", "job_failed", "job_cancelled", "open_database", "open_snapshot", "close_database",
+        "connect_service", "service_connected", "disconnect_service", "service_replied", "service_lost",
+    )
+    EXPORT_FILTER = "CSV files (*.csv);;Gzip-compressed CSV (*.csv.gz);;LZMA-compressed CSV (*.csv.xz)"
+    STORAGE_FILTER = "JSON files (*.json);;Binary snapshots (*.sms);;CSV files (*.csv);;SQLite databases (*.db)"
+
+    def __init__(self, stall_threshold_ms=None, autosave=True, autosave_directory=None):
         """
         Constructs all the necessary attributes for the School Management System GUI.
+
+        :param stall_threshold_ms: How long the event loop may be blocked
+            before the stall is logged. Defaults to :attr:`STALL_THRESHOLD_MS`;
+            0 turns the stall watchdog off.
+        :type stall_threshold_ms: float, optional
+        :param autosave: Whether to autosave the catalogue for crash recovery.
+        :type autosave: bool
+        :param autosave_directory: The directory of the autosave files.
+            Defaults to an ``autosave`` directory in the application's local
+            data location.
+        :type autosave_directory: str, optional
         """
         super().__init__()
         self.setWindowTitle("School Management System")
 
-        self.students = []
-        self.instructors = []
-        self.courses = []
+        self.diagnostics = Diagnostics()
+        for name in self.INSTRUMENTED_SLOTS:
+            setattr(self, name, self.diagnostics.instrument(name, getattr(self, name)))
+
+        if stall_threshold_ms is None:
+            stall_threshold_ms = self.STALL_THRESHOLD_MS
+        self.watchdog = None
+        if stall_threshold_ms:
+            self.watchdog = StallWatchdog(self.diagnostics, stall_threshold_ms)
+            self.heartbeat_timer = QTimer(self)
+            self.heartbeat_timer.setInterval(int(self.watchdog.interval_ms))
+            self.heartbeat_timer.timeout.connect(self.watchdog.beat)
+            self.heartbeat_timer.start()
+            self.watchdog.start()
+
+        self.registry = Registry()
+        self.students = self.registry.students
+        self.instructors = self.registry.instructors
+        self.courses = self.registry.courses
+        self.changes = ChangeTracker(self.registry)
+        self.autosave = None
+        if autosave:
+            if autosave_directory is None:
+                autosave_directory = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation), "autosave")
+            self.autosave = AutosaveService(self.registry, autosave_directory, self.AUTOSAVE_DELAY_MS, self)
+            self.autosave.failed.connect(lambda error: self.statusBar().showMessage(f"Autosave failed: {error}", 5000))
+            QTimer.singleShot(0, self.offer_recovery)
+        self.student_list_model = RegistryListModel(self.students, self)
+        self.instructor_list_model = RegistryListModel(self.instructors, self)
+        self.course_list_model = RegistryListModel(self.courses, self)
+
+        self.record_model = RecordTableModel(self.registry, self)
+        self.search_result_model = RecordTableModel(self.registry, self)
+        self.edit_delete_model = RecordTableModel(self.registry, self)
+        self.treeview = None
+        self.search_result_treeview = None
+        self.edit_delete_treeview = None
+        self.stale_views = set()
+
+        self.backend = None
+        self.database_models = {}
+        self.service = None
+        self.service_address = None
+        self.service_pool = QThreadPool(self)
+        self.service_pool.setMaxThreadCount(1)
+        self.service_workers = set()
+        for section, collection in zip(SECTIONS, (self.students, self.instructors, self.courses)):
+            collection.subscribe(lambda event, record, section=section: self.write_through(section, event, record))
+            collection.subscribe(lambda event, record: self.mark_stale())
+
+        self.active_job = None
+        self.job_previous = None
+        self.thread_pool = QThreadPool.globalInstance()
+        self.job_progress = QProgressBar()
+        self.job_cancel_button = QPushButton("Cancel")
+        self.job_cancel_button.clicked.connect(self.cancel_job)
+        self.statusBar().addPermanentWidget(self.job_progress)
+        self.statusBar().addPermanentWidget(self.job_cancel_button)
+        self.job_progress.hide()
+        self.job_cancel_button.hide()
 
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
-        self.create_professor_section()
-        self.create_student_section()
-        self.create_course_section()
-        self.create_registration_section()
-        self.create_instructor_assignment_section()
-        self.create_display_section()
-        self.create_search_section()
-        self.create_edit_delete_section()
-        self.create_save_load_section()
-        self.create_export_csv_section()
+        self.built_tabs = set()
+        for title, _, _ in self.TABS:
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, title)
+        self.tabs.currentChanged.connect(self.tab_changed)
+        self.tab_changed(self.tabs.currentIndex())
+
+    def tab_changed(self, index):
+        """
+        Builds a tab the first time it is shown and refreshes its view if stale.
+
+        :param index: The index of the tab now shown.
+        :type index: int
+        """
+        if index < 0:
+            return
+        _, builder, view = self.TABS[index]
+        if index not in self.built_tabs:
+            self.built_tabs.add(index)
+            self.tabs.widget(index).layout().addWidget(getattr(self, builder)())
+        if view in self.stale_views or view == "diagnostics":
+            self.refresh_view(view)
+
+    def current_view(self):
+        """
+        Returns the data view of the tab being shown.
+
+        :return: ``"display"``, ``"search"``, ``"edit"``, ``"diagnostics"`` or None.
+        :rtype: str
+        """
+        index = self.tabs.currentIndex()
+        return self.TABS[index][2] if index >= 0 else None
+
+    def mark_stale(self):
+        """
+        Marks every data view as needing a refresh the next time it is shown.
+        """
+        self.stale_views.update(("display", "search", "edit"))
+
+    def refresh_view(self, view):
+        """
+        Refreshes a data view now if its tab is shown, or marks it stale.
+
+        :param view: ``"display"``, ``"search"``, ``"edit"`` or ``"diagnostics"``.
+        :type view: str
+        """
+        if self.current_view() != view:
+            self.stale_views.add(view)
+            return
+        self.stale_views.discard(view)
+        if view == "search":
+            self.search_records()
+        elif view == "diagnostics":
+            self.show_diagnostics()
+        else:
+            self.view_model(view).refresh()
+
+    def view_model(self, view):
+        """
+        Returns the model a data view currently shows.
+
+        :param view: ``"display"``, ``"search"`` or ``"edit"``.
+        :type view: str
+        :return: The database model of the view while a database is open,
+            and its in-memory model otherwise.
+        :rtype: QAbstractTableModel
+        """
+        if self.backend is not None:
+            return self.database_models[view]
+        return {"display": self.record_model, "search": self.search_result_model, "edit": self.edit_delete_model}[view]
+
+    def apply_view_models(self):
+        """
+        Points the data views that have been built at their current models.
+        """
+        for view, table in (("display", self.treeview), ("search", self.search_result_treeview), ("edit", self.edit_delete_treeview)):
+            if table is not None:
+                table.setModel(self.view_model(view))
 
     def create_professor_section(self):
         """
         Creates the professor section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         professor_widget = QWidget()
         layout = QVBoxLayout()
@@ -309,11 +887,14 @@ class SchoolManagementSystemGUI(QMainWindow):
         layout.addWidget(self.professor_message_label)
 
         professor_widget.setLayout(layout)
-        self.tabs.addTab(professor_widget, "Professor")
+        return professor_widget
 
     def create_student_section(self):
         """
         Creates the student section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         student_widget = QWidget()
         layout = QVBoxLayout()
@@ -343,11 +924,14 @@ class SchoolManagementSystemGUI(QMainWindow):
         layout.addWidget(self.student_message_label)
 
         student_widget.setLayout(layout)
-        self.tabs.addTab(student_widget, "Student")
+        return student_widget
 
     def create_course_section(self):
         """
         Creates the course section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         course_widget = QWidget()
         layout = QVBoxLayout()
@@ -371,11 +955,14 @@ class SchoolManagementSystemGUI(QMainWindow):
         layout.addWidget(self.course_message_label)
 
         course_widget.setLayout(layout)
-        self.tabs.addTab(course_widget, "Course")
+        return course_widget
 
     def create_registration_section(self):
         """
         Creates the student course registration section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         registration_widget = QWidget()
         layout = QVBoxLayout()
@@ -383,6 +970,8 @@ class SchoolManagementSystemGUI(QMainWindow):
         form_layout = QVBoxLayout()
         self.student_combobox = QComboBox()
         self.course_combobox = QComboBox()
+        bind_combobox(self.student_combobox, self.student_list_model)
+        bind_combobox(self.course_combobox, self.course_list_model)
 
         form_layout.addWidget(QLabel("Select Student:"))
         form_layout.addWidget(self.student_combobox)
@@ -399,11 +988,14 @@ class SchoolManagementSystemGUI(QMainWindow):
         layout.addWidget(self.registration_message_label)
 
         registration_widget.setLayout(layout)
-        self.tabs.addTab(registration_widget, "Student Course Registration")
+        return registration_widget
 
     def create_instructor_assignment_section(self):
         """
         Creates the instructor assignment section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         instructor_assignment_widget = QWidget()
         layout = QVBoxLayout()
@@ -411,6 +1003,8 @@ class SchoolManagementSystemGUI(QMainWindow):
         form_layout = QVBoxLayout()
         self.instructor_combobox = QComboBox()
         self.course_combobox_instructor = QComboBox()
+        bind_combobox(self.instructor_combobox, self.instructor_list_model)
+        bind_combobox(self.course_combobox_instructor, self.course_list_model)
 
         form_layout.addWidget(QLabel("Select Instructor:"))
         form_layout.addWidget(self.instructor_combobox)
@@ -427,18 +1021,20 @@ class SchoolManagementSystemGUI(QMainWindow):
         layout.addWidget(self.instructor_assignment_message_label)
 
         instructor_assignment_widget.setLayout(layout)
-        self.tabs.addTab(instructor_assignment_widget, "Instructor Assignment")
+        return instructor_assignment_widget
 
     def create_display_section(self):
         """
         Creates the display records section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         display_widget = QWidget()
         layout = QVBoxLayout()
 
-        self.treeview = QTableWidget()
-        self.treeview.setColumnCount(4)
-        self.treeview.setHorizontalHeaderLabels(["Type", "Name", "ID", "Course"])
+        self.treeview = QTableView()
+        self.treeview.setModel(self.view_model("display"))
         layout.addWidget(self.treeview)
 
         display_button = QPushButton("Display All Records")
@@ -446,11 +1042,14 @@ class SchoolManagementSystemGUI(QMainWindow):
         layout.addWidget(display_button)
 
         display_widget.setLayout(layout)
-        self.tabs.addTab(display_widget, "Display Records")
+        return display_widget
 
     def create_search_section(self):
         """
         Creates the search records section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         search_widget = QWidget()
         layout = QVBoxLayout()
@@ -463,28 +1062,40 @@ class SchoolManagementSystemGUI(QMainWindow):
 
         layout.addLayout(form_layout)
 
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_records)
+        self.search_entry.textChanged.connect(self.search_timer.start)
+
         search_button = QPushButton("Search")
         search_button.clicked.connect(self.search_records)
         layout.addWidget(search_button)
 
-        self.search_result_treeview = QTableWidget()
-        self.search_result_treeview.setColumnCount(4)
-        self.search_result_treeview.setHorizontalHeaderLabels(["Type", "Name", "ID", "Course"])
+        self.search_result_treeview = QTableView()
+        self.search_result_treeview.setModel(self.view_model("search"))
         layout.addWidget(self.search_result_treeview)
 
+        self.search_message_label = QLabel("")
+        layout.addWidget(self.search_message_label)
+
         search_widget.setLayout(layout)
-        self.tabs.addTab(search_widget, "Search Records")
+        return search_widget
 
     def create_edit_delete_section(self):
         """
         Creates the edit/delete records section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         edit_delete_widget = QWidget()
         layout = QVBoxLayout()
 
-        self.edit_delete_treeview = QTableWidget()
-        self.edit_delete_treeview.setColumnCount(4)
-        self.edit_delete_treeview.setHorizontalHeaderLabels(["Type", "Name", "ID", "Course"])
+        self.edit_delete_treeview = QTableView()
+        self.edit_delete_treeview.setModel(self.view_model("edit"))
+        self.edit_delete_treeview.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.edit_delete_treeview.setSelectionMode(QAbstractItemView.SingleSelection)
         layout.addWidget(self.edit_delete_treeview)
 
         button_layout = QHBoxLayout()
@@ -503,11 +1114,14 @@ class SchoolManagementSystemGUI(QMainWindow):
         layout.addLayout(button_layout)
 
         edit_delete_widget.setLayout(layout)
-        self.tabs.addTab(edit_delete_widget, "Edit/Delete Records")
+        return edit_delete_widget
 
     def create_save_load_section(self):
         """
         Creates the save/load data section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         save_load_widget = QWidget()
         layout = QVBoxLayout()
@@ -517,18 +1131,57 @@ class SchoolManagementSystemGUI(QMainWindow):
         save_button.clicked.connect(self.save_data)
         button_layout.addWidget(save_button)
 
+        save_changes_button = QPushButton("Save Changes")
+        save_changes_button.clicked.connect(self.save_changes)
+        button_layout.addWidget(save_changes_button)
+
         load_button = QPushButton("Load Data")
         load_button.clicked.connect(self.load_data)
         button_layout.addWidget(load_button)
 
         layout.addLayout(button_layout)
 
+        database_layout = QHBoxLayout()
+        open_database_button = QPushButton("Open Database")
+        open_database_button.clicked.connect(self.open_database)
+        database_layout.addWidget(open_database_button)
+
+        open_snapshot_button = QPushButton("Open Snapshot")
+        open_snapshot_button.clicked.connect(self.open_snapshot)
+        database_layout.addWidget(open_snapshot_button)
+
+        close_database_button = QPushButton("Close Database")
+        close_database_button.clicked.connect(self.close_database)
+        database_layout.addWidget(close_database_button)
+
+        layout.addLayout(database_layout)
+
+        self.database_label = QLabel("No database open")
+        layout.addWidget(self.database_label)
+
+        service_layout = QHBoxLayout()
+        connect_service_button = QPushButton("Connect to Service")
+        connect_service_button.clicked.connect(self.connect_service)
+        service_layout.addWidget(connect_service_button)
+
+        disconnect_service_button = QPushButton("Disconnect Service")
+        disconnect_service_button.clicked.connect(self.disconnect_service)
+        service_layout.addWidget(disconnect_service_button)
+
+        layout.addLayout(service_layout)
+
+        self.service_label = QLabel("Not connected to a service")
+        layout.addWidget(self.service_label)
+
         save_load_widget.setLayout(layout)
-        self.tabs.addTab(save_load_widget, "Save/Load Data")
+        return save_load_widget
 
     def create_export_csv_section(self):
         """
         Creates the export to CSV section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
         """
         export_csv_widget = QWidget()
         layout = QVBoxLayout()
@@ -537,8 +1190,102 @@ class SchoolManagementSystemGUI(QMainWindow):
         export_csv_button.clicked.connect(self.export_to_csv)
         layout.addWidget(export_csv_button)
 
+        form_layout = QVBoxLayout()
+        self.roster_compression_combobox = QComboBox()
+        self.roster_compression_combobox.addItems(["None", "gzip", "lzma"])
+
+        form_layout.addWidget(QLabel("Roster Compression:"))
+        form_layout.addWidget(self.roster_compression_combobox)
+
+        layout.addLayout(form_layout)
+
+        export_rosters_button = QPushButton("Export Course Rosters")
+        export_rosters_button.clicked.connect(self.export_rosters)
+        layout.addWidget(export_rosters_button)
+
         export_csv_widget.setLayout(layout)
-        self.tabs.addTab(export_csv_widget, "Export to CSV")
+        return export_csv_widget
+
+    def create_bulk_import_section(self):
+        """
+        Creates the bulk import section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
+        """
+        bulk_import_widget = QWidget()
+        layout = QVBoxLayout()
+
+        form_layout = QVBoxLayout()
+        self.bulk_kind_combobox = QComboBox()
+        self.bulk_kind_combobox.addItems(["Students", "Instructors"])
+
+        form_layout.addWidget(QLabel("Import:"))
+        form_layout.addWidget(self.bulk_kind_combobox)
+
+        layout.addLayout(form_layout)
+
+        bulk_import_button = QPushButton("Import from CSV/JSON")
+        bulk_import_button.clicked.connect(self.bulk_import)
+        layout.addWidget(bulk_import_button)
+
+        self.bulk_import_message_label = QLabel("")
+        layout.addWidget(self.bulk_import_message_label)
+
+        self.bulk_import_errors = QPlainTextEdit()
+        self.bulk_import_errors.setReadOnly(True)
+        layout.addWidget(self.bulk_import_errors)
+
+        bulk_import_widget.setLayout(layout)
+        return bulk_import_widget
+
+    def create_diagnostics_section(self):
+        """
+        Creates the diagnostics section of the GUI.
+
+        :return: The widget of the tab.
+        :rtype: QWidget
+        """
+        diagnostics_widget = QWidget()
+        layout = QVBoxLayout()
+        fixed_font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.show_diagnostics)
+        button_layout.addWidget(refresh_button)
+
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_diagnostics)
+        button_layout.addWidget(reset_button)
+
+        self.profiling_button = QPushButton("Start Profiling")
+        self.profiling_button.clicked.connect(self.toggle_profiling)
+        button_layout.addWidget(self.profiling_button)
+
+        self.memory_tracing_button = QPushButton("Start Memory Tracing")
+        self.memory_tracing_button.clicked.connect(self.toggle_memory_tracing)
+        button_layout.addWidget(self.memory_tracing_button)
+
+        dump_button = QPushButton("Dump to JSON")
+        dump_button.clicked.connect(self.dump_diagnostics)
+        button_layout.addWidget(dump_button)
+
+        layout.addLayout(button_layout)
+
+        self.diagnostics_text = QPlainTextEdit()
+        self.diagnostics_text.setReadOnly(True)
+        self.diagnostics_text.setFont(fixed_font)
+        layout.addWidget(self.diagnostics_text)
+
+        layout.addWidget(QLabel("Profile:"))
+        self.profile_text = QPlainTextEdit()
+        self.profile_text.setReadOnly(True)
+        self.profile_text.setFont(fixed_font)
+        layout.addWidget(self.profile_text)
+
+        diagnostics_widget.setLayout(layout)
+        return diagnostics_widget
 
     def add_professor(self):
         """
@@ -551,13 +1298,19 @@ class SchoolManagementSystemGUI(QMainWindow):
         email = self.professor_email_entry.text()
         professor_id = self.professor_id_entry.text()
 
-        if validate_email(email) and validate_age(age):
-            professor = Instructor(name, age, email, professor_id)
-            self.instructors.append(professor)
-            self.update_instructor_combobox()
-            self.professor_message_label.setText(f"Added Professor: {professor.name}")
-            self.professor_message_label.setStyleSheet("color: green;")
-            professor.introduce()
+        if professor_id in self.instructors:
+            self.professor_message_label.setText(f"Instructor ID {professor_id} already exists")
+            self.professor_message_label.setStyleSheet("color: red;")
+        elif validate_email(email) and validate_age(age):
+            def apply():
+                professor = Instructor(name, age, email, professor_id)
+                self.instructors.add(professor)
+                self.professor_message_label.setText(f"Added Professor: {professor.name}")
+                self.professor_message_label.setStyleSheet("color: green;")
+                professor.introduce()
+
+            self.apply_through_service(self.professor_message_label, apply, "add_instructor",
+                                       name=name, age=age, email=email, instructor_id=professor_id)
         else:
             self.professor_message_label.setText("Invalid professor data")
             self.professor_message_label.setStyleSheet("color: red;")
@@ -573,13 +1326,19 @@ class SchoolManagementSystemGUI(QMainWindow):
         email = self.student_email_entry.text()
         student_id = self.student_id_entry.text()
 
-        if validate_email(email) and validate_age(age):
-            student = Student(name, age, email, student_id)
-            self.students.append(student)
-            self.update_student_combobox()
-            self.student_message_label.setText(f"Added Student: {student.name}")
-            self.student_message_label.setStyleSheet("color: green;")
-            student.introduce()
+        if student_id in self.students:
+            self.student_message_label.setText(f"Student ID {student_id} already exists")
+            self.student_message_label.setStyleSheet("color: red;")
+        elif validate_email(email) and validate_age(age):
+            def apply():
+                student = Student(name, age, email, student_id)
+                self.students.add(student)
+                self.student_message_label.setText(f"Added Student: {student.name}")
+                self.student_message_label.setStyleSheet("color: green;")
+                student.introduce()
+
+            self.apply_through_service(self.student_message_label, apply, "add_student",
+                                       name=name, age=age, email=email, student_id=student_id)
         else:
             self.student_message_label.setText("Invalid student data")
             self.student_message_label.setStyleSheet("color: red;")
@@ -591,26 +1350,90 @@ class SchoolManagementSystemGUI(QMainWindow):
         course_id = self.course_id_entry.text()
         course_name = self.course_name_entry.text()
 
-        course = Course(course_id, course_name)
-        self.courses.append(course)
-        self.update_course_combobox()
-        self.course_message_label.setText(f"Added Course: {course.course_name}")
-        self.course_message_label.setStyleSheet("color: green;")
+        if course_id in self.courses:
+            self.course_message_label.setText(f"Course ID {course_id} already exists")
+            self.course_message_label.setStyleSheet("color: red;")
+            return
+
+        def apply():
+            course = Course(course_id, course_name)
+            self.courses.add(course)
+            self.course_message_label.setText(f"Added Course: {course.course_name}")
+            self.course_message_label.setStyleSheet("color: green;")
+
+        self.apply_through_service(self.course_message_label, apply, "add_course", course_id=course_id, course_name=course_name)
+
+    def bulk_import(self):
+        """
+        Imports students or instructors from a CSV or JSON file.
+
+        The file is read and validated in one pass on the thread pool, then
+        :meth:`add_imported_rows` inserts every valid row in a single
+        registry operation. Rejected rows are listed with their row number.
+        """
+        if self.blocked_by_service("Bulk Import"):
+            return
+        kind = self.bulk_kind_combobox.currentText()
+        filename, _ = QFileDialog.getOpenFileName(self, "Bulk Import", "", "Data files (*.csv *.json)")
+        if not filename:
+            return
+
+        if kind == "Students":
+            section, id_field, collection, factory = 'students', 'student_id', self.students, Student
+        else:
+            section, id_field, collection, factory = 'instructors', 'instructor_id', self.instructors, Instructor
+
+        existing = frozenset(collection.key_of(record) for record in collection)
+        worker = PersistenceWorker(import_rows, filename, section, id_field, existing, batches=True)
+        worker.signals.batch.connect(self.add_imported_rows)
+        if self.start_job("Bulk Import", worker, f"Import from {filename} finished"):
+            self.job_import = (kind, id_field, collection, factory)
+
+    def add_imported_rows(self, result):
+        """
+        Adds the rows validated by a bulk import.
+
+        Rows whose ID was taken while the file was being read are rejected
+        as well.
+
+        :param result: The valid rows and the errors, as returned by
+            :func:`bulk_import.validate_batch`.
+        :type result: tuple
+        """
+        valid, errors = result
+        kind, id_field, collection, factory = self.job_import
+        errors = [(f"Row {number}", message) for number, message in errors]
+        errors += [("Added during the import", f"Duplicate {id_field}: {row[3]}") for row in valid if row[3] in collection]
+        valid = [row for row in valid if row[3] not in collection]
+        collection.add_many([factory(*row) for row in valid])
+        self.display_records()
+
+        self.bulk_import_message_label.setText(f"Imported {len(valid)} {kind.lower()}, rejected {len(errors)} rows")
+        self.bulk_import_message_label.setStyleSheet("color: red;" if errors else "color: green;")
+        self.bulk_import_errors.setPlainText("\n".join(f"{where}: {message}" for where, message in errors))
 
     def register_student_for_course(self):
         """
         Registers a student for a course.
         """
-        selected_student = self.student_combobox.currentText()
-        selected_course = self.course_combobox.currentText()
-
-        student = next((s for s in self.students if s.name == selected_student), None)
-        course = next((c for c in self.courses if c.course_name == selected_course), None)
+        student = selected_record(self.student_combobox, self.students)
+        course = selected_record(self.course_combobox, self.courses)
 
-        if student and course:
-            course.add_students(student)
-            self.registration_message_label.setText(f"Registered {student.name} for {course.course_name}")
-            self.registration_message_label.setStyleSheet("color: green;")
+        if student and course and course.is_enrolled(student):
+            self.registration_message_label.setText(f"{student.name} is already registered for {course.course_name}")
+            self.registration_message_label.setStyleSheet("color: red;")
+        elif student and course:
+            def apply():
+                course.add_students(student)
+                self.record_changed(course)
+                if self.backend is not None:
+                    self.backend.enroll(course.course_id, student.student_id)
+                self.mark_stale()
+                self.registration_message_label.setText(f"Registered {student.name} for {course.course_name}")
+                self.registration_message_label.setStyleSheet("color: green;")
+
+            self.apply_through_service(self.registration_message_label, apply, "register",
+                                       student_id=student.student_id, course_id=course.course_id)
         else:
             self.registration_message_label.setText("Invalid student or course")
             self.registration_message_label.setStyleSheet("color: red;")
@@ -619,146 +1442,132 @@ class SchoolManagementSystemGUI(QMainWindow):
         """
         Assigns an instructor to a course.
         """
-        selected_course = self.course_combobox_instructor.currentText()
-        selected_instructor = self.instructor_combobox.currentText()
-
-        course = next((c for c in self.courses if c.course_name == selected_course), None)
-        instructor = next((i for i in self.instructors if i.name == selected_instructor), None)
+        course = selected_record(self.course_combobox_instructor, self.courses)
+        instructor = selected_record(self.instructor_combobox, self.instructors)
 
         if course and instructor:
-            instructor.assign_course(course)
-            self.instructor_assignment_message_label.setText(f"Assigned {instructor.name} to {course.course_name}")
-            self.instructor_assignment_message_label.setStyleSheet("color: green;")
+            def apply():
+                instructor.assign_course(course)
+                self.record_changed(course)
+                if self.backend is not None:
+                    self.backend.assign(course.course_id, instructor.instructor_id)
+                self.mark_stale()
+                self.instructor_assignment_message_label.setText(f"Assigned {instructor.name} to {course.course_name}")
+                self.instructor_assignment_message_label.setStyleSheet("color: green;")
+
+            self.apply_through_service(self.instructor_assignment_message_label, apply, "assign",
+                                       course_id=course.course_id, instructor_id=instructor.instructor_id)
         else:
             self.instructor_assignment_message_label.setText("Invalid course or instructor")
             self.instructor_assignment_message_label.setStyleSheet("color: red;")
 
-    def update_student_combobox(self):
-        """
-        Updates the student combobox with the current list of students.
-        """
-        self.student_combobox.clear()
-        self.student_combobox.addItems([student.name for student in self.students])
-
-    def update_course_combobox(self):
-        """
-        Updates the course combobox with the current list of courses.
-        """
-        self.course_combobox.clear()
-        self.course_combobox.addItems([course.course_name for course in self.courses])
-        self.course_combobox_instructor.clear()
-        self.course_combobox_instructor.addItems([course.course_name for course in self.courses])
-
-    def update_instructor_combobox(self):
-        """
-        Updates the instructor combobox with the current list of instructors.
-        """
-        self.instructor_combobox.clear()
-        self.instructor_combobox.addItems([instructor.name for instructor in self.instructors])
-
     def display_records(self):
         """
         Displays all records in the system.
+
+        The table is only filled while its tab is shown; otherwise it is
+        refreshed the next time the tab is opened.
         """
-        self.treeview.setRowCount(0)
-        for student in self.students:
-            row_position = self.treeview.rowCount()
-            self.treeview.insertRow(row_position)
-            self.treeview.setItem(row_position, 0, QTableWidgetItem("Student"))
-            self.treeview.setItem(row_position, 1, QTableWidgetItem(student.name))
-            self.treeview.setItem(row_position, 2, QTableWidgetItem(student.student_id))
-            self.treeview.setItem(row_position, 3, QTableWidgetItem("N/A"))
-        for instructor in self.instructors:
-            row_position = self.treeview.rowCount()
-            self.treeview.insertRow(row_position)
-            self.treeview.setItem(row_position, 0, QTableWidgetItem("Instructor"))
-            self.treeview.setItem(row_position, 1, QTableWidgetItem(instructor.name))
-            self.treeview.setItem(row_position, 2, QTableWidgetItem(instructor.instructor_id))
-            self.treeview.setItem(row_position, 3, QTableWidgetItem("N/A"))
-        for course in self.courses:
-            row_position = self.treeview.rowCount()
-            self.treeview.insertRow(row_position)
-            self.treeview.setItem(row_position, 0, QTableWidgetItem("Course"))
-            self.treeview.setItem(row_position, 1, QTableWidgetItem(course.course_name))
-            self.treeview.setItem(row_position, 2, QTableWidgetItem(course.course_id))
-            self.treeview.setItem(row_position, 3, QTableWidgetItem(", ".join(student.name for student in course.enrolled_students)))
+        self.refresh_view("display")
 
     def search_records(self):
         """
         Searches for records in the system based on the search query.
-        """
-        search_query = self.search_entry.text()
-        self.search_result_model.clear()
 
-        for student in self.students:
-            if search_query in student.name or search_query in student.student_id:
-                self.search_result_model.appendRow([QStandardItem("Student"), QStandardItem(student.name), QStandardItem(student.student_id), QStandardItem("N/A")])
-        for instructor in self.instructors:
-            if search_query in instructor.name or search_query in instructor.instructor_id:
-                self.search_result_model.appendRow([QStandardItem("Instructor"), QStandardItem(instructor.name), QStandardItem(instructor.instructor_id), QStandardItem("N/A")])
-        for course in self.courses:
-            if search_query in course.course_name or search_query in course.course_id:
-                self.search_result_model.appendRow([QStandardItem("Course"), QStandardItem(course.course_name), QStandardItem(course.course_id), QStandardItem(", ".join(student.name for student in course.enrolled_students))])
+        Runs when the Search button is pressed and, debounced, while the
+        user types in the search box. With a database or snapshot open, it
+        is searched for names starting with the query or an exact ID.
+        """
+        self.search_timer.stop()
+        self.stale_views.discard("search")
+        if self.backend is not None:
+            model = self.database_models["search"]
+            model.refresh(self.search_entry.text())
+            self.search_message_label.setText(f"{model.rowCount()} matches loaded")
+            return
+        results = self.registry.search(self.search_entry.text(), self.SEARCH_LIMIT)
+        self.search_result_model.refresh(results)
+        if len(results) >= self.SEARCH_LIMIT:
+            self.search_message_label.setText(f"Showing the first {self.SEARCH_LIMIT} matches")
+        else:
+            self.search_message_label.setText(f"{len(results)} matches")
 
     def edit_record(self):
         """
         Edits a selected record in the system.
         """
+        if self.blocked_by_service("Edit Record"):
+            return
         selected_item = self.edit_delete_treeview.selectedIndexes()
         if selected_item:
             item_values = [index.data() for index in selected_item]
             record_type, name, record_id, _ = item_values
 
-            if record_type == "Student":
-                student = next((s for s in self.students if str(s.student_id) == str(record_id)), None)
+            if self.stored_only(record_type, record_id):
+                new_name, ok = QInputDialog.getText(self, f"Edit {record_type}", "Enter new name:", text=name)
+                if ok and new_name:
+                    self.backend.rename(self.section_of(record_type), record_id, new_name)
+                    self.display_records()
+                    self.load_records()
+            elif record_type == "Student":
+                student = self.students.get(record_id)
                 if student:
                     new_name, ok = QInputDialog.getText(self, "Edit Student", "Enter new name:", text=student.name)
                     if ok and new_name:
-                        student.name = new_name
+                        self.students.rename(student, new_name)
                         self.display_records()
             elif record_type == "Instructor":
-                instructor = next((i for i in self.instructors if str(i.instructor_id) == str(record_id)), None)
+                instructor = self.instructors.get(record_id)
                 if instructor:
                     new_name, ok = QInputDialog.getText(self, "Edit Instructor", "Enter new name:", text=instructor.name)
                     if ok and new_name:
-                        instructor.name = new_name
+                        self.instructors.rename(instructor, new_name)
                         self.display_records()
             elif record_type == "Course":
-                course = next((c for c in self.courses if str(c.course_id) == str(record_id)), None)
+                course = self.courses.get(record_id)
                 if course:
                     new_name, ok = QInputDialog.getText(self, "Edit Course", "Enter new course name:", text=course.course_name)
                     if ok and new_name:
-                        course.course_name = new_name
+                        self.courses.rename(course, new_name)
                         self.display_records()
 
     def delete_record(self):
         """
         Deletes a selected record from the system.
         """
+        if self.blocked_by_service("Delete Record"):
+            return
         selected_item = self.edit_delete_treeview.selectedIndexes()
         if selected_item:
             item_values = [index.data() for index in selected_item]
             record_type, name, record_id, _ = item_values
 
-            if record_type == "Student":
-                student = next((s for s in self.students if str(s.student_id) == str(record_id)), None)
+            if self.stored_only(record_type, record_id):
+                self.backend.delete(self.section_of(record_type), record_id)
+                self.display_records()
+                self.load_records()
+            elif record_type == "Student":
+                student = self.students.get(record_id)
                 if student:
                     self.students.remove(student)
                     self.display_records()
+                    self.load_records()
                 else:
                     QMessageBox.warning(self, "Delete Student", "Student not found.")
             elif record_type == "Instructor":
-                instructor = next((i for i in self.instructors if str(i.instructor_id) == str(record_id)), None)
+                instructor = self.instructors.get(record_id)
                 if instructor:
                     self.instructors.remove(instructor)
                     self.display_records()
+                    self.load_records()
                 else:
                     QMessageBox.warning(self, "Delete Instructor", "Instructor not found.")
             elif record_type == "Course":
-                course = next((c for c in self.courses if str(c.course_id) == str(record_id)), None)
+                course = self.courses.get(record_id)
                 if course:
                     self.courses.remove(course)
                     self.display_records()
+                    self.load_records()
                 else:
                     QMessageBox.warning(self, "Delete Course", "Course not found.")
         else:
@@ -766,66 +1575,820 @@ class SchoolManagementSystemGUI(QMainWindow):
 
     def save_data(self):
         """
-        Saves the current data to a JSON file.
+        Saves the current data with the storage backend matching the file name.
+
+        JSON files, binary snapshots (``.sms``), CSV files and SQLite
+        databases (``.db``) are supported; all but JSON also keep course
+        enrollments. The data is copied when the save starts and written on
+        a worker thread, so the window stays usable while the file is
+        written. With a database or snapshot open, it is saved along with
+        the changes made to it.
         """
-        data = {
-            "students": [{"name": s.name, "age": s.age, "email": s._email, "student_id": s.student_id} for s in self.students],
-            "instructors": [{"name": i.name, "age": i.age, "email": i._email, "instructor_id": i.instructor_id} for i in self.instructors],
-            "courses": [{"course_id": c.course_id, "course_name": c.course_name, "instructor": c.instructor.name if c.instructor else None} for c in self.courses]
-        }
-        filename, _ = QFileDialog.getSaveFileName(self, "Save Data", "", "JSON files (*.json)")
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Data", "", self.STORAGE_FILTER)
         if filename:
-            with open(filename, 'w') as file:
-                json.dump(data, file)
-            QMessageBox.information(self, "Save Data", f"Data saved to {filename}")
+            self.save_full(filename)
+
+    def save_full(self, filename):
+        """
+        Saves the whole catalogue to a file on the thread pool.
+
+        :param filename: The file to save to.
+        :type filename: str
+        """
+        if self.backend is not None:
+            worker = self.stored_copy(filename, save_catalogue)
+        else:
+            worker = PersistenceWorker(save_catalogue, snapshot(self.registry), filename)
+        if self.start_job("Save Data", worker, f"Data saved to {filename}"):
+            self.job_saved = (filename, self.changes.version, None)
+
+    def save_changes(self):
+        """
+        Saves only what changed since the last save or load.
+
+        The changed records are written as a delta to the file last saved
+        or loaded: appended to its ``.delta`` file, or updated in place in
+        an SQLite database. Nothing is written when no record changed, or
+        when every changed record hashes to the content it was last saved
+        with. Without a previous save, or after a change that needs one,
+        such as clearing the catalogue, the whole catalogue is saved.
+        """
+        filename = self.changes.filename
+        if filename is None:
+            self.save_data()
+            return
+        if not self.changes.is_dirty:
+            self.statusBar().showMessage("No changes to save", 5000)
+            return
+        if self.backend is not None or not self.changes.can_save_delta(filename):
+            self.save_full(filename)
+            return
+        delta, version, hashes = self.changes.take_delta()
+        if delta is None:
+            self.changes.saved(filename, version, hashes)
+            self.statusBar().showMessage("No changes to save", 5000)
+            return
+        worker = PersistenceWorker(save_changes, delta, filename)
+        if self.start_job("Save Changes", worker, f"Changes saved to {filename}"):
+            self.job_saved = (filename, version, hashes)
 
     def load_data(self):
         """
-        Loads data from a JSON file.
+        Loads data with the storage backend matching the file name.
+
+        The file is read on a worker thread and its records arrive in
+        batches, so the first records are shown before the whole file has
+        been read. Binary snapshots are memory-mapped and decoded record by
+        record, but every record is still loaded into memory; Open Snapshot
+        works on a snapshot without loading it. With a database or snapshot
+        open, the loaded records are also written to it.
         """
-        filename, _ = QFileDialog.getOpenFileName(self, "Load Data", "", "JSON files (*.json)")
+        if self.blocked_by_service("Load Data"):
+            return
+        filename, _ = QFileDialog.getOpenFileName(self, "Load Data", "", "Data files (*.json *.sms *.csv *.db)")
         if filename:
-            with open(filename, 'r') as file:
-                data = json.load(file)
-            self.students = [Student(s['name'], s['age'], s['email'], s['student_id']) for s in data.get('students', [])]
-            self.instructors = [Instructor(i['name'], i['age'], i['email'], i['instructor_id']) for i in data.get('instructors', [])]
-            self.courses = [Course(c['course_id'], c['course_name'], next((i for i in self.instructors if i.name == c['instructor']), None)) for c in data.get('courses', [])]
-            self.update_student_combobox()
-            self.update_instructor_combobox()
-            self.update_course_combobox()
-            self.display_records()
-            QMessageBox.information(self, "Load Data", f"Data loaded from {filename}")
+            self.load_file(filename)
+
+    def load_file(self, filename, recovering=False):
+        """
+        Replaces the catalogue with the contents of a file, on the thread pool.
+
+        The records shown before the load keep their links to each other, so
+        if the load fails or is cancelled they are put back with
+        :meth:`restore_previous`.
+
+        :param filename: The file to load.
+        :type filename: str
+        :param recovering: Whether the file is an autosave being restored,
+            in which case the catalogue still counts as unsaved.
+        :type recovering: bool
+        """
+        worker = PersistenceWorker(load_catalogue, filename, batches=True)
+        worker.signals.batch.connect(self.add_loaded_batch)
+        message = "Autosaved data restored" if recovering else f"Data loaded from {filename}"
+        if self.start_job("Load Data", worker, message):
+            for tracker in self.trackers():
+                tracker.tracking = False
+            self.job_previous = [list(collection) for collection in (self.students, self.instructors, self.courses)]
+            self.registry.clear()
+            self.load_skipped = 0
+            self.job_loaded = filename
+            self.job_recovering = recovering
+
+    def restore_previous(self):
+        """
+        Puts back the catalogue a failed or cancelled load replaced.
+        """
+        self.registry.clear()
+        for collection, records in zip((self.students, self.instructors, self.courses), self.job_previous):
+            collection.add_many(records)
+
+    def offer_recovery(self):
+        """
+        Offers to restore the autosave left behind by a session that crashed.
+        """
+        filename = self.autosave.recovery_file()
+        if filename is None:
+            return
+        answer = QMessageBox.question(self, "Restore Data", "The last session did not close normally. Restore the data it autosaved?",
+                                      QMessageBox.Yes | QMessageBox.No)
+        if answer == QMessageBox.Yes:
+            self.load_file(filename, recovering=True)
+        else:
+            self.autosave.discard_recovery()
+
+    def trackers(self):
+        """
+        Returns the change trackers of the catalogue.
+
+        :return: The tracker of Save Changes, then that of the autosave, if any.
+        :rtype: list
+        """
+        return [self.changes] if self.autosave is None else [self.changes, self.autosave.changes]
+
+    def record_changed(self, *records):
+        """
+        Marks records changed outside the registry's events, such as an enrollment.
+
+        :param records: The students, instructors or courses that changed.
+        """
+        self.changes.touch(*records)
+        if self.autosave is not None:
+            self.autosave.touch(*records)
+
+    def add_loaded_batch(self, batch):
+        """
+        Adds a batch of loaded records to the system.
+
+        Consecutive records of the same section are inserted with a single
+        :meth:`registry.EntityIndex.add_many` call. Records with missing
+        fields or duplicate IDs are skipped and counted.
+
+        Deltas saved after the file are replayed with :func:`changes.apply_delta`.
+
+        :param batch: The ``(section, record)`` pairs read from the file.
+        :type batch: list
+        """
+        collections = {'students': self.students, 'instructors': self.instructors, 'courses': self.courses}
+        for section, group in itertools.groupby(batch, key=itemgetter(0)):
+            if section == 'delta':
+                for _, delta in group:
+                    try:
+                        apply_delta(self.registry, delta)
+                    except (KeyError, TypeError, ValueError):
+                        self.load_skipped += 1
+                continue
+            collection = collections.get(section)
+            records = []
+            seen = set()
+            for _, record in group:
+                try:
+                    loaded = self.build_loaded_record(section, record)
+                except KeyError:
+                    self.load_skipped += 1
+                    continue
+                if collection is None:
+                    continue
+                key = collection.key_of(loaded)
+                if key in seen or key in collection:
+                    self.load_skipped += 1
+                    continue
+                seen.add(key)
+                records.append(loaded)
+            if collection is not None:
+                collection.add_many(records)
+        self.display_records()
+
+    def build_loaded_record(self, section, record):
+        """
+        Builds one loaded record.
+
+        Enrollment records are applied directly to the course and student
+        they link.
+
+        :param section: The section of the file the record comes from.
+        :type section: str
+        :param record: The record as read from the file.
+        :type record: dict
+        :return: The student, instructor or course built, or None.
+        :raises KeyError: If the record is missing a field.
+        """
+        if section == 'students':
+            return Student(record['name'], record['age'], record['email'], record['student_id'])
+        if section == 'instructors':
+            return Instructor(record['name'], record['age'], record['email'], record['instructor_id'])
+        if section == 'courses':
+            if 'instructor_id' in record:
+                instructor = self.instructors.get(record['instructor_id']) if record['instructor_id'] is not None else None
+            else:
+                instructor = self.instructors.find_by_name(record['instructor'])
+            return Course(record['course_id'], record['course_name'], instructor)
+        if section == 'enrollments':
+            course = self.courses.get(record['course_id'])
+            student = self.students.get(record['student_id'])
+            if course and student and course.enroll(student):
+                if self.backend is not None:
+                    self.backend.enroll(course.course_id, student.student_id)
+        return None
 
     def export_to_csv(self):
         """
         Exports the current data to a CSV file.
+
+        Like :meth:`save_data`, the export works on a copy of the data and
+        runs on a worker thread. The rows are written in chunks, and file
+        names ending in ``.gz`` or ``.xz`` are compressed.
         """
-        filename, _ = QFileDialog.getSaveFileName(self, "Export to CSV", "", "CSV files (*.csv)")
+        filename, _ = QFileDialog.getSaveFileName(self, "Export to CSV", "", self.EXPORT_FILTER)
         if filename:
-            with open(filename, 'w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(["Type", "Name", "ID", "Details"])
-                for student in self.students:
-                    writer.writerow(["Student", student.name, student.student_id, "N/A"])
-                for instructor in self.instructors:
-                    writer.writerow(["Instructor", instructor.name, instructor.instructor_id, "N/A"])
-                for course in self.courses:
-                    writer.writerow(["Course", course.course_name, course.course_id, ", ".join(student.name for student in course.enrolled_students)])
-            QMessageBox.information(self, "Export to CSV", f"Data exported to {filename}")
+            if self.backend is not None:
+                worker = self.stored_copy(filename, export_catalogue)
+            else:
+                worker = PersistenceWorker(export_catalogue, snapshot(self.registry), filename)
+            self.start_job("Export to CSV", worker, f"Data exported to {filename}")
+
+    def export_rosters(self):
+        """
+        Exports one roster file per course into a chosen directory.
+
+        The files are written by a pool of worker processes, driven from a
+        worker thread so the window stays responsive.
+        """
+        directory = QFileDialog.getExistingDirectory(self, "Export Course Rosters")
+        if directory:
+            compression = self.roster_compression_combobox.currentText()
+            compression = None if compression == "None" else compression
+            write = functools.partial(export_rosters, compression=compression)
+            if self.backend is not None:
+                worker = self.stored_copy(directory, write)
+            else:
+                worker = PersistenceWorker(write, snapshot(self.registry), directory)
+            self.start_job("Export Course Rosters", worker, f"Rosters exported to {directory}")
+
+    def start_job(self, title, worker, message):
+        """
+        Starts a save, load or export on the thread pool.
+
+        Only one such job runs at a time.
+
+        :param title: The title used for the messages about the job.
+        :type title: str
+        :param worker: The worker to start.
+        :type worker: PersistenceWorker
+        :param message: The message shown when the job finishes.
+        :type message: str
+        :return: True if the job was started.
+        :rtype: bool
+        """
+        if self.active_job is not None:
+            QMessageBox.warning(self, title, "Another save, load or export is still running.")
+            return False
+        self.active_job = worker
+        worker.function = self.diagnostics.instrument(f"job:{name_of(worker.function)}", worker.function)
+        self.job_title = title
+        self.job_message = message
+        worker.signals.progress.connect(self.job_progress.setValue)
+        worker.signals.finished.connect(self.job_finished)
+        worker.signals.failed.connect(self.job_failed)
+        worker.signals.cancelled.connect(self.job_cancelled)
+        self.job_progress.setValue(0)
+        self.job_progress.show()
+        self.job_cancel_button.show()
+        self.statusBar().showMessage(f"{title}...")
+        self.thread_pool.start(worker)
+        return True
+
+    def cancel_job(self):
+        """
+        Cancels the running save, load or export.
+        """
+        if self.active_job is not None:
+            self.active_job.cancel()
+
+    def end_job(self):
+        """
+        Hides the job progress and refreshes the record view after a job ends.
+        """
+        self.active_job = None
+        self.job_previous = None
+        self.job_progress.hide()
+        self.job_cancel_button.hide()
+        self.statusBar().clearMessage()
+        if self.job_title == "Load Data":
+            for tracker in self.trackers():
+                tracker.tracking = True
+                tracker.needs_full_save = True
+            self.display_records()
+
+    def job_finished(self):
+        """
+        Reports a job that completed.
+        """
+        self.end_job()
+        if self.job_title in ("Save Data", "Save Changes"):
+            self.changes.saved(*self.job_saved)
+        elif self.job_title == "Load Data":
+            if not self.job_recovering:
+                self.changes.loaded(self.job_loaded)
+            if self.autosave is not None:
+                self.autosave.rebase(self.job_loaded)
+        message = self.job_message
+        if self.job_title == "Load Data" and self.load_skipped:
+            message += f" ({self.load_skipped} invalid or duplicate records skipped)"
+        QMessageBox.information(self, self.job_title, message)
+
+    def job_failed(self, error):
+        """
+        Reports a job that raised an error.
+
+        :param error: The error message.
+        :type error: str
+        """
+        if self.job_title == "Load Data":
+            self.restore_previous()
+            error += "; the previous data was restored"
+        self.end_job()
+        QMessageBox.warning(self, self.job_title, f"{self.job_title} failed: {error}")
+
+    def job_cancelled(self):
+        """
+        Reports a job that was cancelled.
+        """
+        message = f"{self.job_title} cancelled"
+        if self.job_title == "Load Data":
+            self.restore_previous()
+            message += "; the previous data was restored"
+        self.end_job()
+        self.statusBar().showMessage(message, 5000)
+
+    def closeEvent(self, event):
+        """
+        Cancels any running job, waits for it, disconnects from the service,
+        stops the stall watchdog and removes the autosave files before the
+        window closes.
+
+        :param event: The close event.
+        :type event: QCloseEvent
+        """
+        self.cancel_job()
+        self.thread_pool.waitForDone()
+        self.close_database()
+        self.disconnect_service()
+        self.service_pool.waitForDone()
+        if self.watchdog is not None:
+            self.heartbeat_timer.stop()
+            self.watchdog.stop()
+        if self.autosave is not None:
+            self.autosave.close()
+        super().closeEvent(event)
+
+    def show_diagnostics(self):
+        """
+        Shows the call counts and latencies of the instrumented slots and jobs.
+        """
+        self.diagnostics_text.setPlainText(self.diagnostics.report())
+
+    def reset_diagnostics(self):
+        """
+        Forgets the calls recorded so far.
+        """
+        self.diagnostics.reset()
+        self.show_diagnostics()
+
+    def toggle_profiling(self):
+        """
+        Starts ``cProfile`` on the GUI thread, or stops it and shows its report.
+        """
+        if self.diagnostics.profiling:
+            self.profile_text.setPlainText(self.diagnostics.stop_profiling())
+            self.profiling_button.setText("Start Profiling")
+        else:
+            self.diagnostics.start_profiling()
+            self.profiling_button.setText("Stop Profiling")
+
+    def toggle_memory_tracing(self):
+        """
+        Starts ``tracemalloc``, or stops it and shows the largest allocation sites.
+        """
+        if self.diagnostics.tracing_memory:
+            self.profile_text.setPlainText(self.diagnostics.stop_memory_tracing())
+            self.memory_tracing_button.setText("Start Memory Tracing")
+        else:
+            self.diagnostics.start_memory_tracing()
+            self.memory_tracing_button.setText("Stop Memory Tracing")
+
+    def dump_diagnostics(self):
+        """
+        Writes the recorded calls to a JSON file for offline analysis.
+        """
+        filename, _ = QFileDialog.getSaveFileName(self, "Dump Diagnostics", "", "JSON files (*.json)")
+        if not filename:
+            return
+        try:
+            self.diagnostics.dump(filename)
+        except OSError as e:
+            QMessageBox.warning(self, "Dump Diagnostics", f"Could not write {filename}: {e}")
+            return
+        QMessageBox.information(self, "Dump Diagnostics", f"Diagnostics written to {filename}")
 
     def load_records(self):
         """
         Loads records into the edit/delete section.
+
+        Like :meth:`display_records`, this waits until the tab is shown.
+        """
+        self.refresh_view("edit")
+
+    def open_database(self):
+        """
+        Opens an SQLite database and works on it directly.
+
+        The record, search and edit/delete views then page through the
+        database instead of the records in memory, and every record added,
+        renamed, removed, registered or assigned is written to it. Records
+        already in memory are added to the database when it is opened.
+        """
+        filename, _ = QFileDialog.getSaveFileName(self, "Open Database", "", "SQLite databases (*.db)", options=QFileDialog.DontConfirmOverwrite)
+        if not filename:
+            return
+        try:
+            backend = SqliteBackend(filename)
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Open Database", f"Could not open {filename}: {e}")
+            return
+        self.use_backend(backend, f"Database: {filename}")
+
+    def open_snapshot(self):
+        """
+        Opens a binary snapshot and works on it in place, like a database.
+
+        Only the header of the file is read when it is opened, and the
+        deltas saved since it was written are replayed on it. The record,
+        search and edit/delete views then page through the snapshot, which
+        decodes only the records shown. Changes are kept in memory on top of
+        the file until the catalogue is saved with Save Data. Records already
+        in memory are added to it when it is opened.
+        """
+        filename, _ = QFileDialog.getOpenFileName(self, "Open Snapshot", "", "Binary snapshots (*.sms)")
+        if not filename:
+            return
+        try:
+            catalogue = open_snapshot(filename)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Open Snapshot", f"Could not open {filename}: {e}")
+            return
+        self.use_backend(catalogue, f"Snapshot: {filename}")
+
+    def use_backend(self, backend, label):
+        """
+        Switches the views to an opened database or snapshot.
+
+        Records already in memory are added to it first.
+
+        :param backend: The opened database or snapshot.
+        :type backend: storage.SqliteBackend or storage.SnapshotCatalogue
+        :param label: The text shown for it under the buttons.
+        :type label: str
+        """
+        self.close_database()
+        data = snapshot(self.registry)
+        backend.add("students", data["students"])
+        backend.add("instructors", data["instructors"])
+        backend.add("courses", [(course_id, course_name, instructor[0] if instructor else None) for course_id, course_name, instructor, _ in data["courses"]])
+        for course_id, _, _, enrolled in data["courses"]:
+            for student_id, _ in enrolled:
+                backend.enroll(course_id, student_id)
+        self.backend = backend
+        self.database_models = {view: DatabaseTableModel(backend, self) for view in ("display", "search", "edit")}
+        self.apply_view_models()
+        self.database_label.setText(label)
+        self.display_records()
+        self.load_records()
+
+    def close_database(self):
+        """
+        Closes the open database or snapshot and goes back to the records in
+        memory.
+
+        Changes made to an opened snapshot since it was last saved are lost.
+        """
+        if self.backend is None:
+            return
+        self.backend.close()
+        self.backend = None
+        self.database_models = {}
+        self.apply_view_models()
+        self.database_label.setText("No database open")
+        self.display_records()
+        self.load_records()
+
+    def connect_service(self):
+        """
+        Connects to a running registration service and works as its client.
+
+        The connection is made on the service thread. Once it is open, the
+        catalogue is replaced with the one of the service; from then on
+        every student, instructor and course added and every registration
+        and assignment is sent to the service first, and is only applied
+        here if the service accepts it. Connecting again fetches the changes
+        made by other clients.
+        """
+        if self.active_job is not None:
+            QMessageBox.warning(self, "Connect to Service", "Another save, load or export is still running.")
+            return
+        address, ok = QInputDialog.getText(self, "Connect to Service", "Address (host:port):", text=f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+        if not ok or not address.strip():
+            return
+        host, _, port = address.strip().rpartition(":")
+        try:
+            port = int(port)
+        except ValueError:
+            QMessageBox.warning(self, "Connect to Service", f"Invalid port: {port}")
+            return
+        self.open_service((host or DEFAULT_HOST, port))
+
+    def open_service(self, address):
+        """
+        Opens a connection to the service on the service thread.
+
+        :param address: The host and port of the service.
+        :type address: tuple
+        """
+        self.service_label.setText("Connecting to {}:{}...".format(*address))
+        worker = PersistenceWorker(open_client, *address, batches=True)
+        worker.signals.batch.connect(functools.partial(self.service_connected, address))
+        worker.signals.failed.connect(functools.partial(self.service_connect_failed, address))
+        self.run_on_service(worker)
+
+    def service_connected(self, address, opened):
+        """
+        Replaces the catalogue with the one of the service once connected.
+
+        :param address: The host and port of the service.
+        :type address: tuple
+        :param opened: The client and the ``(section, record)`` pairs of the
+            service, as passed by :func:`service.open_client`.
+        :type opened: tuple
+        """
+        client, pairs = opened
+        self.disconnect_service()
+        self.service = client
+        self.service_address = address
+        for tracker in self.trackers():
+            tracker.tracking = False
+        self.registry.clear()
+        self.load_skipped = 0
+        self.add_loaded_batch(pairs)
+        for tracker in self.trackers():
+            tracker.tracking = True
+            tracker.needs_full_save = True
+        self.service_label.setText("Service: {}:{}".format(*address))
+        self.load_records()
+
+    def service_connect_failed(self, address, error):
+        """
+        Reports a connection to the service that could not be made.
+
+        :param address: The host and port of the service.
+        :type address: tuple
+        :param error: The reason of the failure.
+        :type error: str
+        """
+        if self.service is None:
+            self.service_label.setText("Not connected to a service")
+        QMessageBox.warning(self, "Connect to Service", "Could not connect to {}:{}: {}".format(*address, error))
+
+    def disconnect_service(self):
+        """
+        Disconnects from the registration service and keeps its records as local data.
+
+        Requests still waiting on the service thread are sent before the
+        connection is closed.
+        """
+        if self.service is None:
+            return
+        self.run_on_service(PersistenceWorker(close_client, self.service))
+        self.service = None
+        self.service_label.setText("Not connected to a service")
+
+    def run_on_service(self, worker):
+        """
+        Starts a worker on the service thread and keeps it alive until it ends.
+
+        The service thread runs one worker at a time, so requests reach the
+        service in the order they were made.
+
+        :param worker: The worker to start.
+        :type worker: PersistenceWorker
+        """
+        self.service_workers.add(worker)
+        done = functools.partial(self.service_workers.discard, worker)
+        worker.signals.finished.connect(done)
+        worker.signals.failed.connect(lambda error: done())
+        worker.signals.cancelled.connect(done)
+        self.service_pool.start(worker)
+
+    def apply_through_service(self, label, apply, op, **arguments):
+        """
+        Applies a change, through the registration service if connected.
+
+        Without a service ``apply`` runs right away. With one, the request is
+        sent on the service thread and ``apply`` only runs once the service
+        accepts it; a rejection is shown in ``label`` instead.
+
+        :param label: The message label of the section making the change.
+        :type label: QLabel
+        :param apply: Makes the change here.
+        :type apply: callable
+        :param op: The operation, one of :data:`service.WRITE_OPS`.
+        :type op: str
+        :param arguments: The arguments of the operation.
+        """
+        if self.service is None:
+            apply()
+            return
+        label.setText("Sending to the service...")
+        label.setStyleSheet("")
+        worker = PersistenceWorker(send_request, self.service, op, arguments, batches=True)
+        worker.signals.batch.connect(functools.partial(self.service_replied, label, apply))
+        worker.signals.failed.connect(functools.partial(self.service_lost, self.service, label))
+        self.run_on_service(worker)
+
+    def service_replied(self, label, apply, reply):
+        """
+        Applies a change the service accepted, or shows why it was rejected.
+
+        :param label: The message label of the section making the change.
+        :type label: QLabel
+        :param apply: Makes the change here.
+        :type apply: callable
+        :param reply: ``(True, result)`` or ``(False, error)``, as passed by
+            :func:`service.send_request`.
+        :type reply: tuple
+        """
+        accepted, value = reply
+        if accepted:
+            apply()
+        else:
+            label.setText(value)
+            label.setStyleSheet("color: red;")
+
+    def service_lost(self, client, label, error):
+        """
+        Handles a request whose connection failed or timed out.
+
+        The service may or may not have applied the request, so the client
+        disconnects and connects again to fetch the catalogue of the service.
+
+        :param client: The connection the request was sent on.
+        :type client: service.ServiceClient
+        :param label: The message label of the section making the change.
+        :type label: QLabel
+        :param error: The reason of the failure.
+        :type error: str
+        """
+        label.setText(f"Lost the connection to the service: {error}")
+        label.setStyleSheet("color: red;")
+        if client is not self.service:
+            return
+        self.disconnect_service()
+        self.statusBar().showMessage("Lost the connection to the service; reconnecting to fetch its data, "
+                                     "which may differ from the local data until then", 10000)
+        self.open_service(self.service_address)
+
+    def blocked_by_service(self, title):
         """
-        self.edit_delete_model.clear()
-
-        for student in self.students:
-            self.edit_delete_model.appendRow([QStandardItem("Student"), QStandardItem(student.name), QStandardItem(student.student_id), QStandardItem("N/A")])
-        for instructor in self.instructors:
-            self.edit_delete_model.appendRow([QStandardItem("Instructor"), QStandardItem(instructor.name), QStandardItem(instructor.instructor_id), QStandardItem("N/A")])
-        for course in self.courses:
-            self.edit_delete_model.appendRow([QStandardItem("Course"), QStandardItem(course.course_name), QStandardItem(course.course_id), QStandardItem(", ".join(student.name for student in course.enrolled_students))])# Create the main window
-app = QApplication([])
-window = SchoolManagementSystemGUI()
-window.show()
-app.exec_()
\ No newline at end of file
+        Warns that a change the service does not support was refused.
+
+        Editing, deleting, bulk imports and loads only change the local
+        data, so they are refused while connected to keep it the same as
+        the service's.
+
+        :param title: The title of the refused action.
+        :type title: str
+        :return: True if connected to a service.
+        :rtype: bool
+        """
+        if self.service is None:
+            return False
+        QMessageBox.warning(self, title, "Not available while connected to a service. Disconnect first.")
+        return True
+
+    def write_through(self, section, event, record):
+        """
+        Writes a change of a registry collection to the open database or
+        snapshot.
+
+        Clearing the registry, as a load does, leaves the database alone.
+
+        :param section: The section of the collection that changed.
+        :type section: str
+        :param event: The kind of change.
+        :type event: str
+        :param record: The record or records concerned.
+        """
+        if self.backend is None:
+            return
+        if event == "added":
+            self.backend.add(section, [self.stored_values(record)])
+        elif event == "added_many":
+            self.backend.add(section, [self.stored_values(item) for item in record])
+        elif event == "renamed":
+            collection = self.section_collection(section)
+            self.backend.rename(section, collection.key_of(record), collection.name_of(record))
+        elif event == "removed":
+            self.backend.delete(section, self.section_collection(section).key_of(record))
+
+    def stored_copy(self, filename, write):
+        """
+        Makes a worker writing the open database or snapshot to a file.
+
+        A snapshot is copied first, so the worker reads it as it is now
+        while the window keeps changing it.
+
+        :param filename: The file or directory to write.
+        :type filename: str
+        :param write: Called as ``write(data, filename, progress, cancelled)``.
+        :type write: callable
+        :return: The worker.
+        :rtype: PersistenceWorker
+        """
+        if isinstance(self.backend, SqliteBackend):
+            return PersistenceWorker(copy_database, self.backend.filename, filename, write)
+        return PersistenceWorker(copy_snapshot, self.backend.copy(), filename, write)
+
+    def stored_values(self, record):
+        """
+        Returns the values a record is stored with in the database.
+
+        :param record: A student, instructor or course.
+        :type record: Student or Instructor or Course
+        :return: ``(name, age, email, id)`` for people, ``(course_id,
+            course_name, instructor_id)`` for courses.
+        :rtype: tuple
+        """
+        if isinstance(record, Student):
+            return (record.name, record.age, record._email, record.student_id)
+        if isinstance(record, Instructor):
+            return (record.name, record.age, record._email, record.instructor_id)
+        return (record.course_id, record.course_name, record.instructor.instructor_id if record.instructor else None)
+
+    def section_of(self, record_type):
+        """
+        Returns the storage section of a record type shown in the views.
+
+        :param record_type: ``"Student"``, ``"Instructor"`` or ``"Course"``.
+        :type record_type: str
+        :return: The section name.
+        :rtype: str
+        """
+        return {"Student": "students", "Instructor": "instructors", "Course": "courses"}[record_type]
+
+    def section_collection(self, section):
+        """
+        Returns the registry collection of a storage section.
+
+        :param section: The section name.
+        :type section: str
+        :return: The collection.
+        :rtype: registry.EntityIndex
+        """
+        return {"students": self.students, "instructors": self.instructors, "courses": self.courses}[section]
+
+    def stored_only(self, record_type, record_id):
+        """
+        Tells whether a record shown in the views is only in the open
+        database or snapshot.
+
+        :param record_type: ``"Student"``, ``"Instructor"`` or ``"Course"``.
+        :type record_type: str
+        :param record_id: The ID of the record.
+        :type record_id: str
+        :return: True if a database or snapshot is open and the record is
+            not in memory.
+        :rtype: bool
+        """
+        if self.backend is None or record_type not in ("Student", "Instructor", "Course"):
+            return False
+        return record_id not in self.section_collection(self.section_of(record_type))
+
+
+def main(argv=None):
+    """
+    Creates the application, shows the main window and runs the event loop.
+
+    :param argv: The command line arguments passed to Qt. Defaults to
+        ``sys.argv``.
+    :type argv: list, optional
+    :return: The exit code of the event loop.
+    :rtype: int
+    """
+    app = QApplication.instance() or QApplication(sys.argv if argv is None else argv)
+    app.setApplicationName("School Management System")
+    window = SchoolManagementSystemGUI()
+    window.show()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Seeded synthetic catalogue generator for the benchmarks.
+
+:func:`generate_catalogue` builds students, instructors, courses and
+enrollments as plain tuples, so each front end can turn them into its own
+objects. The same seed and size always give the same catalogue.
+
+Run with ``python benchmarks/catalogue.py [scale] [filename]`` to write a
+catalogue in the JSON format read by Load Data, for example
+``python benchmarks/catalogue.py 100k catalogue.json``.
+"""
+import json
+import random
+import sys
+
+SCALES = {"1k": 1000, "10k": 10000, "100k": 100000, "1m": 1000000}
+
+FIRST_NAMES = ["Roni", "Bahaa", "Maya", "Karim", "Lea", "Omar", "Nour", "Rami", "Sara", "Jad"]
+LAST_NAMES = ["Bou Saab", "Ammoury", "Haddad", "Khoury", "Nassar", "Saleh", "Aoun", "Fares"]
+SUBJECTS = ["EECE", "CMPS", "MATH", "PHYS", "CHEM", "BIOL", "ENGL", "ARAB", "ECON", "PSYC"]
+
+
+def generate_catalogue(students, seed=435, courses_per_student=3):
+    """
+    Generates a synthetic catalogue.
+
+    There is one instructor per 100 students and one course per 50
+    students, and every student is enrolled in ``courses_per_student``
+    distinct courses.
+
+    :param students: The number of students.
+    :type students: int
+    :param seed: The random seed.
+    :type seed: int
+    :param courses_per_student: The number of courses of each student.
+    :type courses_per_student: int
+    :return: A dictionary with ``students`` and ``instructors`` as
+        ``(name, age, email, id)`` tuples, ``courses`` as ``(course_id,
+        course_name, instructor_row)`` tuples and ``enrollments`` as
+        ``(course_row, student_row)`` tuples.
+    :rtype: dict
+    """
+    rng = random.Random(seed)
+    instructor_count = max(1, students // 100)
+    course_count = max(courses_per_student, students // 50)
+
+    def person(prefix, number, age_range):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        return (f"{first} {last}", rng.randint(*age_range), f"{first.lower()}.{number}@mail.aub.edu", f"{prefix}{number:07d}")
+
+    return {
+        "students": [person("S", number, (17, 30)) for number in range(students)],
+        "instructors": [person("I", number, (30, 70)) for number in range(instructor_count)],
+        "courses": [(f"C{row:05d}", f"{rng.choice(SUBJECTS)} {200 + row % 700}", rng.randrange(instructor_count)) for row in range(course_count)],
+        "enrollments": [(course_row, student_row) for student_row in range(students) for course_row in rng.sample(range(course_count), courses_per_student)],
+    }
+
+
+def as_saved_data(catalogue):
+    """
+    Converts a catalogue into the dictionary written by Save Data.
+
+    :param catalogue: A catalogue returned by :func:`generate_catalogue`.
+    :type catalogue: dict
+    :return: The catalogue as JSON-ready dictionaries.
+    :rtype: dict
+    """
+    instructors = catalogue["instructors"]
+    return {
+        "students": [{"name": n, "age": a, "email": e, "student_id": i} for n, a, e, i in catalogue["students"]],
+        "instructors": [{"name": n, "age": a, "email": e, "instructor_id": i} for n, a, e, i in instructors],
+        "courses": [{"course_id": i, "course_name": n, "instructor": instructors[row][0]} for i, n, row in catalogue["courses"]],
+    }
+
+
+if __name__ == "__main__":
+    scale = sys.argv[1] if len(sys.argv) > 1 else "10k"
+    filename = sys.argv[2] if len(sys.argv) > 2 else f"catalogue_{scale}.json"
+    with open(filename, 'w') as file:
+        json.dump(as_saved_data(generate_catalogue(SCALES.get(scale) or int(scale))), file)
+    print(f"Wrote {filename}")
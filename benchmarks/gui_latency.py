@@ -0,0 +1,241 @@
+"""
+Headless latency harness for the PyQt GUI.
+
+Runs the real :class:`app_pyqt.SchoolManagementSystemGUI` on the Qt
+``offscreen`` platform and drives a scripted session through its handlers:
+adds through ``add_student``, registrations, display refreshes, searches,
+edits and deletes. Each handler call is measured twice:
+
+* ``wall``: the time spent inside the handler.
+* ``stall``: the time from the start of the handler until the event loop
+  has worked through everything the handler queued, such as layout and
+  paint events, and can serve a new event. This is what the user waits for.
+
+The session runs once per dataset size, after the catalogue has been
+preloaded with :mod:`catalogue`, and the p50/p95/p99 of both measures are
+printed per handler, in milliseconds.
+
+Run with ``python benchmarks/gui_latency.py --sizes 1000 10000 [--output latency.json]``.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer, qInstallMessageHandler
+from PyQt5.QtWidgets import QApplication, QInputDialog, QMessageBox
+
+from app_pyqt import SchoolManagementSystemGUI
+from catalogue import generate_catalogue
+from models import Course, Instructor, Student
+from stats import PERCENTILES, percentile
+
+
+class LatencyRecorder:
+    """
+    Calls GUI handlers and records their wall and stall times.
+
+    :param app: The running application.
+    :type app: QApplication
+    """
+    def __init__(self, app):
+        """
+        Constructs a recorder with no samples.
+
+        :param app: The running application.
+        :type app: QApplication
+        """
+        self.app = app
+        self.samples = {}
+
+    def measure(self, name, handler):
+        """
+        Calls a handler and records how long it and its queued work take.
+
+        :param name: The name the samples are recorded under.
+        :type name: str
+        :param handler: The handler to call.
+        :type handler: callable
+        """
+        done = []
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            handler()
+        wall = time.perf_counter() - start
+        QTimer.singleShot(0, lambda: done.append(time.perf_counter()))
+        while not done:
+            self.app.processEvents()
+        wall_samples, stall_samples = self.samples.setdefault(name, ([], []))
+        wall_samples.append(wall * 1000)
+        stall_samples.append((done[0] - start) * 1000)
+
+    def summary(self):
+        """
+        Returns the percentiles of every handler.
+
+        :return: ``{handler: {"count": n, "wall": {"p50": ...}, "stall": {...}}}``
+            with times in milliseconds.
+        :rtype: dict
+        """
+        return {
+            name: {
+                "count": len(wall),
+                "wall": {f"p{rank}": percentile(wall, rank) for rank in PERCENTILES},
+                "stall": {f"p{rank}": percentile(stall, rank) for rank in PERCENTILES},
+            }
+            for name, (wall, stall) in self.samples.items()
+        }
+
+
+def show_tab(window, title):
+    """
+    Switches the window to a tab, building it if needed.
+
+    :param window: The main window.
+    :type window: SchoolManagementSystemGUI
+    :param title: The title of the tab.
+    :type title: str
+    """
+    window.tabs.setCurrentIndex([tab[0] for tab in window.TABS].index(title))
+
+
+def preload(window, size, seed):
+    """
+    Fills the window's registry with a generated catalogue.
+
+    :param window: The main window.
+    :type window: SchoolManagementSystemGUI
+    :param size: The number of students.
+    :type size: int
+    :param seed: The random seed of the catalogue.
+    :type seed: int
+    """
+    catalogue = generate_catalogue(size, seed)
+    window.students.add_many([Student(*row) for row in catalogue["students"]])
+    window.instructors.add_many([Instructor(*row) for row in catalogue["instructors"]])
+    instructors = list(window.instructors)
+    window.courses.add_many([Course(course_id, course_name, instructors[row]) for course_id, course_name, row in catalogue["courses"]])
+    courses = list(window.courses)
+    students = list(window.students)
+    for course_row, student_row in catalogue["enrollments"]:
+        courses[course_row].enroll(students[student_row])
+
+
+def run_session(app, size, actions, seed=435):
+    """
+    Runs the scripted session on a fresh window.
+
+    :param app: The running application.
+    :type app: QApplication
+    :param size: The number of students preloaded.
+    :type size: int
+    :param actions: The number of calls made to each handler.
+    :type actions: int
+    :param seed: The random seed.
+    :type seed: int
+    :return: The percentiles of every handler, as returned by
+        :meth:`LatencyRecorder.summary`.
+    :rtype: dict
+    """
+    rng = random.Random(seed)
+    # The stall watchdog's heartbeat and the autosave writes would add their own events to the measurements
+    window = SchoolManagementSystemGUI(stall_threshold_ms=0, autosave=False)
+    window.show()
+    preload(window, size, seed)
+    recorder = LatencyRecorder(app)
+
+    show_tab(window, "Student")
+    for number in range(actions):
+        window.student_name_entry.setText(f"Latency Student {number}")
+        window.student_age_entry.setText("20")
+        window.student_email_entry.setText(f"latency{number}@mail.aub.edu")
+        window.student_id_entry.setText(f"L{number:07d}")
+        recorder.measure("add_student", window.add_student)
+
+    show_tab(window, "Student Course Registration")
+    for _ in range(actions):
+        window.student_combobox.setCurrentIndex(rng.randrange(window.student_combobox.count()))
+        window.course_combobox.setCurrentIndex(rng.randrange(window.course_combobox.count()))
+        recorder.measure("register_student_for_course", window.register_student_for_course)
+
+    show_tab(window, "Display Records")
+    for _ in range(actions):
+        recorder.measure("display_records", window.display_records)
+
+    show_tab(window, "Search Records")
+    names = [student.name for student in window.students]
+    for _ in range(actions):
+        name = rng.choice(names)
+        window.search_entry.setText(name[:rng.randint(2, len(name))])
+        recorder.measure("search_records", window.search_records)
+
+    show_tab(window, "Edit/Delete Records")
+    window.load_records()
+    for number in range(actions):
+        window.edit_delete_treeview.selectRow(rng.randrange(window.edit_delete_model.rowCount()))
+        QInputDialog.getText = staticmethod(lambda *args, **kwargs: (f"Edited {number}", True))
+        recorder.measure("edit_record", window.edit_record)
+    for _ in range(actions):
+        window.edit_delete_treeview.selectRow(rng.randrange(window.edit_delete_model.rowCount()))
+        recorder.measure("delete_record", window.delete_record)
+
+    window.close()
+    window.deleteLater()
+    return recorder.summary()
+
+
+def print_table(size, summary):
+    """
+    Prints the percentiles of one session.
+
+    :param size: The number of students preloaded.
+    :type size: int
+    :param summary: The summary of the session.
+    :type summary: dict
+    """
+    columns = [f"{measure} p{rank}" for measure in ("wall", "stall") for rank in PERCENTILES]
+    print(f"\n{size} students")
+    print(f"{'handler':<30}" + "".join(f"{column:>12}" for column in columns))
+    for name, result in summary.items():
+        values = [result[measure][f"p{rank}"] for measure in ("wall", "stall") for rank in PERCENTILES]
+        print(f"{name:<30}" + "".join(f"{value:>12.2f}" for value in values))
+
+
+def main(argv=None):
+    """
+    Runs the harness from the command line.
+
+    :param argv: The command line arguments. Defaults to ``sys.argv[1:]``.
+    :type argv: list, optional
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--actions", type=int, default=100, help="calls made to each handler")
+    parser.add_argument("--seed", type=int, default=435)
+    parser.add_argument("--output", help="write the percentiles to this JSON file")
+    args = parser.parse_args(argv)
+
+    # The offscreen platform warns about size hints every time a window is shown
+    qInstallMessageHandler(lambda mode, context, message: None if "propagateSizeHints" in message else print(message, file=sys.stderr))
+    app = QApplication.instance() or QApplication([])
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = run_session(app, size, args.actions, args.seed)
+        print_table(size, results[str(size)])
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"actions": args.actions, "seed": args.seed, "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
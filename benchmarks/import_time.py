@@ -0,0 +1,98 @@
+"""
+Import-time budget check for the model layer.
+
+Imports each module in a fresh interpreter with ``-X importtime`` and
+compares its cumulative import time with a budget. The check fails when a
+module goes over budget or pulls in PyQt. Modules are byte-compiled first
+so the measurement does not include compiling them.
+
+Run with ``python benchmarks/import_time.py [budget_ms] [module ...]``; it
+exits with status 1 when a check fails.
+"""
+import compileall
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["models", "registry", "search"]
+BUDGET_MS = 5.0
+RUNS = 5
+
+
+def import_times(module):
+    """
+    Imports a module in a fresh interpreter and returns what it imported.
+
+    :param module: The name of the module to import.
+    :type module: str
+    :return: The cumulative import time in microseconds of every module
+        imported, keyed by module name.
+    :rtype: dict
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def check(module, budget_ms, runs=RUNS):
+    """
+    Measures a module and tells whether it stays within the budget.
+
+    The fastest of ``runs`` imports is kept, to leave out noise from the
+    machine.
+
+    :param module: The name of the module to check.
+    :type module: str
+    :param budget_ms: The allowed cumulative import time in milliseconds.
+    :type budget_ms: float
+    :param runs: The number of imports to measure.
+    :type runs: int
+    :return: The fastest import time in milliseconds, and a list of problems.
+    :rtype: tuple
+    """
+    samples = [import_times(module) for _ in range(runs)]
+    best = min(times[module] for times in samples) / 1000
+    problems = []
+    if best > budget_ms:
+        problems.append(f"{module} takes {best:.1f} ms to import, over the {budget_ms:.1f} ms budget")
+    qt = sorted(name for name in samples[0] if name.startswith("PyQt5"))
+    if qt:
+        problems.append(f"{module} imports {', '.join(qt)}")
+    return best, problems
+
+
+def main(budget_ms=BUDGET_MS, modules=MODULES):
+    """
+    Prints the import time of each module and returns the exit status.
+
+    :param budget_ms: The allowed cumulative import time in milliseconds.
+    :type budget_ms: float
+    :param modules: The modules to check.
+    :type modules: list
+    :return: 0 if every module is within budget, 1 otherwise.
+    :rtype: int
+    """
+    compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+    failed = False
+    print(f"{'module':<14} {'import ms':>10}")
+    for module in modules:
+        best, problems = check(module, budget_ms)
+        print(f"{module:<14} {best:>10.2f}")
+        for problem in problems:
+            print(f"  FAIL: {problem}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    sys.exit(main(budget, sys.argv[2:] or MODULES))
@@ -0,0 +1,113 @@
+"""
+Memory benchmark for the student representations.
+
+Builds the same synthetic students three ways and reports the bytes
+retained per record:
+
+* ``dict``: the original layout, with a per-instance ``__dict__``.
+* ``slots``: the ``__slots__`` based :class:`models.Student`.
+* ``columnar``: a :class:`columnar.PersonColumns` store.
+
+Run with ``python benchmarks/memory.py [count]``.
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Student
+from columnar import PersonColumns
+
+FIRST_NAMES = ["Roni", "Bahaa", "Maya", "Karim", "Lea", "Omar", "Nour", "Rami", "Sara", "Jad"]
+LAST_NAMES = ["Bou Saab", "Ammoury", "Haddad", "Khoury", "Nassar", "Saleh", "Aoun", "Fares"]
+
+
+class DictStudent:
+    """
+    A student laid out like the classes before ``__slots__`` were added.
+    """
+    def __init__(self, name, age, email, student_id):
+        """
+        Constructs the student with a per-instance ``__dict__``.
+        """
+        self.name = name
+        self.age = age
+        self._email = email
+        self.student_id = student_id
+        self.registered_courses = []
+
+
+def generate_rows(count, seed=435):
+    """
+    Yields synthetic student rows as fresh string objects, like a file parser would.
+
+    :param count: The number of rows to generate.
+    :type count: int
+    :param seed: The random seed.
+    :type seed: int
+    :return: An iterator of ``(name, age, email, student_id)`` tuples.
+    :rtype: iterator
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        yield (f"{first} {last}", rng.randint(17, 30), f"{first.lower()}{i}@mail.aub.edu", f"{i:09d}")
+
+
+def measure(build, count):
+    """
+    Returns the bytes retained per record by a representation.
+
+    :param build: A callable building the representation from an iterator of rows.
+    :type build: callable
+    :param count: The number of records to build.
+    :type count: int
+    :return: The retained bytes divided by ``count``.
+    :rtype: float
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = build(generate_rows(count))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return (after - before) / count
+
+
+def build_columnar(rows):
+    """
+    Builds a columnar student store from an iterator of rows.
+
+    :param rows: The rows to store.
+    :type rows: iterator
+    :return: The filled store.
+    :rtype: PersonColumns
+    """
+    store = PersonColumns(Student, 'student_id')
+    for row in rows:
+        store.add_row(*row)
+    return store
+
+
+def main(count=100000):
+    """
+    Prints the bytes per record of each representation.
+
+    :param count: The number of records to build.
+    :type count: int
+    """
+    results = {
+        "dict": measure(lambda rows: [DictStudent(*row) for row in rows], count),
+        "slots": measure(lambda rows: [Student(*row) for row in rows], count),
+        "columnar": measure(build_columnar, count),
+    }
+    print(f"{'layout':<10} {'bytes/record':>14}")
+    for layout, per_record in results.items():
+        print(f"{layout:<10} {per_record:>14.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,319 @@
+"""
+Scaling benchmark suite for the School Management System.
+
+Builds a seeded catalogue at each requested scale with ``catalogue.py``
+and times the core operations on it:
+
+* ``add``: adding every student, instructor and course to a registry.
+* ``register``: registering every enrollment with ``Course.add_students``.
+* ``assign``: assigning every course with ``Instructor.assign_course``.
+* ``search``: :data:`SEARCH_QUERIES` registry searches.
+* ``display_model``: filling the record table model of the PyQt GUI.
+* ``save_data`` and ``load_data``: the JSON helpers of :mod:`models`.
+* ``datamanager_save`` and ``datamanager_load``: the CSV
+  ``DataManager`` of the Tkinter front end, with students.
+* ``csv_export``: :func:`models.export_to_csv`.
+* ``csv_export_streaming``: :func:`export.export_catalogue`.
+* ``snapshot_save``: saving a binary snapshot with
+  :func:`storage.save_catalogue`.
+* ``snapshot_open``: opening the snapshot in place with
+  :func:`storage.open_snapshot` and reading the first page of every
+  section, as the GUI does.
+* ``snapshot_search``: the same searches on the opened snapshot, including
+  the indexes its first search builds.
+
+Each scale is run ``--repeat`` times and the fastest time of every
+operation is kept. Operations whose front end cannot be imported are
+skipped. Results are
+printed, written as JSON with ``--output`` and compared against a stored
+baseline with ``--baseline``, such as ``benchmarks/baseline.json``, which
+was recorded with ``--output`` on a development machine for every scale.
+
+Because the baseline comes from another machine, the comparison is
+relative by default: each operation's ratio to its baseline is divided by
+the median ratio of all operations at that scale, which cancels out how
+much faster or slower the machine is overall. An operation whose relative
+ratio exceeds ``--threshold`` is reported as a regression and makes the
+run exit with status 1. A change that slows every operation alike is not
+caught this way; for that, re-record the baseline locally with
+``--output`` and compare with ``--absolute``.
+
+Run with ``python benchmarks/scaling.py --scales 1k 10k --baseline benchmarks/baseline.json``.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TKINTER_SOURCE = os.path.join(ROOT, "EECE 435L Lab 3", "Lab3", "source")
+sys.path.insert(0, ROOT)
+
+from catalogue import SCALES, as_saved_data, generate_catalogue
+from export import export_catalogue
+from models import Course, Instructor, Student, export_to_csv, load_data, save_data
+from persistence import snapshot
+from registry import Registry
+from storage import SECTIONS, open_snapshot, save_catalogue
+
+SEARCH_QUERIES = 100
+DEFAULT_THRESHOLD = 2.0
+MIN_COMPARED_SECONDS = 0.005
+
+
+class Timer:
+    """
+    Collects the wall time of named operations.
+    """
+    def __init__(self):
+        """
+        Constructs a timer with no results.
+        """
+        self.results = {}
+
+    @contextlib.contextmanager
+    def time(self, operation):
+        """
+        Times the body of a ``with`` block as one operation.
+
+        Anything the operation prints is discarded, so console output does
+        not dominate the measurement, and the garbage collector is paused
+        like :mod:`timeit` does, so collections triggered by earlier
+        operations do not land in this one.
+
+        :param operation: The name of the operation.
+        :type operation: str
+        """
+        gc.collect()
+        gc.disable()
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                yield
+                self.results[operation] = time.perf_counter() - start
+        finally:
+            gc.enable()
+
+
+def load_tkinter_front_end(directory):
+    """
+    Imports the Tkinter front end, whose import loads CSV files from the
+    working directory, from inside a scratch directory.
+
+    :param directory: The scratch directory.
+    :type directory: str
+    :return: The ``hello`` module, or None if it cannot be imported.
+    """
+    previous = os.getcwd()
+    sys.path.insert(0, TKINTER_SOURCE)
+    try:
+        os.chdir(directory)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            import hello
+        return hello
+    except ImportError:
+        return None
+    finally:
+        os.chdir(previous)
+        sys.path.remove(TKINTER_SOURCE)
+
+
+def run_scale(students, directory, seed=435):
+    """
+    Times every operation on a catalogue of one size.
+
+    :param students: The number of students in the catalogue.
+    :type students: int
+    :param directory: A scratch directory for the files written.
+    :type directory: str
+    :param seed: The random seed of the catalogue.
+    :type seed: int
+    :return: The seconds taken by each operation.
+    :rtype: dict
+    """
+    catalogue = generate_catalogue(students, seed)
+    timer = Timer()
+
+    registry = Registry()
+    with timer.time("add"):
+        for row in catalogue["students"]:
+            registry.students.add(Student(*row))
+        for row in catalogue["instructors"]:
+            registry.instructors.add(Instructor(*row))
+        for course_id, course_name, _ in catalogue["courses"]:
+            registry.courses.add(Course(course_id, course_name))
+
+    students_by_row = list(registry.students)
+    instructors_by_row = list(registry.instructors)
+    courses_by_row = list(registry.courses)
+    with timer.time("register"):
+        for course_row, student_row in catalogue["enrollments"]:
+            courses_by_row[course_row].add_students(students_by_row[student_row])
+
+    with timer.time("assign"):
+        for course, (_, _, instructor_row) in zip(courses_by_row, catalogue["courses"]):
+            instructors_by_row[instructor_row].assign_course(course)
+
+    rng = random.Random(seed)
+    queries = [rng.choice(catalogue["students"])[0][:rng.randint(2, 8)] for _ in range(SEARCH_QUERIES // 2)]
+    queries += [rng.choice(catalogue["students"])[3] for _ in range(SEARCH_QUERIES - len(queries))]
+    with timer.time("search"):
+        for query in queries:
+            registry.search(query, 1000)
+
+    try:
+        from app_pyqt import RecordTableModel
+    except ImportError:
+        RecordTableModel = None
+    if RecordTableModel is not None:
+        model = RecordTableModel(registry)
+        with timer.time("display_model"):
+            model.refresh()
+            for row in range(min(100, model.rowCount())):
+                for column in range(model.columnCount()):
+                    model.data(model.index(row, column))
+
+    saved = as_saved_data(catalogue)
+    json_file = os.path.join(directory, "data.json")
+    with timer.time("save_data"):
+        save_data(saved, json_file)
+    with timer.time("load_data"):
+        load_data(json_file)
+
+    hello = load_tkinter_front_end(directory)
+    if hello is not None:
+        people = [hello.Student(*row) for row in catalogue["students"]]
+        csv_file = os.path.join(directory, "students.csv")
+        with timer.time("datamanager_save"):
+            hello.DataManager.save_to_file(people, csv_file)
+        with timer.time("datamanager_load"):
+            hello.DataManager.load_from_file(csv_file, hello.Student)
+        hello.DataManager.close_journals()
+        hello.DataManager.journals.clear()
+
+    with timer.time("csv_export"):
+        export_to_csv(registry.students, registry.instructors, registry.courses, os.path.join(directory, "export.csv"))
+    with timer.time("csv_export_streaming"):
+        export_catalogue(snapshot(registry), os.path.join(directory, "export_streaming.csv"))
+
+    snapshot_file = os.path.join(directory, "data.sms")
+    with timer.time("snapshot_save"):
+        save_catalogue(snapshot(registry), snapshot_file)
+    with timer.time("snapshot_open"):
+        catalogue = open_snapshot(snapshot_file)
+        for section in SECTIONS:
+            catalogue.page(section)
+    with timer.time("snapshot_search"):
+        for query in queries:
+            catalogue.page("students", 0, 1000, query)
+    catalogue.close()
+
+    return timer.results
+
+
+def compare(results, baseline, threshold, absolute=False):
+    """
+    Compares results with a baseline.
+
+    Operations that took less than :data:`MIN_COMPARED_SECONDS` in the
+    baseline are too noisy to compare and are left out.
+
+    :param results: The seconds per operation, keyed by scale.
+    :type results: dict
+    :param baseline: The baseline in the same layout.
+    :type baseline: dict
+    :param threshold: The slowdown ratio reported as a regression.
+    :type threshold: float
+    :param absolute: Whether to compare the raw ratios instead of dividing
+        them by the median ratio of their scale.
+    :type absolute: bool
+    :return: ``(scale, operation, seconds, baseline_seconds, ratio)`` for
+        every regression, where ``ratio`` is the compared ratio.
+    :rtype: list
+    """
+    regressions = []
+    for scale, operations in results.items():
+        ratios = {}
+        for operation, seconds in operations.items():
+            reference = baseline.get(scale, {}).get(operation)
+            if reference and reference >= MIN_COMPARED_SECONDS:
+                ratios[operation] = seconds / reference
+        if not ratios:
+            continue
+        machine_factor = 1.0 if absolute else statistics.median(ratios.values())
+        for operation, ratio in ratios.items():
+            if ratio / machine_factor > threshold:
+                regressions.append((scale, operation, operations[operation], baseline[scale][operation], ratio / machine_factor))
+    return regressions
+
+
+def print_table(results, baseline):
+    """
+    Prints the results, with the ratio to the baseline when there is one.
+
+    :param results: The seconds per operation, keyed by scale.
+    :type results: dict
+    :param baseline: The baseline in the same layout.
+    :type baseline: dict
+    """
+    print(f"{'scale':<6} {'operation':<22} {'seconds':>10} {'baseline':>10} {'ratio':>7}")
+    for scale, operations in results.items():
+        for operation, seconds in operations.items():
+            reference = baseline.get(scale, {}).get(operation)
+            if reference:
+                print(f"{scale:<6} {operation:<22} {seconds:>10.4f} {reference:>10.4f} {seconds / reference:>7.2f}")
+            else:
+                print(f"{scale:<6} {operation:<22} {seconds:>10.4f} {'-':>10} {'-':>7}")
+
+
+def main(argv=None):
+    """
+    Runs the suite from the command line.
+
+    :param argv: The command line arguments. Defaults to ``sys.argv[1:]``.
+    :type argv: list, optional
+    :return: The exit status, 1 if a regression was found.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=["1k", "10k", "100k"], choices=list(SCALES))
+    parser.add_argument("--seed", type=int, default=435)
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest of this many runs per scale")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results stored in this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--absolute", action="store_true", help="compare raw times, for a baseline recorded on this machine")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            runs = [run_scale(SCALES[scale], directory, args.seed) for _ in range(args.repeat)]
+            results[scale] = {operation: min(run[operation] for run in runs) for operation in runs[0]}
+
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed, "results": results}, file, indent=2)
+
+    regressions = compare(results, baseline, args.threshold, args.absolute)
+    for scale, operation, seconds, reference, ratio in regressions:
+        relative = "" if args.absolute else " relative to the other operations"
+        print(f"REGRESSION: {operation} at {scale} took {seconds:.4f} s against the baseline {reference:.4f} s, {ratio:.2f}x{relative}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Load generator for the registration service.
+
+Starts :mod:`service` in a subprocess on a free port, or uses a running
+one given with ``--port``, preloads it with a generated catalogue from
+:mod:`catalogue` and then runs ``--clients`` concurrent asyncio clients.
+Each client keeps one request in flight and sends ``--requests`` requests,
+a ``--write-ratio`` share of them registrations and the rest searches.
+
+The throughput of the whole run and the p50/p95/p99 latency of each
+operation, in milliseconds, are printed and written as JSON with
+``--output``.
+
+Run with ``python benchmarks/service_load.py --students 1000 --clients 1 8 32 [--output service.json]``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalogue import generate_catalogue
+from service import DEFAULT_HOST
+from stats import PERCENTILES, percentile
+
+
+class Connection:
+    """
+    An asyncio client of the service that sends one request at a time.
+    """
+    def __init__(self, reader, writer):
+        """
+        Wraps an open connection.
+
+        :param reader: The stream of responses.
+        :type reader: asyncio.StreamReader
+        :param writer: The stream of requests.
+        :type writer: asyncio.StreamWriter
+        """
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host, port):
+        """
+        Connects to the service.
+
+        :param host: The address of the service.
+        :type host: str
+        :param port: The port of the service.
+        :type port: int
+        :return: The connection.
+        :rtype: Connection
+        """
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 26)
+        return cls(reader, writer)
+
+    async def call(self, op, **arguments):
+        """
+        Sends one request and waits for its response.
+
+        :param op: The operation.
+        :type op: str
+        :param arguments: The arguments of the operation.
+        :return: The response.
+        :rtype: dict
+        """
+        self.writer.write(json.dumps({"op": op, **arguments}).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def preload(host, port, catalogue):
+    """
+    Adds a generated catalogue to the service.
+
+    :param host: The address of the service.
+    :type host: str
+    :param port: The port of the service.
+    :type port: int
+    :param catalogue: The catalogue returned by :func:`catalogue.generate_catalogue`.
+    :type catalogue: dict
+    """
+    connection = await Connection.open(host, port)
+    for name, age, email, student_id in catalogue["students"]:
+        await connection.call("add_student", name=name, age=age, email=email, student_id=student_id)
+    for name, age, email, instructor_id in catalogue["instructors"]:
+        await connection.call("add_instructor", name=name, age=age, email=email, instructor_id=instructor_id)
+    for course_id, course_name, row in catalogue["courses"]:
+        await connection.call("add_course", course_id=course_id, course_name=course_name, instructor_id=catalogue["instructors"][row][3])
+    await connection.close()
+
+
+async def run_client(host, port, catalogue, requests, write_ratio, rng, samples):
+    """
+    Sends a mix of registrations and searches and records their latencies.
+
+    :param host: The address of the service.
+    :type host: str
+    :param port: The port of the service.
+    :type port: int
+    :param catalogue: The catalogue the service was preloaded with.
+    :type catalogue: dict
+    :param requests: The number of requests to send.
+    :type requests: int
+    :param write_ratio: The share of registrations among the requests.
+    :type write_ratio: float
+    :param rng: The random generator of the client.
+    :type rng: random.Random
+    :param samples: ``{op: [milliseconds]}``, filled in place.
+    :type samples: dict
+    :return: The number of requests the service rejected.
+    :rtype: int
+    """
+    connection = await Connection.open(host, port)
+    rejected = 0
+    for _ in range(requests):
+        if rng.random() < write_ratio:
+            op = "register"
+            arguments = {"student_id": rng.choice(catalogue["students"])[3], "course_id": rng.choice(catalogue["courses"])[0]}
+        else:
+            op = "search"
+            name = rng.choice(catalogue["students"])[0]
+            arguments = {"query": name[:rng.randint(2, 8)], "limit": 100}
+        start = time.perf_counter()
+        response = await connection.call(op, **arguments)
+        samples.setdefault(op, []).append((time.perf_counter() - start) * 1000)
+        rejected += not response["ok"]
+    await connection.close()
+    return rejected
+
+
+async def run_load(host, port, catalogue, clients, requests, write_ratio, seed):
+    """
+    Runs concurrent clients against the service.
+
+    :param host: The address of the service.
+    :type host: str
+    :param port: The port of the service.
+    :type port: int
+    :param catalogue: The catalogue the service was preloaded with.
+    :type catalogue: dict
+    :param clients: The number of concurrent clients.
+    :type clients: int
+    :param requests: The number of requests sent by each client.
+    :type requests: int
+    :param write_ratio: The share of registrations among the requests.
+    :type write_ratio: float
+    :param seed: The random seed.
+    :type seed: int
+    :return: The throughput, the rejected requests and the percentiles of each operation.
+    :rtype: dict
+    """
+    samples = {}
+    start = time.perf_counter()
+    rejected = await asyncio.gather(*(run_client(host, port, catalogue, requests, write_ratio, random.Random(seed + number), samples)
+                                      for number in range(clients)))
+    seconds = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "requests": clients * requests,
+        "seconds": seconds,
+        "requests_per_second": clients * requests / seconds,
+        "rejected": sum(rejected),
+        "latency_ms": {op: {f"p{rank}": percentile(values, rank) for rank in PERCENTILES} for op, values in samples.items()},
+    }
+
+
+def start_service():
+    """
+    Starts the service in a subprocess on a free port.
+
+    :return: The process and the port it listens on.
+    :rtype: tuple
+    """
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "service.py"), "--port", "0"], stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError(f"The service did not start: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def print_table(result):
+    """
+    Prints the results of one run.
+
+    :param result: The results returned by :func:`run_load`.
+    :type result: dict
+    """
+    print(f"\n{result['clients']} clients: {result['requests']} requests in {result['seconds']:.2f} s, "
+          f"{result['requests_per_second']:.0f} requests/s, {result['rejected']} rejected")
+    print(f"{'operation':<12}" + "".join(f"{'p' + str(rank) + ' ms':>10}" for rank in PERCENTILES))
+    for op, latencies in result["latency_ms"].items():
+        print(f"{op:<12}" + "".join(f"{latencies[f'p{rank}']:>10.2f}" for rank in PERCENTILES))
+
+
+def main(argv=None):
+    """
+    Runs the load generator from the command line.
+
+    :param argv: The command line arguments. Defaults to ``sys.argv[1:]``.
+    :type argv: list, optional
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, help="use the service running on this port instead of starting one")
+    parser.add_argument("--students", type=int, default=1000, help="size of the preloaded catalogue")
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="requests sent by each client")
+    parser.add_argument("--write-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=435)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    process = None
+    port = args.port
+    if port is None:
+        process, port = start_service()
+    try:
+        catalogue = generate_catalogue(args.students, args.seed)
+        asyncio.run(preload(args.host, port, catalogue))
+        results = []
+        for clients in args.clients:
+            results.append(asyncio.run(run_load(args.host, port, catalogue, clients, args.requests, args.write_ratio, args.seed)))
+            print_table(results[-1])
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"students": args.students, "write_ratio": args.write_ratio, "seed": args.seed, "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
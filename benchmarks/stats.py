@@ -0,0 +1,25 @@
+"""
+Summary statistics shared by the latency benchmarks.
+
+:func:`percentile` is used by :mod:`gui_latency` and :mod:`service_load`
+so both report the same p50/p95/p99 for the same samples.
+"""
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(samples, rank):
+    """
+    Returns a nearest-rank percentile.
+
+    :param samples: The measured values.
+    :type samples: list
+    :param rank: The percentile, from 0 to 100.
+    :type rank: float
+    :return: The smallest sample with at least ``rank`` percent of the
+        samples at or below it.
+    :rtype: float
+    """
+    ordered = sorted(samples)
+    index = max(0, -(-len(ordered) * rank // 100) - 1)
+    return ordered[int(index)]
@@ -0,0 +1,319 @@
+"""
+Versioned binary snapshot format for the School Management System.
+
+A snapshot file is laid out as::
+
+    header | student table | instructor table | course table | enrollment table | string heap
+
+Every table is an array of fixed-width little-endian records, and every
+string is stored once in the heap as UTF-8 and referenced by an
+``(offset, length)`` pair. Because record ``i`` of a table is at a known
+position, a :class:`SnapshotReader` can memory-map the file and decode any
+record on demand without parsing the rest of the file.
+"""
+import mmap
+import struct
+
+from persistence import check_cancelled, replace_when_done
+
+MAGIC = b"SMSNAP"
+VERSION = 1
+PROGRESS_EVERY = 5000
+
+HEADER = struct.Struct("<6sHIIIIQ")
+PERSON = struct.Struct("<IIIIIIH2x")
+COURSE = struct.Struct("<IIIIi")
+ENROLLMENT = struct.Struct("<II")
+
+
+class StringHeap:
+    """
+    Collects the strings of a snapshot while it is being written.
+
+    Equal strings are stored once.
+    """
+    def __init__(self):
+        """
+        Constructs an empty heap.
+        """
+        self.data = bytearray()
+        self._offsets = {}
+
+    def ref(self, text):
+        """
+        Returns the heap reference of a string, adding it if needed.
+
+        :param text: The string to store.
+        :type text: str
+        :return: The ``(offset, length)`` of the encoded string.
+        :rtype: tuple
+        """
+        ref = self._offsets.get(text)
+        if ref is None:
+            encoded = str(text).encode("utf-8")
+            ref = (len(self.data), len(encoded))
+            self.data += encoded
+            self._offsets[text] = ref
+        return ref
+
+
+def write_snapshot(data, filename, progress=None, cancelled=None):
+    """
+    Writes a snapshot to a binary snapshot file.
+
+    :param data: A snapshot returned by :func:`persistence.snapshot`.
+    :type data: dict
+    :param filename: The name of the file to write.
+    :type filename: str
+    :param progress: Called as ``progress(done, total)`` while writing.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the save when set.
+    :type cancelled: threading.Event, optional
+    :raises OperationCancelled: If ``cancelled`` is set before the save completes.
+    """
+    heap = StringHeap()
+    students, instructors, courses = data["students"], data["instructors"], data["courses"]
+    student_rows = {student_id: row for row, (_, _, _, student_id) in enumerate(students)}
+    instructor_rows = {instructor_id: row for row, (_, _, _, instructor_id) in enumerate(instructors)}
+    total = len(students) + len(instructors) + len(courses)
+    done = 0
+
+    def tick():
+        nonlocal done
+        done += 1
+        if done % PROGRESS_EVERY == 0:
+            check_cancelled(cancelled)
+            if progress:
+                progress(done, total)
+
+    person_tables = []
+    for people in (students, instructors):
+        table = bytearray()
+        for name, age, email, person_id in people:
+            table += PERSON.pack(*heap.ref(name), *heap.ref(email), *heap.ref(person_id), int(age))
+            tick()
+        person_tables.append(table)
+
+    course_table = bytearray()
+    enrollment_table = bytearray()
+    for row, (course_id, course_name, instructor, enrolled) in enumerate(courses):
+        instructor_row = instructor_rows.get(instructor[0], -1) if instructor else -1
+        course_table += COURSE.pack(*heap.ref(course_id), *heap.ref(course_name), instructor_row)
+        for student_id, _ in enrolled:
+            if student_id in student_rows:
+                enrollment_table += ENROLLMENT.pack(row, student_rows[student_id])
+        tick()
+
+    tables = [*person_tables, course_table, enrollment_table]
+    heap_offset = HEADER.size + sum(len(table) for table in tables)
+    header = HEADER.pack(MAGIC, VERSION, len(students), len(instructors), len(courses), len(enrollment_table) // ENROLLMENT.size, heap_offset)
+
+    def write(file):
+        file.write(header)
+        for table in tables:
+            file.write(table)
+        file.write(heap.data)
+        if progress:
+            progress(total, total)
+
+    replace_when_done(filename, write, cancelled, mode='wb')
+
+
+class SnapshotTable:
+    """
+    A lazy, read-only sequence over one table of a memory-mapped snapshot.
+
+    Records are decoded only when indexed or iterated.
+
+    :param reader: The reader owning the mapped file.
+    :type reader: SnapshotReader
+    :param layout: The struct describing one record.
+    :type layout: struct.Struct
+    :param offset: The position of the table in the file.
+    :type offset: int
+    :param count: The number of records in the table.
+    :type count: int
+    :param decode: Turns the unpacked fields of a record into a value.
+    :type decode: callable
+    """
+    def __init__(self, reader, layout, offset, count, decode):
+        """
+        Constructs a view over a table.
+        """
+        self.reader = reader
+        self.layout = layout
+        self.offset = offset
+        self.count = count
+        self.decode = decode
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.count
+        if not 0 <= row < self.count:
+            raise IndexError("snapshot row out of range")
+        return self.decode(self.layout.unpack_from(self.reader.buffer, self.offset + row * self.layout.size))
+
+    def __iter__(self):
+        end = self.offset + self.count * self.layout.size
+        for fields in self.layout.iter_unpack(self.reader.buffer[self.offset:end]):
+            yield self.decode(fields)
+
+    def strings(self, field):
+        """
+        Decodes one string of every record, leaving the other fields alone.
+
+        :param field: The position of the offset of the string among the
+            fields of a record; its length follows it.
+        :type field: int
+        :return: The strings, by row.
+        :rtype: list
+        """
+        end = self.offset + self.count * self.layout.size
+        string = self.reader.string
+        return [string(fields[field], fields[field + 1]) for fields in self.layout.iter_unpack(self.reader.buffer[self.offset:end])]
+
+
+class SnapshotReader:
+    """
+    Opens a binary snapshot file through ``mmap``.
+
+    Opening only reads the header; the tables are exposed as
+    :class:`SnapshotTable` views whose records are decoded on access.
+    Student and instructor records are ``(name, age, email, id)`` tuples,
+    course records are ``(course_id, course_name, instructor_row)`` tuples
+    with ``instructor_row`` set to -1 when there is no instructor, and
+    enrollment records are ``(course_row, student_row)`` tuples.
+
+    :param filename: The name of the snapshot file.
+    :type filename: str
+    :raises ValueError: If the file is not a snapshot or has an unsupported version.
+    """
+    def __init__(self, filename):
+        """
+        Maps the file and reads its header.
+
+        :param filename: The name of the snapshot file.
+        :type filename: str
+        :raises ValueError: If the file is not a snapshot or has an unsupported version.
+        """
+        self._file = open(filename, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{filename} is empty")
+        self.buffer = memoryview(self._map)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{filename} is not a snapshot file")
+        magic, version, students, instructors, courses, enrollments, heap_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a snapshot file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version}")
+        self.version = version
+        self.heap_offset = heap_offset
+
+        offset = HEADER.size
+        self.students = SnapshotTable(self, PERSON, offset, students, self._person)
+        offset += students * PERSON.size
+        self.instructors = SnapshotTable(self, PERSON, offset, instructors, self._person)
+        offset += instructors * PERSON.size
+        self.courses = SnapshotTable(self, COURSE, offset, courses, self._course)
+        offset += courses * COURSE.size
+        self.enrollments = SnapshotTable(self, ENROLLMENT, offset, enrollments, tuple)
+
+    def string(self, offset, length):
+        """
+        Decodes a string from the heap.
+
+        :param offset: The offset of the string in the heap.
+        :type offset: int
+        :param length: The length of the encoded string.
+        :type length: int
+        :return: The decoded string.
+        :rtype: str
+        """
+        start = self.heap_offset + offset
+        return str(self.buffer[start:start + length], "utf-8")
+
+    def close(self):
+        """
+        Releases the mapping and closes the file.
+        """
+        self.buffer.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _person(self, fields):
+        name_offset, name_length, email_offset, email_length, id_offset, id_length, age = fields
+        return (self.string(name_offset, name_length), age, self.string(email_offset, email_length), self.string(id_offset, id_length))
+
+    def _course(self, fields):
+        id_offset, id_length, name_offset, name_length, instructor_row = fields
+        return (self.string(id_offset, id_length), self.string(name_offset, name_length), instructor_row)
+
+
+def read_snapshot(filename, batch, batch_size=2000, progress=None, cancelled=None):
+    """
+    Streams the records of a binary snapshot in batches.
+
+    The batches use the same ``(section, record)`` pairs as
+    :func:`persistence.read_json`, followed by an ``enrollments`` section of
+    ``{"course_id": ..., "student_id": ...}`` records.
+
+    :param filename: The name of the snapshot file.
+    :type filename: str
+    :param batch: Called with each list of ``(section, record)`` pairs.
+    :type batch: callable
+    :param batch_size: The number of records per batch.
+    :type batch_size: int
+    :param progress: Called as ``progress(done, total)`` with records read.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the load when set.
+    :type cancelled: threading.Event, optional
+    :raises OperationCancelled: If ``cancelled`` is set before the load completes.
+    """
+    with SnapshotReader(filename) as reader:
+        total = len(reader.students) + len(reader.instructors) + len(reader.courses) + len(reader.enrollments)
+        instructor_ids = [instructor_id for _, _, _, instructor_id in reader.instructors]
+        student_ids = [student_id for _, _, _, student_id in reader.students]
+        course_ids = [course_id for course_id, _, _ in reader.courses]
+
+        def records():
+            for name, age, email, student_id in reader.students:
+                yield "students", {"name": name, "age": age, "email": email, "student_id": student_id}
+            for name, age, email, instructor_id in reader.instructors:
+                yield "instructors", {"name": name, "age": age, "email": email, "instructor_id": instructor_id}
+            for course_id, course_name, instructor_row in reader.courses:
+                yield "courses", {"course_id": course_id, "course_name": course_name, "instructor_id": instructor_ids[instructor_row] if instructor_row >= 0 else None}
+            for course_row, student_row in reader.enrollments:
+                yield "enrollments", {"course_id": course_ids[course_row], "student_id": student_ids[student_row]}
+
+        pending = []
+        done = 0
+        for item in records():
+            pending.append(item)
+            if len(pending) == batch_size:
+                check_cancelled(cancelled)
+                batch(pending)
+                done += len(pending)
+                pending = []
+                if progress:
+                    progress(done, total)
+        check_cancelled(cancelled)
+        if pending:
+            batch(pending)
+        if progress:
+            progress(total, total)
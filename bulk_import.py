@@ -0,0 +1,116 @@
+"""
+Bulk import of students and instructors.
+
+A whole file is read, validated in one pass with precompiled patterns and
+handed back as clean rows plus a list of per-row errors. The caller then
+inserts the clean rows in a single registry operation. :func:`import_rows`
+does the reading and validation on a worker thread.
+"""
+import csv
+import re
+
+from loaders import JsonStreamReader
+from persistence import check_cancelled
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+')
+AGE_PATTERN = re.compile(r'\d{1,3}')
+MAX_AGE = 100
+
+
+def read_rows(filename, section):
+    """
+    Reads the rows of a CSV or JSON import file.
+
+    CSV files must have a header row. JSON files may hold an array of
+    records or an object of arrays, in which case only the array named
+    ``section`` is read.
+
+    :param filename: The name of the file to read.
+    :type filename: str
+    :param section: The JSON key to read, such as ``"students"``.
+    :type section: str
+    :return: The rows of the file as dictionaries.
+    :rtype: list
+    """
+    with open(filename, 'r', newline='') as file:
+        if filename.lower().endswith('.json'):
+            return [record for key, record in JsonStreamReader(file).items() if key in (None, section)]
+        return list(csv.DictReader(file))
+
+
+def validate_batch(rows, id_field, existing=()):
+    """
+    Validates a batch of people in a single pass.
+
+    A row is valid when it is a record with a name and an ID, an email matching
+    :data:`EMAIL_PATTERN` and an age between 0 and :data:`MAX_AGE`, and when
+    its ID is not already used in the batch or in ``existing``.
+
+    :param rows: The rows to validate.
+    :type rows: list
+    :param id_field: The name of the ID column, such as ``"student_id"``.
+    :type id_field: str
+    :param existing: The IDs that are already taken.
+    :type existing: container
+    :return: The valid rows as ``(name, age, email, id)`` tuples, and the
+        errors as ``(row_number, message)`` pairs numbered from 1.
+    :rtype: tuple
+    """
+    email_match = EMAIL_PATTERN.fullmatch
+    age_match = AGE_PATTERN.fullmatch
+    valid = []
+    errors = []
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            errors.append((number, "Not a record"))
+            continue
+        name = str(row.get('name') or '').strip()
+        email = str(row.get('email') or '').strip()
+        age = row.get('age')
+        age = '' if age is None else str(age).strip()
+        record_id = str(row.get(id_field) or '').strip()
+
+        if not name:
+            errors.append((number, "Missing name"))
+        elif not record_id:
+            errors.append((number, f"Missing {id_field}"))
+        elif not email_match(email):
+            errors.append((number, f"Invalid email: {email}"))
+        elif not age_match(age) or int(age) > MAX_AGE:
+            errors.append((number, f"Invalid age: {age}"))
+        elif record_id in seen or record_id in existing:
+            errors.append((number, f"Duplicate {id_field}: {record_id}"))
+        else:
+            seen.add(record_id)
+            valid.append((name, int(age), email, record_id))
+    return valid, errors
+
+
+def import_rows(filename, section, id_field, existing, batch, progress=None, cancelled=None):
+    """
+    Reads and validates an import file, for a :class:`app_pyqt.PersistenceWorker`.
+
+    :param filename: The name of the file to read.
+    :type filename: str
+    :param section: The JSON key to read, such as ``"students"``.
+    :type section: str
+    :param id_field: The name of the ID column, such as ``"student_id"``.
+    :type id_field: str
+    :param existing: The IDs that are already taken.
+    :type existing: frozenset
+    :param batch: Called once with the ``(valid, errors)`` pair returned by
+        :func:`validate_batch`.
+    :type batch: callable
+    :param progress: Called as ``progress(done, total)`` when done.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the import when set.
+    :type cancelled: threading.Event, optional
+    """
+    rows = read_rows(filename, section)
+    check_cancelled(cancelled)
+    result = validate_batch(rows, id_field, existing)
+    check_cancelled(cancelled)
+    batch(result)
+    if progress:
+        progress(1, 1)
@@ -0,0 +1,301 @@
+"""
+Change tracking for the School Management System.
+
+A :class:`ChangeTracker` follows the events of a :class:`registry.Registry`
+and keeps a version counter for every record and the set of records
+changed since the last save. From that set it builds a *delta*: the
+current values of the changed records and the IDs of the deleted ones, in
+a JSON-ready layout that :func:`storage.save_changes` writes next to the
+saved file, or straight into an SQLite database, and that
+:func:`apply_delta` replays on load.
+"""
+import hashlib
+import json
+
+from models import Course, Instructor, Student
+
+SECTIONS = {Student: "students", Instructor: "instructors", Course: "courses"}
+ID_ATTRIBUTES = {"students": "student_id", "instructors": "instructor_id", "courses": "course_id"}
+
+
+def delta_row(section, record):
+    """
+    Returns the values a delta stores for a record.
+
+    :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+    :type section: str
+    :param record: The record.
+    :return: ``[name, age, email, id]`` for people and ``[course_id,
+        course_name, instructor_id, student_ids]`` for courses.
+    :rtype: list
+    """
+    if section == "courses":
+        instructor_id = record.instructor.instructor_id if record.instructor is not None else None
+        return [record.course_id, record.course_name, instructor_id, [student.student_id for student in record.enrolled_students]]
+    return [record.name, record.age, record._email, record.student_id if section == "students" else record.instructor_id]
+
+
+def content_hash(row):
+    """
+    Returns a digest of the values of a record.
+
+    :param row: The values returned by :func:`delta_row`.
+    :type row: list
+    :return: The digest.
+    :rtype: bytes
+    """
+    return hashlib.blake2b(json.dumps(row).encode("utf-8"), digest_size=16).digest()
+
+
+def empty_delta():
+    """
+    Returns a delta that changes nothing.
+
+    :return: A dictionary with a list of rows per section and the deleted
+        IDs per section under ``"deleted"``.
+    :rtype: dict
+    """
+    return {"students": [], "instructors": [], "courses": [], "deleted": {"students": [], "instructors": [], "courses": []}}
+
+
+class ChangeTracker:
+    """
+    Tracks which records of a registry changed since the last save.
+
+    Additions, renames and removals are picked up from the registry's
+    events, as are the records a removal unlinks. A record removed and then
+    added again with the same ID is written as a deletion followed by the
+    new values, so the old record's relations are not kept. Changes to enrollments and assignments do not go through the
+    registry, so the code making them calls :meth:`touch`. While
+    :attr:`tracking` is False, for example during a load, nothing is
+    recorded.
+
+    :param registry: The registry to follow.
+    :type registry: registry.Registry
+    """
+    def __init__(self, registry):
+        """
+        Constructs a tracker for which nothing has been saved yet.
+
+        :param registry: The registry to follow.
+        :type registry: registry.Registry
+        """
+        self.version = 0
+        self.versions = {}
+        self.dirty = {}
+        self.deleted = set()
+        self.saved_hashes = {}
+        self.filename = None
+        self.needs_full_save = True
+        self.tracking = True
+        for section, collection in (("students", registry.students), ("instructors", registry.instructors), ("courses", registry.courses)):
+            collection.subscribe(lambda event, record, section=section: self.collection_changed(section, event, record))
+
+    def collection_changed(self, section, event, record):
+        """
+        Records a change reported by a registry collection.
+
+        :param section: The section of the collection.
+        :type section: str
+        :param event: ``"added"``, ``"added_many"``, ``"removed"``, ``"renamed"``, ``"unlinked"`` or ``"cleared"``.
+        :type event: str
+        :param record: The record concerned, a list of records for ``"added_many"``.
+        """
+        if not self.tracking:
+            return
+        if event == "cleared":
+            self.dirty.clear()
+            self.deleted.clear()
+            self.needs_full_save = True
+        elif event == "added_many":
+            for item in record:
+                self.mark(section, item, item)
+        elif event == "removed":
+            self.mark(section, record, None)
+        else:
+            self.mark(section, record, record)
+
+    def touch(self, *records):
+        """
+        Marks records as changed, such as both sides of a new enrollment.
+
+        :param records: The students, instructors or courses that changed.
+        """
+        if self.tracking:
+            for record in records:
+                self.mark(SECTIONS[type(record)], record, record)
+
+    def mark(self, section, record, current):
+        """
+        Bumps the version of a record and adds it to the dirty set.
+
+        A deletion is remembered until it is saved, even if the record is
+        added again meanwhile.
+
+        :param section: The section of the record.
+        :type section: str
+        :param record: The record.
+        :param current: The record, or None if it was deleted.
+        """
+        self.version += 1
+        key = (section, str(getattr(record, ID_ATTRIBUTES[section])))
+        self.versions[key] = self.version
+        self.dirty[key] = current
+        if current is None:
+            self.deleted.add(key)
+
+    @property
+    def is_dirty(self):
+        """
+        Whether anything changed since the last save or load.
+        """
+        return self.needs_full_save or bool(self.dirty)
+
+    def can_save_delta(self, filename):
+        """
+        Tells whether the changes can be saved as a delta to a file.
+
+        :param filename: The file about to be saved.
+        :type filename: str
+        :return: True if the file was the last one saved or loaded and has
+            not needed a full save since.
+        :rtype: bool
+        """
+        return not self.needs_full_save and filename == self.filename
+
+    def take_delta(self):
+        """
+        Builds the delta of the records changed since the last save.
+
+        Records whose content hash equals the one they were last saved with,
+        such as a record renamed and then renamed back, are left out, unless
+        they were deleted and added again.
+
+        :return: ``(delta, version, hashes)``, where ``delta`` is None if
+            nothing needs to be written, ``version`` is passed to
+            :meth:`saved` and ``hashes`` holds the content hash of each
+            written record.
+        :rtype: tuple
+        """
+        delta = empty_delta()
+        hashes = {}
+        written = False
+        for (section, record_id), record in self.dirty.items():
+            deleted = (section, record_id) in self.deleted
+            if deleted:
+                delta["deleted"][section].append(record_id)
+                hashes[(section, record_id)] = None
+                written = True
+            if record is None:
+                continue
+            row = delta_row(section, record)
+            digest = content_hash(row)
+            if not deleted and self.saved_hashes.get((section, record_id)) == digest:
+                continue
+            delta[section].append(row)
+            hashes[(section, record_id)] = digest
+            written = True
+        return (delta if written else None), self.version, hashes
+
+    def saved(self, filename, version, hashes=None):
+        """
+        Marks the changes up to a version as saved to a file.
+
+        Records changed again after ``version``, while the save was running,
+        stay dirty.
+
+        :param filename: The file saved to.
+        :type filename: str
+        :param version: The version returned by :meth:`take_delta`, or
+            :attr:`version` when the full catalogue was saved.
+        :type version: int
+        :param hashes: The content hashes returned by :meth:`take_delta`, or
+            None after a full save.
+        :type hashes: dict, optional
+        """
+        if hashes is None:
+            self.saved_hashes.clear()
+        else:
+            for key, digest in hashes.items():
+                if digest is None:
+                    self.saved_hashes.pop(key, None)
+                else:
+                    self.saved_hashes[key] = digest
+        for key in [key for key in self.dirty if self.versions[key] <= version]:
+            del self.dirty[key]
+            del self.versions[key]
+            self.deleted.discard(key)
+        self.filename = filename
+        if hashes is None:
+            self.needs_full_save = False
+
+    def loaded(self, filename):
+        """
+        Marks the registry as matching a file that was just loaded.
+
+        :param filename: The file loaded.
+        :type filename: str
+        """
+        self.dirty.clear()
+        self.deleted.clear()
+        self.versions.clear()
+        self.saved_hashes.clear()
+        self.filename = filename
+        self.needs_full_save = False
+
+
+def apply_delta(registry, delta):
+    """
+    Replays a delta on a registry.
+
+    Records are updated in place, so their relations are kept, and added if
+    they are missing. Deleted records are removed first. References to
+    records that are not in the registry are ignored.
+
+    :param registry: The registry to update.
+    :type registry: registry.Registry
+    :param delta: A delta built by :meth:`ChangeTracker.take_delta`.
+    :type delta: dict
+    """
+    collections = {"students": registry.students, "instructors": registry.instructors, "courses": registry.courses}
+    for section, record_ids in delta["deleted"].items():
+        collection = collections[section]
+        for record_id in record_ids:
+            record = collection.get(record_id)
+            if record is not None:
+                collection.remove(record)
+
+    for section, kind in (("students", Student), ("instructors", Instructor)):
+        collection = collections[section]
+        for name, age, email, record_id in delta[section]:
+            record = collection.get(record_id)
+            if record is None:
+                collection.add(kind(name, age, email, record_id))
+                continue
+            if record.name != name:
+                collection.rename(record, name)
+            record.age = age
+            record._email = email
+
+    for course_id, course_name, instructor_id, student_ids in delta["courses"]:
+        instructor = registry.instructors.get(instructor_id) if instructor_id is not None else None
+        course = registry.courses.get(course_id)
+        if course is None:
+            course = registry.courses.add(Course(course_id, course_name, instructor))
+        else:
+            if course.course_name != course_name:
+                registry.courses.rename(course, course_name)
+            if instructor is None and course.instructor is not None:
+                course.instructor.assigned_courses.pop(course, None)
+                course.instructor = None
+            elif instructor is not None and course.instructor is not instructor:
+                if course.instructor is not None:
+                    course.instructor.assigned_courses.pop(course, None)
+                instructor.assigned_courses[course] = None
+                course.instructor = instructor
+        students = [registry.students.get(student_id) for student_id in student_ids]
+        wanted = {student: None for student in students if student is not None}
+        for student in [student for student in course.enrolled_students if student not in wanted]:
+            course.drop_student(student)
+        for student in wanted:
+            course.enroll(student)
@@ -0,0 +1,136 @@
+"""
+Columnar storage for large numbers of people.
+
+Instead of one Python object per person, a :class:`PersonColumns` store
+keeps each attribute in its own column: ages in a compact ``array('H')``
+and names and emails as integer codes into interned :class:`StringTable`
+instances, so repeated values are stored once.
+"""
+from array import array
+
+
+class StringTable:
+    """
+    An interned table of strings addressed by integer codes.
+
+    Adding a string that is already in the table returns its existing code,
+    so every distinct value is stored exactly once.
+    """
+    def __init__(self):
+        """
+        Constructs an empty string table.
+        """
+        self._strings = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __getitem__(self, code):
+        return self._strings[code]
+
+    def code(self, text):
+        """
+        Returns the code of a string, adding it to the table if needed.
+
+        :param text: The string to intern.
+        :type text: str
+        :return: The code of the string.
+        :rtype: int
+        """
+        code = self._codes.get(text)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(text)
+            self._codes[text] = code
+        return code
+
+
+class PersonColumns:
+    """
+    A columnar store of students or instructors.
+
+    Rows are materialized into objects only when they are read, through the
+    class passed as ``factory``. Course relations are not stored.
+
+    :param factory: The class built for each row, such as Student or Instructor.
+    :type factory: type
+    :param id_attr: The name of the attribute holding the person ID.
+    :type id_attr: str
+    """
+    def __init__(self, factory, id_attr):
+        """
+        Constructs an empty store.
+
+        :param factory: The class built for each row, such as Student or Instructor.
+        :type factory: type
+        :param id_attr: The name of the attribute holding the person ID.
+        :type id_attr: str
+        """
+        self.factory = factory
+        self.id_attr = id_attr
+        self.names = StringTable()
+        self.emails = StringTable()
+        self.ages = array('H')
+        self.name_codes = array('I')
+        self.email_codes = array('I')
+        self.ids = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        return self.factory(*self.row(row))
+
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield self[row]
+
+    def append(self, person):
+        """
+        Adds a person as a new row.
+
+        :param person: The student or instructor to store.
+        :raises OverflowError: If the age does not fit in 16 bits.
+        """
+        self.add_row(person.name, person.age, person._email, getattr(person, self.id_attr))
+
+    def add_row(self, name, age, email, person_id):
+        """
+        Adds a row from raw values.
+
+        :param name: The name of the person.
+        :type name: str
+        :param age: The age of the person.
+        :type age: int
+        :param email: The email of the person.
+        :type email: str
+        :param person_id: The ID of the person.
+        :type person_id: str
+        :raises OverflowError: If the age does not fit in 16 bits.
+        """
+        self.ages.append(int(age))
+        self.name_codes.append(self.names.code(name))
+        self.email_codes.append(self.emails.code(email))
+        self.ids.append(person_id)
+
+    def extend(self, people):
+        """
+        Adds several people as new rows.
+
+        :param people: The students or instructors to store.
+        :type people: iterable
+        """
+        for person in people:
+            self.append(person)
+
+    def row(self, row):
+        """
+        Returns the raw values of a row without building an object.
+
+        :param row: The row number.
+        :type row: int
+        :return: The name, age, email and ID of the row.
+        :rtype: tuple
+        """
+        return (self.names[self.name_codes[row]], self.ages[row], self.emails[self.email_codes[row]], self.ids[row])
@@ -0,0 +1,409 @@
+"""
+Runtime diagnostics for the School Management System.
+
+A :class:`Diagnostics` object counts the calls of instrumented functions
+and keeps a latency histogram for each of them. It can also run
+``cProfile`` and ``tracemalloc`` on demand while the application is in use,
+and everything it collects can be dumped to a JSON file for offline
+analysis. A :class:`StallWatchdog` reports when the main thread stops
+serving its event loop. Neither depends on Qt.
+"""
+import bisect
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    """
+    A latency histogram with fixed bucket bounds in milliseconds.
+
+    Bucket ``i`` counts the durations up to ``BUCKETS_MS[i]``; the last
+    bucket counts everything slower than the largest bound.
+    """
+    def __init__(self):
+        """
+        Constructs an empty histogram.
+        """
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, duration_ms, failed=False):
+        """
+        Records one call.
+
+        :param duration_ms: The duration of the call in milliseconds.
+        :type duration_ms: float
+        :param failed: Whether the call raised an exception.
+        :type failed: bool
+        """
+        self.counts[bisect.bisect_left(BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.errors += failed
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, rank):
+        """
+        Estimates a percentile as the upper bound of the bucket holding it.
+
+        :param rank: The percentile, from 0 to 100.
+        :type rank: float
+        :return: The bucket bound in milliseconds, or the slowest call if it
+            falls in the last bucket.
+        :rtype: float
+        """
+        wanted = self.count * rank / 100
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= wanted:
+                return float(bound)
+        return self.max_ms
+
+    def to_dict(self):
+        """
+        Returns the histogram as JSON-ready values.
+
+        :return: The counts, totals and estimated percentiles.
+        :rtype: dict
+        """
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets_ms": list(BUCKETS_MS),
+            "bucket_counts": list(self.counts),
+        }
+
+
+def positional_arity(function):
+    """
+    Returns how many positional arguments a function accepts.
+
+    :param function: The function.
+    :type function: callable
+    :return: The number of positional parameters, or None if it takes ``*args``.
+    :rtype: int
+    """
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        return None
+    return sum(parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD) for parameter in parameters)
+
+
+def name_of(function):
+    """
+    Returns a readable name for a function, looking through partials.
+
+    :param function: The function.
+    :type function: callable
+    :return: Its name.
+    :rtype: str
+    """
+    while isinstance(function, functools.partial):
+        function = function.func
+    return getattr(function, "__name__", repr(function))
+
+
+class Diagnostics:
+    """
+    Collects call counts, latency histograms and optional profiles.
+
+    Functions wrapped with :meth:`instrument` are timed on every call, from
+    any thread. The name of the outermost instrumented call running on the
+    main thread is kept in :attr:`current`, so other tools can tell what the
+    main thread is busy with.
+    """
+    def __init__(self):
+        """
+        Constructs an empty collector.
+        """
+        self.histograms = {}
+        self.current = None
+        self.current_started = None
+        self._lock = threading.Lock()
+        self._profile = None
+        self._main_thread = threading.main_thread()
+
+    def instrument(self, name, function):
+        """
+        Wraps a function so that every call is timed and counted.
+
+        The wrapper passes on only as many positional arguments as the
+        function accepts, so it can be connected to Qt signals that send
+        extra arguments, such as ``clicked(checked)``.
+
+        :param name: The name the calls are recorded under.
+        :type name: str
+        :param function: The function to wrap.
+        :type function: callable
+        :return: The wrapper.
+        :rtype: callable
+        """
+        arity = positional_arity(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if arity is not None:
+                args = args[:arity]
+            outermost = self.current is None and threading.current_thread() is self._main_thread
+            if outermost:
+                self.current = name
+                self.current_started = time.perf_counter()
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000, failed)
+                if outermost:
+                    self.current = None
+                    self.current_started = None
+
+        return wrapper
+
+    def record(self, name, duration_ms, failed=False):
+        """
+        Records one call of a function.
+
+        :param name: The name of the function.
+        :type name: str
+        :param duration_ms: The duration of the call in milliseconds.
+        :type duration_ms: float
+        :param failed: Whether the call raised an exception.
+        :type failed: bool
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(duration_ms, failed)
+
+    def reset(self):
+        """
+        Forgets every recorded call.
+        """
+        with self._lock:
+            self.histograms = {}
+
+    @property
+    def profiling(self):
+        """
+        Whether ``cProfile`` is running.
+        """
+        return self._profile is not None
+
+    def start_profiling(self):
+        """
+        Starts ``cProfile`` on the calling thread.
+        """
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop_profiling(self, limit=25):
+        """
+        Stops ``cProfile`` and returns its report.
+
+        :param limit: The number of functions listed.
+        :type limit: int
+        :return: The functions with the highest cumulative time, as text.
+        :rtype: str
+        """
+        if self._profile is None:
+            return ""
+        self._profile.disable()
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).sort_stats("cumulative").print_stats(limit)
+        self._profile = None
+        return output.getvalue()
+
+    @property
+    def tracing_memory(self):
+        """
+        Whether ``tracemalloc`` is running.
+        """
+        return tracemalloc.is_tracing()
+
+    def start_memory_tracing(self):
+        """
+        Starts ``tracemalloc``.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop_memory_tracing(self, limit=15):
+        """
+        Stops ``tracemalloc`` and returns the largest allocation sites.
+
+        :param limit: The number of sites listed.
+        :type limit: int
+        :return: The sites holding the most memory, as text.
+        :rtype: str
+        """
+        if not tracemalloc.is_tracing():
+            return ""
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lines = [f"Traced memory: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB"]
+        lines += [str(statistic) for statistic in snapshot.statistics("lineno")[:limit]]
+        return "\n".join(lines)
+
+    def to_dict(self):
+        """
+        Returns everything collected as JSON-ready values.
+
+        :return: The histograms keyed by function name.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "functions": {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+            }
+
+    def report(self):
+        """
+        Returns a table of the recorded calls, slowest total first.
+
+        :return: The table as text.
+        :rtype: str
+        """
+        functions = self.to_dict()["functions"]
+        lines = [f"{'function':<32}{'calls':>8}{'errors':>8}{'mean ms':>10}{'p50':>8}{'p95':>8}{'p99':>8}{'max ms':>10}"]
+        for name, stats in sorted(functions.items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"{name:<32}{stats['count']:>8}{stats['errors']:>8}{stats['mean_ms']:>10.2f}"
+                         f"{stats['p50_ms']:>8.0f}{stats['p95_ms']:>8.0f}{stats['p99_ms']:>8.0f}{stats['max_ms']:>10.2f}")
+        return "\n".join(lines)
+
+    def dump(self, filename):
+        """
+        Writes everything collected to a JSON file.
+
+        :param filename: The name of the file to write.
+        :type filename: str
+        """
+        with open(filename, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+class StallWatchdog:
+    """
+    Detects stalls of the main thread's event loop from a separate thread.
+
+    The event loop calls :meth:`beat` every ``interval_ms`` milliseconds, for
+    example from a ``QTimer``. When a beat is more than ``threshold_ms``
+    late, the watchdog thread logs the slot that is running, as known to
+    ``diagnostics``, and the main thread's Python stack at that moment. When
+    the beats resume, the total length of the stall is logged and recorded
+    in ``diagnostics`` under ``"event loop stall"``.
+
+    :param diagnostics: The collector that knows the running slot.
+    :type diagnostics: Diagnostics
+    :param threshold_ms: How late a beat may be before it is a stall.
+    :type threshold_ms: float
+    :param interval_ms: The interval of the beats. Defaults to half the threshold.
+    :type interval_ms: float, optional
+    """
+    def __init__(self, diagnostics, threshold_ms=50, interval_ms=None):
+        """
+        Constructs a watchdog that has not started yet.
+
+        :param diagnostics: The collector that knows the running slot.
+        :type diagnostics: Diagnostics
+        :param threshold_ms: How late a beat may be before it is a stall.
+        :type threshold_ms: float
+        :param interval_ms: The interval of the beats. Defaults to half the threshold.
+        :type interval_ms: float, optional
+        """
+        self.diagnostics = diagnostics
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms or max(1, int(threshold_ms) // 2)
+        self.stalls = 0
+        self._last_beat = time.perf_counter()
+        self._reported = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._main_thread = threading.main_thread()
+
+    def start(self):
+        """
+        Starts the watchdog thread.
+        """
+        if self._thread is None:
+            self._last_beat = time.perf_counter()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the watchdog thread and waits for it.
+        """
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def beat(self):
+        """
+        Tells the watchdog that the event loop is alive. Call it from the
+        main thread every ``interval_ms`` milliseconds.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            culprit, self._reported = self._reported, None
+            stalled_ms = (now - self._last_beat) * 1000 - self.interval_ms
+            self._last_beat = now
+        if culprit is not None:
+            logger.warning("Event loop stalled for %.0f ms in %s", stalled_ms, culprit)
+            self.diagnostics.record("event loop stall", stalled_ms)
+
+    def _watch(self):
+        """
+        Checks the beats until the watchdog is stopped. Runs on the watchdog thread.
+        """
+        poll = min(self.interval_ms, self.threshold_ms) / 2000
+        while not self._stopped.wait(poll):
+            last_beat = self._last_beat
+            late_ms = (time.perf_counter() - last_beat) * 1000 - self.interval_ms
+            if late_ms <= self.threshold_ms or self._reported is not None:
+                continue
+            culprit = self.diagnostics.current or "an uninstrumented call"
+            frame = sys._current_frames().get(self._main_thread.ident)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            with self._lock:
+                if last_beat != self._last_beat:
+                    continue
+                self._reported = culprit
+            self.stalls += 1
+            logger.warning("Event loop blocked for %.0f ms so far in %s; main thread stack:\n%s", late_ms, culprit, stack)
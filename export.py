@@ -0,0 +1,236 @@
+"""
+Streaming CSV export for the School Management System.
+
+Rows are formatted into an in-memory chunk with :mod:`csv` and written to
+the file one chunk at a time, optionally through gzip or lzma. Like the
+functions of :mod:`persistence`, the exporters only read a snapshot, so
+they can run on a worker thread. :func:`export_rosters` additionally
+spreads the per-course roster files over a process pool.
+"""
+import concurrent.futures
+import csv
+import gzip
+import io
+import itertools
+import lzma
+import multiprocessing
+import os
+import re
+
+from persistence import check_cancelled, replace_when_done
+
+CHUNK_ROWS = 10000
+ROSTER_BATCH_ROWS = 50000
+HEADER = ["Type", "Name", "ID", "Details"]
+ROSTER_HEADER = ["Student ID", "Name"]
+EXTENSIONS = {None: "", "gzip": ".gz", "lzma": ".xz"}
+
+
+def compression_of(filename):
+    """
+    Returns the compression implied by the extension of a file name.
+
+    :param filename: The name of the file.
+    :type filename: str
+    :return: ``"gzip"`` for ``.gz``, ``"lzma"`` for ``.xz`` and None otherwise.
+    :rtype: str
+    """
+    for compression, extension in EXTENSIONS.items():
+        if extension and filename.lower().endswith(extension):
+            return compression
+    return None
+
+
+def write_rows(file, rows, compression=None, tick=None):
+    """
+    Writes CSV rows to a binary file in chunks of :data:`CHUNK_ROWS` rows.
+
+    :param file: A file opened for binary writing.
+    :type file: file
+    :param rows: The rows to write.
+    :type rows: iterable
+    :param compression: None, ``"gzip"`` or ``"lzma"``.
+    :type compression: str, optional
+    :param tick: Called with the number of rows written after each chunk.
+    :type tick: callable, optional
+    :return: The number of rows written.
+    :rtype: int
+    """
+    if compression == "gzip":
+        sink = gzip.GzipFile(fileobj=file, mode="wb", compresslevel=6)
+    elif compression == "lzma":
+        sink = lzma.LZMAFile(file, mode="wb", preset=1)
+    else:
+        sink = file
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = iter(rows)
+    written = 0
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_ROWS))
+        if not chunk:
+            break
+        writer.writerows(chunk)
+        sink.write(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0)
+        buffer.truncate()
+        written += len(chunk)
+        if tick:
+            tick(written)
+    if sink is not file:
+        sink.close()
+    return written
+
+
+def export_catalogue(data, filename, progress=None, cancelled=None, compression=None):
+    """
+    Exports a snapshot in the format used by Export to CSV.
+
+    The file is written under a temporary name and renamed at the end. When
+    ``compression`` is not given it is taken from the extension, so
+    ``catalogue.csv.gz`` is gzip-compressed.
+
+    :param data: A snapshot returned by :func:`persistence.snapshot`.
+    :type data: dict
+    :param filename: The name of the file to write.
+    :type filename: str
+    :param progress: Called as ``progress(done, total)`` while writing.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the export when set.
+    :type cancelled: threading.Event, optional
+    :param compression: None, ``"gzip"`` or ``"lzma"``.
+    :type compression: str, optional
+    :raises OperationCancelled: If ``cancelled`` is set before the export completes.
+    """
+    compression = compression or compression_of(filename)
+    total = len(data["students"]) + len(data["instructors"]) + len(data["courses"]) + 1
+
+    def rows():
+        yield HEADER
+        for name, _, _, student_id in data["students"]:
+            yield ["Student", name, student_id, "N/A"]
+        for name, _, _, instructor_id in data["instructors"]:
+            yield ["Instructor", name, instructor_id, "N/A"]
+        for course_id, course_name, _, enrolled in data["courses"]:
+            yield ["Course", course_name, course_id, ", ".join([name for _, name in enrolled])]
+
+    def tick(done):
+        check_cancelled(cancelled)
+        if progress:
+            progress(done, total)
+
+    def write(file):
+        write_rows(file, rows(), compression, tick)
+        if progress:
+            progress(total, total)
+
+    replace_when_done(filename, write, cancelled, mode='wb')
+
+
+def roster_filename(course_id, taken):
+    """
+    Returns a file name for the roster of a course.
+
+    Characters that are not safe in file names are replaced, and a suffix
+    is added if two courses would share a name.
+
+    :param course_id: The ID of the course.
+    :type course_id: str
+    :param taken: The names already used, updated with the new one.
+    :type taken: set
+    :return: The file name without extension.
+    :rtype: str
+    """
+    base = re.sub(r'[^A-Za-z0-9_.-]', '_', str(course_id)) or "course"
+    name = base
+    for number in itertools.count(2):
+        if name.lower() not in taken:
+            break
+        name = f"{base}_{number}"
+    taken.add(name.lower())
+    return name
+
+
+def write_rosters(rosters, compression=None):
+    """
+    Writes a batch of roster files. Runs in a worker process.
+
+    :param rosters: ``(path, enrolled)`` pairs, where ``enrolled`` is a list
+        of ``(student_id, name)`` pairs.
+    :type rosters: list
+    :param compression: None, ``"gzip"`` or ``"lzma"``.
+    :type compression: str, optional
+    :return: The number of enrollment rows written.
+    :rtype: int
+    """
+    written = 0
+    for path, enrolled in rosters:
+        replace_when_done(path, lambda file: write_rows(file, itertools.chain([ROSTER_HEADER], enrolled), compression), None, mode='wb')
+        written += len(enrolled)
+    return written
+
+
+def export_rosters(data, directory, progress=None, cancelled=None, compression=None, workers=None):
+    """
+    Writes one roster file per course into a directory.
+
+    Each file lists the ID and name of every student enrolled in the
+    course. The courses are grouped into batches of about
+    :data:`ROSTER_BATCH_ROWS` rows, and the batches are written in parallel
+    by a process pool started with the ``spawn`` method, which is safe to
+    use from a threaded GUI.
+
+    :param data: A snapshot returned by :func:`persistence.snapshot`.
+    :type data: dict
+    :param directory: The directory to write the files into.
+    :type directory: str
+    :param progress: Called as ``progress(done, total)`` with rows written.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the export when set. Files
+        already written are kept.
+    :type cancelled: threading.Event, optional
+    :param compression: None, ``"gzip"`` or ``"lzma"``.
+    :type compression: str, optional
+    :param workers: The number of worker processes. Defaults to the number
+        of CPUs.
+    :type workers: int, optional
+    :return: The number of roster files written.
+    :rtype: int
+    :raises OperationCancelled: If ``cancelled`` is set before the export completes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    extension = ".csv" + EXTENSIONS[compression]
+    taken = set()
+    batches = []
+    batch = []
+    rows = 0
+    for course_id, _, _, enrolled in data["courses"]:
+        batch.append((os.path.join(directory, roster_filename(course_id, taken) + extension), enrolled))
+        rows += len(enrolled) + 1
+        if rows >= ROSTER_BATCH_ROWS:
+            batches.append(batch)
+            batch = []
+            rows = 0
+    if batch:
+        batches.append(batch)
+
+    total = sum(len(enrolled) for _, _, _, enrolled in data["courses"])
+    done = 0
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = {pool.submit(write_rosters, batch, compression) for batch in batches}
+        try:
+            while pending:
+                check_cancelled(cancelled)
+                finished, pending = concurrent.futures.wait(pending, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    done += future.result()
+                if finished and progress:
+                    progress(done, total)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    if progress:
+        progress(total, total)
+    return len(data["courses"])
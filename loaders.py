@@ -0,0 +1,145 @@
+"""
+Streaming loaders for the School Management System.
+
+The readers in this module walk a data file incrementally and hand back
+one record at a time, so the memory used while loading does not depend
+on the size of the file.
+"""
+import json
+
+
+class JsonStreamReader:
+    """
+    An incremental reader for JSON documents made of arrays of records.
+
+    The document is read in chunks and only the record currently being
+    decoded is kept in memory. It accepts either a top-level array or a
+    top-level object whose values are arrays; other object values are
+    decoded and skipped. The number of characters read so far is kept in
+    :attr:`consumed` for progress reporting.
+
+    :param file: A text file opened for reading.
+    :type file: file
+    :param chunk_size: The number of characters read at a time.
+    :type chunk_size: int
+    """
+    def __init__(self, file, chunk_size=65536):
+        """
+        Constructs a reader over an open file.
+
+        :param file: A text file opened for reading.
+        :type file: file
+        :param chunk_size: The number of characters read at a time.
+        :type chunk_size: int
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.consumed = 0
+
+    def items(self):
+        """
+        Yields the records of the document one at a time.
+
+        :return: An iterator of ``(key, record)`` pairs, where ``key`` is the
+            object key holding the array, or None for a top-level array.
+        :rtype: iterator
+        """
+        opening = self._next_char()
+        if opening == "[":
+            yield from ((None, item) for item in self._array())
+        elif opening == "{":
+            yield from self._object()
+        else:
+            raise ValueError("Expected a JSON array or object")
+
+    def _object(self):
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if self._next_char() != ":":
+                raise ValueError("Expected ':' after object key")
+            if self._peek() == "[":
+                self._pos += 1
+                for item in self._array():
+                    yield key, item
+            else:
+                self._value()
+            separator = self._next_char()
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError("Expected ',' or '}' in object")
+
+    def _array(self):
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            separator = self._next_char()
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError("Expected ',' or ']' in array")
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                self._fill()
+                continue
+            if end == len(self._buffer) and not self._eof:
+                # A number at the end of the buffer may continue in the next chunk
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                raise ValueError("Unexpected end of JSON document")
+            self._fill()
+
+    def _next_char(self):
+        char = self._peek()
+        self._pos += 1
+        return char
+
+    def _fill(self):
+        chunk = self.file.read(self.chunk_size)
+        self.consumed += len(chunk)
+        if not chunk:
+            self._eof = True
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+
+
+def iter_json_records(filename, chunk_size=65536):
+    """
+    Streams the records of a JSON data file.
+
+    :param filename: The name of the file to read.
+    :type filename: str
+    :param chunk_size: The number of characters read at a time.
+    :type chunk_size: int
+    :return: An iterator of ``(key, record)`` pairs, such as
+        ``("students", {...})`` for files written by Save Data.
+    :rtype: iterator
+    """
+    with open(filename, 'r') as file:
+        yield from JsonStreamReader(file, chunk_size).items()
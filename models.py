@@ -0,0 +1,428 @@
+"""
+The model layer of the School Management System.
+
+This module holds the people and course classes and the helpers that work
+on them. It does not import PyQt, so scripts, tools and the documentation
+build can use it without paying for the GUI. The standard library
+modules used by the helpers are imported inside them for the same reason.
+"""
+
+
+class Person:
+    """
+    A class to represent a person.
+
+    :param name: The name of the person.
+    :type name: str
+    :param age: The age of the person.
+    :type age: int
+    :param email: The email of the person.
+    :type email: str
+    """
+    __slots__ = ('name', 'age', '_email')
+
+    def __init__(self, name, age, email):
+        """
+        Constructs all the necessary attributes for the person object.
+
+        :param name: The name of the person.
+        :type name: str
+        :param age: The age of the person.
+        :type age: int
+        :param email: The email of the person.
+        :type email: str
+        """
+        self.name = name
+        self.age = age
+        self._email = email
+
+    def introduce(self):
+        """
+        Prints a brief introduction of the person.
+        """
+        print(f"Hello, I am {self.name}. I am {self.age} years old. My email is {self._email}.")
+
+
+
+class Student(Person):
+    """
+    A class to represent a student, inheriting from Person.
+
+    ``registered_courses`` is a dictionary used as an insertion-ordered set
+    of courses, so membership tests and counts take constant time.
+
+    :param name: The name of the student.
+    :type name: str
+    :param age: The age of the student.
+    :type age: int
+    :param email: The email of the student.
+    :type email: str
+    :param student_id: The ID of the student.
+    :type student_id: str
+    """
+    __slots__ = ('student_id', 'registered_courses')
+
+    def __init__(self, name, age, email, student_id):
+        """
+        Constructs all the necessary attributes for the student object.
+
+        :param name: The name of the student.
+        :type name: str
+        :param age: The age of the student.
+        :type age: int
+        :param email: The email of the student.
+        :type email: str
+        :param student_id: The ID of the student.
+        :type student_id: str
+        """
+        super().__init__(name, age, email)
+        self.student_id = student_id
+        self.registered_courses = {}
+
+    def register_course(self, course):
+        """
+        Registers the student for a course.
+
+        Registering for a course the student already has changes nothing.
+
+        :param course: The course to register the student in.
+        :type course: Course
+        :return: True if the student was not registered for the course yet.
+        :rtype: bool
+        """
+        if course in self.registered_courses:
+            return False
+        self.registered_courses[course] = None
+        print(f"{self.name} registered for {course.course_name}.")
+        return True
+
+    def is_registered(self, course):
+        """
+        Tells whether the student is registered for a course.
+
+        :param course: The course to look for.
+        :type course: Course
+        :return: True if the student is registered for the course.
+        :rtype: bool
+        """
+        return course in self.registered_courses
+
+    def course_count(self):
+        """
+        Returns the number of courses the student is registered for.
+
+        :return: The number of courses.
+        :rtype: int
+        """
+        return len(self.registered_courses)
+
+    def detach(self):
+        """
+        Removes the student from every course it is registered for.
+
+        Runs in time proportional to the number of courses of the student.
+
+        :return: The courses the student was removed from.
+        :rtype: list
+        """
+        courses = list(self.registered_courses)
+        for course in courses:
+            course.enrolled_students.pop(self, None)
+        self.registered_courses.clear()
+        return courses
+
+
+class Instructor(Person):
+    """
+    A class to represent an instructor, inheriting from Person.
+
+    ``assigned_courses`` is a dictionary used as an insertion-ordered set of
+    courses.
+
+    :param name: The name of the instructor.
+    :type name: str
+    :param age: The age of the instructor.
+    :type age: int
+    :param email: The email of the instructor.
+    :type email: str
+    :param instructor_id: The ID of the instructor.
+    :type instructor_id: str
+    """
+    __slots__ = ('instructor_id', 'assigned_courses')
+
+    def __init__(self, name, age, email, instructor_id):
+        """
+        Constructs all the necessary attributes for the instructor object.
+
+        :param name: The name of the instructor.
+        :type name: str
+        :param age: The age of the instructor.
+        :type age: int
+        :param email: The email of the instructor.
+        :type email: str
+        :param instructor_id: The ID of the instructor.
+        :type instructor_id: str
+        """
+        super().__init__(name, age, email)
+        self.instructor_id = instructor_id
+        self.assigned_courses = {}
+
+    def assign_course(self, course):
+        """
+        Assigns the instructor to a course.
+
+        :param course: The course to assign the instructor to.
+        :type course: Course
+        """
+        if course not in self.assigned_courses:
+            if course.instructor is not None:
+                course.instructor.assigned_courses.pop(course, None)
+            self.assigned_courses[course] = None
+            course.instructor = self
+            print(f"{self.name} is assigned to {course.course_name}.")
+        else:
+            print("Already Assigned")
+
+    def detach(self):
+        """
+        Removes the instructor from every course assigned to it.
+
+        Runs in time proportional to the number of courses of the instructor.
+
+        :return: The courses the instructor was removed from.
+        :rtype: list
+        """
+        courses = [course for course in self.assigned_courses if course.instructor is self]
+        for course in courses:
+            course.instructor = None
+        self.assigned_courses.clear()
+        return courses
+
+
+class Course:
+    """
+    A class to represent a course.
+
+    ``enrolled_students`` is a dictionary used as an insertion-ordered set
+    of students. Together with :attr:`Student.registered_courses` it forms
+    the enrollment relation, which :meth:`enroll`, :meth:`add_students` and
+    :meth:`drop_student` keep in step on both sides.
+
+    :param course_id: The ID of the course.
+    :type course_id: str
+    :param course_name: The name of the course.
+    :type course_name: str
+    :param instructor: The instructor assigned to the course (default is None).
+    :type instructor: Instructor, optional
+    """
+    __slots__ = ('course_id', 'course_name', 'instructor', 'enrolled_students')
+
+    def __init__(self, course_id, course_name, instructor=None):
+        """
+        Constructs all the necessary attributes for the course object.
+
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :param course_name: The name of the course.
+        :type course_name: str
+        :param instructor: The instructor assigned to the course (default is None).
+        :type instructor: Instructor, optional
+        """
+        self.course_id = course_id
+        self.course_name = course_name
+        self.instructor = instructor
+        self.enrolled_students = {}
+        if instructor is not None:
+            instructor.assigned_courses[self] = None
+
+    def add_students(self, student):
+        """
+        Adds a student to the course.
+
+        Adding a student who is already enrolled changes nothing.
+
+        :param student: The student to add to the course.
+        :type student: Student
+        :return: True if the student was not enrolled yet.
+        :rtype: bool
+        """
+        if student in self.enrolled_students:
+            return False
+        student.register_course(self)
+        self.enrolled_students[student] = None
+        print(f"{student.name} added to {self.course_name}.")
+        return True
+
+    def enroll(self, student):
+        """
+        Enrolls a student on both sides of the relation without printing.
+
+        This is what loaders use; it is idempotent like :meth:`add_students`.
+
+        :param student: The student to enroll.
+        :type student: Student
+        :return: True if the student was not enrolled yet.
+        :rtype: bool
+        """
+        if student in self.enrolled_students:
+            return False
+        self.enrolled_students[student] = None
+        student.registered_courses[self] = None
+        return True
+
+    def drop_student(self, student):
+        """
+        Removes a student from the course on both sides of the relation.
+
+        :param student: The student to remove.
+        :type student: Student
+        :return: True if the student was enrolled.
+        :rtype: bool
+        """
+        if student not in self.enrolled_students:
+            return False
+        del self.enrolled_students[student]
+        student.registered_courses.pop(self, None)
+        return True
+
+    def is_enrolled(self, student):
+        """
+        Tells whether a student is enrolled in the course.
+
+        :param student: The student to look for.
+        :type student: Student
+        :return: True if the student is enrolled.
+        :rtype: bool
+        """
+        return student in self.enrolled_students
+
+    def student_count(self):
+        """
+        Returns the number of students enrolled in the course.
+
+        :return: The number of students.
+        :rtype: int
+        """
+        return len(self.enrolled_students)
+
+    def detach(self):
+        """
+        Removes the course from its instructor and from every enrolled student.
+
+        Runs in time proportional to the number of students of the course.
+
+        :return: The students and the instructor the course was removed from.
+        :rtype: list
+        """
+        records = list(self.enrolled_students)
+        for student in records:
+            student.registered_courses.pop(self, None)
+        self.enrolled_students.clear()
+        if self.instructor is not None:
+            self.instructor.assigned_courses.pop(self, None)
+            records.append(self.instructor)
+            self.instructor = None
+        return records
+
+
+def save_data(data, filename):
+    """
+    Saves data to a JSON file.
+
+    :param data: The data to save.
+    :type data: dict
+    :param filename: The name of the file to save the data to.
+    :type filename: str
+    """
+    import json
+
+    with open(filename, 'w') as file:
+        json.dump(data, file)
+
+
+def load_data(filename):
+    """
+    Loads data from a JSON file.
+
+    :param filename: The name of the file to load the data from.
+    :type filename: str
+    :return: The loaded data.
+    :rtype: dict
+    """
+    import json
+
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def validate_email(email):
+    """
+    Validates an email address.
+
+    :param email: The email address to validate.
+    :type email: str
+    :return: True if the email is valid, False otherwise.
+    :rtype: bool
+    """
+    import re
+
+    pattern = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
+    return re.match(pattern, email)
+
+
+def validate_age(age):
+    """
+    Validates an age.
+
+    :param age: The age to validate.
+    :type age: int or str
+    :return: True if the age is valid, False otherwise.
+    :rtype: bool
+    """
+    if isinstance(age, int) or age.isnumeric():
+        return age >= 0 and age <= 100
+    else:
+        return False
+
+
+def export_to_csv(students, instructors, courses, filename):
+    """
+    Exports data to a CSV file.
+
+    :param students: The list of students.
+    :type students: list
+    :param instructors: The list of instructors.
+    :type instructors: list
+    :param courses: The list of courses.
+    :type courses: list
+    :param filename: The name of the file to save the data to.
+    :type filename: str
+    """
+    import csv
+
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Type", "Name", "ID", "Course"])
+
+        for student in students:
+            writer.writerow(["Student", student.name, student.student_id, "N/A"])
+        for instructor in instructors:
+            writer.writerow(["Instructor", instructor.name, instructor.instructor_id, "N/A"])
+        for course in courses:
+            writer.writerow(["Course", course.course_name, course.course_id, ", ".join(student.name for student in course.enrolled_students)])
+
+
+def record_values(record):
+    """
+    Returns the Type, Name, ID and Course cells shown for a record.
+
+    :param record: A student, instructor or course.
+    :type record: Student or Instructor or Course
+    :return: The four display values of the record.
+    :rtype: tuple
+    """
+    if isinstance(record, Student):
+        return ("Student", record.name, record.student_id, "N/A")
+    if isinstance(record, Instructor):
+        return ("Instructor", record.name, record.instructor_id, "N/A")
+    return ("Course", record.course_name, record.course_id, ", ".join(student.name for student in record.enrolled_students))
@@ -0,0 +1,202 @@
+"""
+Thread-safe persistence routines for the School Management System.
+
+The GUI takes a :func:`snapshot` of the registry on its own thread and
+hands it to the functions below, which run on a worker thread. They only
+touch the snapshot, report progress through a callback and stop early
+when their ``cancelled`` event is set.
+"""
+import csv
+import json
+import os
+
+from loaders import JsonStreamReader
+
+PROGRESS_EVERY = 5000
+
+
+class OperationCancelled(Exception):
+    """
+    Raised when a persistence operation is cancelled before it finishes.
+    """
+
+
+def snapshot(registry):
+    """
+    Copies the registry into plain tuples that can be used from another thread.
+
+    :param registry: The registry to copy.
+    :type registry: registry.Registry
+    :return: A dictionary with ``students`` and ``instructors`` as
+        ``(name, age, email, id)`` tuples, and ``courses`` as
+        ``(course_id, course_name, instructor, enrolled)`` tuples, where
+        ``instructor`` is an ``(instructor_id, name)`` pair or None and
+        ``enrolled`` is a list of ``(student_id, name)`` pairs.
+    :rtype: dict
+    """
+    return {
+        "students": [(s.name, s.age, s._email, s.student_id) for s in registry.students],
+        "instructors": [(i.name, i.age, i._email, i.instructor_id) for i in registry.instructors],
+        "courses": [(c.course_id, c.course_name, (c.instructor.instructor_id, c.instructor.name) if c.instructor else None, [(s.student_id, s.name) for s in c.enrolled_students]) for c in registry.courses],
+    }
+
+
+def check_cancelled(cancelled):
+    """
+    Stops an operation whose cancellation event has been set.
+
+    :param cancelled: The cancellation event, if any.
+    :type cancelled: threading.Event or None
+    :raises OperationCancelled: If the event is set.
+    """
+    if cancelled is not None and cancelled.is_set():
+        raise OperationCancelled()
+
+
+def replace_when_done(filename, write, cancelled, mode='w'):
+    """
+    Writes a file under a temporary name and renames it once complete.
+
+    If writing fails or is cancelled, the temporary file is removed and any
+    existing file is left untouched.
+
+    :param filename: The name of the file to write.
+    :type filename: str
+    :param write: Called with the open temporary file.
+    :type write: callable
+    :param cancelled: The cancellation event, if any.
+    :type cancelled: threading.Event or None
+    :param mode: The mode to open the file with, ``'w'`` or ``'wb'``.
+    :type mode: str
+    """
+    temp_filename = filename + '.tmp'
+    newline = None if 'b' in mode else ''
+    try:
+        with open(temp_filename, mode, newline=newline) as file:
+            write(file)
+        check_cancelled(cancelled)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def write_json(data, filename, progress=None, cancelled=None):
+    """
+    Writes a snapshot to a JSON file in the format used by Save Data.
+
+    The file is written under a temporary name and renamed at the end, so a
+    cancelled or failed save leaves any previous file untouched.
+
+    :param data: A snapshot returned by :func:`snapshot`.
+    :type data: dict
+    :param filename: The name of the file to write.
+    :type filename: str
+    :param progress: Called as ``progress(done, total)`` while writing.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the save when set.
+    :type cancelled: threading.Event, optional
+    :raises OperationCancelled: If ``cancelled`` is set before the save completes.
+    """
+    sections = {
+        "students": ({"name": n, "age": a, "email": e, "student_id": i} for n, a, e, i in data["students"]),
+        "instructors": ({"name": n, "age": a, "email": e, "instructor_id": i} for n, a, e, i in data["instructors"]),
+        "courses": ({"course_id": i, "course_name": n, "instructor": t[1] if t else None} for i, n, t, _ in data["courses"]),
+    }
+    total = sum(len(data[key]) for key in sections)
+
+    def write(file):
+        done = 0
+        file.write("{")
+        for position, (key, records) in enumerate(sections.items()):
+            file.write(f"{', ' if position else ''}{json.dumps(key)}: [")
+            for index, record in enumerate(records):
+                if index:
+                    file.write(", ")
+                file.write(json.dumps(record))
+                done += 1
+                if done % PROGRESS_EVERY == 0:
+                    check_cancelled(cancelled)
+                    if progress:
+                        progress(done, total)
+            file.write("]")
+        file.write("}")
+        if progress:
+            progress(total, total)
+
+    replace_when_done(filename, write, cancelled)
+
+
+def write_csv(data, filename, progress=None, cancelled=None):
+    """
+    Writes a snapshot to a CSV file in the format used by Export to CSV.
+
+    :param data: A snapshot returned by :func:`snapshot`.
+    :type data: dict
+    :param filename: The name of the file to write.
+    :type filename: str
+    :param progress: Called as ``progress(done, total)`` while writing.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the export when set.
+    :type cancelled: threading.Event, optional
+    :raises OperationCancelled: If ``cancelled`` is set before the export completes.
+    """
+    total = len(data["students"]) + len(data["instructors"]) + len(data["courses"])
+
+    def rows():
+        for name, _, _, student_id in data["students"]:
+            yield ["Student", name, student_id, "N/A"]
+        for name, _, _, instructor_id in data["instructors"]:
+            yield ["Instructor", name, instructor_id, "N/A"]
+        for course_id, course_name, _, enrolled in data["courses"]:
+            yield ["Course", course_name, course_id, ", ".join(name for _, name in enrolled)]
+
+    def write(file):
+        writer = csv.writer(file)
+        writer.writerow(["Type", "Name", "ID", "Details"])
+        for done, row in enumerate(rows(), 1):
+            writer.writerow(row)
+            if done % PROGRESS_EVERY == 0:
+                check_cancelled(cancelled)
+                if progress:
+                    progress(done, total)
+        if progress:
+            progress(total, total)
+
+    replace_when_done(filename, write, cancelled)
+
+
+def read_json(filename, batch, batch_size=2000, progress=None, cancelled=None):
+    """
+    Streams the records of a JSON data file in batches.
+
+    :param filename: The name of the file to read.
+    :type filename: str
+    :param batch: Called with each list of ``(section, record)`` pairs.
+    :type batch: callable
+    :param batch_size: The number of records per batch.
+    :type batch_size: int
+    :param progress: Called as ``progress(read, size)`` with characters read.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the load when set.
+    :type cancelled: threading.Event, optional
+    :raises OperationCancelled: If ``cancelled`` is set before the load completes.
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'r') as file:
+        reader = JsonStreamReader(file)
+        pending = []
+        for item in reader.items():
+            pending.append(item)
+            if len(pending) == batch_size:
+                check_cancelled(cancelled)
+                batch(pending)
+                pending = []
+                if progress:
+                    progress(reader.consumed, size)
+        check_cancelled(cancelled)
+        if pending:
+            batch(pending)
+        if progress:
+            progress(size, size)
@@ -0,0 +1,273 @@
+"""
+In-memory registry for the School Management System.
+
+Keeps students, instructors and courses in dictionaries keyed by ID and by
+name so that every lookup made by the GUI is a constant-time operation.
+"""
+from models import Course, Student
+from search import SearchIndex
+
+
+class EntityIndex:
+    """
+    A collection of records indexed by ID and by name.
+
+    Iterating over the index yields the records in insertion order.
+    Listeners registered with :meth:`subscribe` are told about every
+    change as ``listener(event, record)``, where ``event`` is one of
+    ``"added"``, ``"removed"``, ``"renamed"`` or ``"cleared"``. A bulk
+    insert is reported once as ``"added_many"`` with the list of records,
+    and a record that lost a relation because a related record was removed
+    from the registry is reported as ``"unlinked"``.
+
+    :param id_attr: The name of the attribute holding the record ID.
+    :type id_attr: str
+    :param name_attr: The name of the attribute holding the record name.
+    :type name_attr: str
+    """
+    def __init__(self, id_attr, name_attr):
+        """
+        Constructs an empty index.
+
+        :param id_attr: The name of the attribute holding the record ID.
+        :type id_attr: str
+        :param name_attr: The name of the attribute holding the record name.
+        :type name_attr: str
+        """
+        self.id_attr = id_attr
+        self.name_attr = name_attr
+        self._by_id = {}
+        self._by_name = {}
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, record_id):
+        return str(record_id) in self._by_id
+
+    def key_of(self, record):
+        """
+        Returns the key a record is stored under.
+
+        :param record: The record.
+        :return: The record ID as a string.
+        :rtype: str
+        """
+        return str(getattr(record, self.id_attr))
+
+    def name_of(self, record):
+        """
+        Returns the name a record is indexed under.
+
+        :param record: The record.
+        :return: The record name.
+        :rtype: str
+        """
+        return getattr(record, self.name_attr)
+
+    def subscribe(self, listener):
+        """
+        Registers a callable to be notified of changes to the index.
+
+        :param listener: A callable taking ``(event, record)``.
+        :type listener: callable
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """
+        Stops notifying a previously subscribed callable.
+
+        :param listener: The callable to remove.
+        :type listener: callable
+        """
+        self._listeners.remove(listener)
+
+    def add(self, record):
+        """
+        Adds a record to the index.
+
+        :param record: The record to add.
+        :return: The added record.
+        :raises ValueError: If a record with the same ID already exists.
+        """
+        key = self.key_of(record)
+        if key in self._by_id:
+            raise ValueError(f"Duplicate ID: {key}")
+        self._by_id[key] = record
+        self._by_name.setdefault(self.name_of(record), {})[key] = record
+        self._notify("added", record)
+        return record
+
+    def add_many(self, records):
+        """
+        Adds several records as a single all-or-nothing operation.
+
+        :param records: The records to add.
+        :type records: list
+        :return: The number of records added.
+        :rtype: int
+        :raises ValueError: If an ID is duplicated within the records or
+            already in the index, in which case nothing is added.
+        """
+        keys = [self.key_of(record) for record in records]
+        seen = set()
+        for key in keys:
+            if key in self._by_id or key in seen:
+                raise ValueError(f"Duplicate ID: {key}")
+            seen.add(key)
+        for key, record in zip(keys, records):
+            self._by_id[key] = record
+            self._by_name.setdefault(self.name_of(record), {})[key] = record
+        self._notify("added_many", records)
+        return len(records)
+
+    def remove(self, record):
+        """
+        Removes a record from the index.
+
+        :param record: The record to remove.
+        :raises KeyError: If the record is not in the index.
+        """
+        key = self.key_of(record)
+        del self._by_id[key]
+        self._unlink_name(self.name_of(record), key)
+        self._notify("removed", record)
+
+    def rename(self, record, new_name):
+        """
+        Changes the name of a record and keeps the name index in sync.
+
+        :param record: The record to rename.
+        :param new_name: The new name.
+        :type new_name: str
+        """
+        key = self.key_of(record)
+        self._unlink_name(self.name_of(record), key)
+        setattr(record, self.name_attr, new_name)
+        self._by_name.setdefault(new_name, {})[key] = record
+        self._notify("renamed", record)
+
+    def get(self, record_id, default=None):
+        """
+        Looks up a record by ID.
+
+        :param record_id: The ID to look up.
+        :param default: The value returned when no record matches.
+        :return: The matching record or ``default``.
+        """
+        return self._by_id.get(str(record_id), default)
+
+    def find_by_name(self, name):
+        """
+        Looks up the first record added under a name.
+
+        :param name: The name to look up.
+        :type name: str
+        :return: The matching record or None.
+        """
+        matches = self._by_name.get(name)
+        if matches:
+            return next(iter(matches.values()))
+        return None
+
+    def all_by_name(self, name):
+        """
+        Returns every record sharing a name.
+
+        :param name: The name to look up.
+        :type name: str
+        :return: The matching records in insertion order.
+        :rtype: list
+        """
+        return list(self._by_name.get(name, {}).values())
+
+    def clear(self):
+        """
+        Removes every record from the index.
+        """
+        self._by_id.clear()
+        self._by_name.clear()
+        self._notify("cleared", None)
+
+    def _notify(self, event, record):
+        for listener in self._listeners:
+            listener(event, record)
+
+    def _unlink_name(self, name, key):
+        matches = self._by_name.get(name)
+        if matches is not None:
+            matches.pop(key, None)
+            if not matches:
+                del self._by_name[name]
+
+
+class Registry:
+    """
+    Holds the students, instructors and courses of the system.
+
+    Each collection is an :class:`EntityIndex`, so lookups by ID or name
+    do not scan the whole catalogue, and each one is paired with a
+    :class:`search.SearchIndex` for substring queries.
+
+    Removing a record calls its ``detach()`` method, which unlinks it from
+    the related records through their reverse references, so no course
+    keeps a deleted student or instructor and no person keeps a deleted
+    course. The records it was unlinked from are then reported as
+    ``"unlinked"`` by their own collections, so change trackers see them.
+    """
+    def __init__(self):
+        """
+        Constructs an empty registry.
+        """
+        self.students = EntityIndex('student_id', 'name')
+        self.instructors = EntityIndex('instructor_id', 'name')
+        self.courses = EntityIndex('course_id', 'course_name')
+        self.student_search = SearchIndex(self.students)
+        self.instructor_search = SearchIndex(self.instructors)
+        self.course_search = SearchIndex(self.courses)
+        for collection in (self.students, self.instructors, self.courses):
+            collection.subscribe(self._detach_removed)
+
+    def clear(self):
+        """
+        Removes every student, instructor and course.
+        """
+        self.students.clear()
+        self.instructors.clear()
+        self.courses.clear()
+
+    def search(self, query, limit=None):
+        """
+        Finds the students, instructors and courses matching a query.
+
+        :param query: The text to look for in names and IDs.
+        :type query: str
+        :param limit: The maximum number of records to return.
+        :type limit: int, optional
+        :return: Matching students, then instructors, then courses.
+        :rtype: list
+        """
+        results = []
+        for index in (self.student_search, self.instructor_search, self.course_search):
+            remaining = None if limit is None else limit - len(results)
+            if remaining == 0:
+                break
+            results.extend(index.search(query, remaining))
+        return results
+
+    def _detach_removed(self, event, record):
+        if event == "removed":
+            for related in record.detach():
+                self._collection_of(related)._notify("unlinked", related)
+
+    def _collection_of(self, record):
+        if isinstance(record, Student):
+            return self.students
+        if isinstance(record, Course):
+            return self.courses
+        return self.instructors
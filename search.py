@@ -0,0 +1,154 @@
+"""
+Incremental search index for the School Management System.
+
+Names and IDs are broken into overlapping trigrams. A query is answered
+by intersecting the posting sets of its own trigrams and confirming the
+few remaining candidates, so the cost depends on the number of matches
+rather than on the size of the catalogue. A limited search ranks every
+match by name before keeping the first ones.
+"""
+from collections import defaultdict
+
+START = "\x02"
+END = "\x03"
+
+
+def trigrams(text):
+    """
+    Returns the set of trigrams of a piece of text.
+
+    The text is case-folded and wrapped in boundary markers so that
+    values shorter than three characters still produce trigrams.
+
+    :param text: The text to split.
+    :type text: str
+    :return: The trigrams of the text.
+    :rtype: set
+    """
+    padded = f"{START}{text.casefold()}{END}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    A trigram index over the names and IDs of one registry collection.
+
+    The index subscribes to the collection and is updated on every add,
+    rename and remove, so it never has to be rebuilt.
+
+    :param collection: The collection to index.
+    :type collection: registry.EntityIndex
+    """
+    def __init__(self, collection):
+        """
+        Constructs the index and indexes the records already present.
+
+        :param collection: The collection to index.
+        :type collection: registry.EntityIndex
+        """
+        self.collection = collection
+        self._postings = defaultdict(set)
+        self._texts = {}
+        self._names = {}
+        self._order = None
+        for record in collection:
+            self._add(record)
+        collection.subscribe(self._on_change)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def search(self, query, limit=None):
+        """
+        Finds the records whose name or ID contains the query.
+
+        Matching ignores case.
+
+        :param query: The text to look for.
+        :type query: str
+        :param limit: The maximum number of records to return; the first
+            ones by name are kept.
+        :type limit: int, optional
+        :return: The matching records, sorted by name.
+        :rtype: list
+        """
+        needle = query.casefold()
+        if not needle:
+            if self._order is None:
+                self._order = sorted(self._names, key=self._names.__getitem__)
+            ranked = self._order
+        elif len(needle) < 3:
+            ranked = sorted(self._short_query(needle), key=self._names.__getitem__)
+        else:
+            ranked = sorted(self._long_query(needle), key=self._names.__getitem__)
+
+        # Candidates are ranked by name first, so only as many as needed to
+        # fill the limit are confirmed
+        records = []
+        for key in ranked:
+            if limit is not None and len(records) >= limit:
+                break
+            if len(needle) < 3 or self._confirm(key, needle):
+                records.append(self.collection.get(key))
+        return records
+
+    def _short_query(self, needle):
+        return set().union(*[keys for gram, keys in self._postings.items() if needle in gram])
+
+    def _long_query(self, needle):
+        postings = []
+        for gram in trigrams(needle):
+            if gram[0] == START or gram[-1] == END:
+                continue
+            keys = self._postings.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def _confirm(self, key, needle):
+        name, record_id = self._texts[key]
+        return needle in name or needle in record_id
+
+    def _fields(self, record):
+        return (self.collection.name_of(record).casefold(), self.collection.key_of(record).casefold())
+
+    def _add(self, record):
+        key = self.collection.key_of(record)
+        texts = self._fields(record)
+        self._texts[key] = texts
+        self._names[key] = self.collection.name_of(record)
+        postings = self._postings
+        for text in texts:
+            for gram in trigrams(text):
+                postings[gram].add(key)
+
+    def _remove(self, record):
+        key = self.collection.key_of(record)
+        self._names.pop(key, None)
+        for text in self._texts.pop(key, ()):
+            for gram in trigrams(text):
+                keys = self._postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[gram]
+
+    def _on_change(self, event, record):
+        if event != "unlinked":
+            self._order = None
+        if event == "added":
+            self._add(record)
+        elif event == "added_many":
+            for item in record:
+                self._add(item)
+        elif event == "removed":
+            self._remove(record)
+        elif event == "renamed":
+            self._remove(record)
+            self._add(record)
+        elif event == "cleared":
+            self._postings.clear()
+            self._texts.clear()
+            self._names.clear()
@@ -0,0 +1,543 @@
+"""
+Local registration service for the School Management System.
+
+Serves one :class:`registry.Registry` to many clients at once over TCP
+with :mod:`asyncio` streams. The protocol is one JSON object per line:
+a request names an ``op`` and its arguments, and may carry an ``id`` that
+is echoed in the response::
+
+    {"id": 1, "op": "register", "student_id": "S1", "course_id": "C1"}
+    {"id": 1, "ok": true, "result": null}
+
+Failed requests get ``{"id": 1, "ok": false, "error": "..."}``. Writes
+(:data:`WRITE_OPS`) go through a single writer task in the order they
+arrive, while reads (:data:`READ_OPS`) are answered right away by the
+connection that asked; an export copies a snapshot and writes the file on
+a thread, into the export directory of the service. :class:`ServiceClient` is a blocking client for the GUI and
+scripts.
+
+The service has no authentication, so it listens on the loopback address
+unless ``--host`` says otherwise.
+
+Run with ``python service.py [--host 127.0.0.1] [--port 8435] [--load catalogue.json] [--export-dir exports]``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+
+from changes import apply_delta
+from export import export_catalogue
+from models import Course, Instructor, Student, record_values, validate_age, validate_email
+from persistence import snapshot
+from registry import Registry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8435
+WRITE_OPS = ("add_student", "add_instructor", "add_course", "register", "assign")
+READ_OPS = ("search", "records", "stats", "export")
+QUEUE_SIZE = 10000
+DEFAULT_EXPORT_DIRECTORY = "exports"
+
+
+class ServiceError(Exception):
+    """
+    Raised when the service rejects a request.
+    """
+
+
+def check_strings(**values):
+    """
+    Checks that request arguments are strings, before anything is changed.
+
+    :param values: The arguments, by name.
+    :raises ServiceError: If one of them is not a string.
+    """
+    for name, value in values.items():
+        if not isinstance(value, str):
+            raise ServiceError(f"{name} must be a string")
+
+
+class RegistrationService:
+    """
+    Applies client requests to a registry.
+
+    :param registry: The registry to serve. Defaults to an empty one.
+    :type registry: registry.Registry, optional
+    :param export_directory: The directory exports are written to.
+    :type export_directory: str
+    """
+    def __init__(self, registry=None, export_directory=DEFAULT_EXPORT_DIRECTORY):
+        """
+        Constructs a service that is not listening yet.
+
+        :param registry: The registry to serve. Defaults to an empty one.
+        :type registry: registry.Registry, optional
+        :param export_directory: The directory exports are written to.
+        :type export_directory: str
+        """
+        self.registry = registry if registry is not None else Registry()
+        self.export_directory = export_directory
+        self.writes = None
+        self.server = None
+        self.writer_task = None
+        self.served = 0
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening and starts the writer task.
+
+        :param host: The address to listen on.
+        :type host: str
+        :param port: The port to listen on, 0 for any free port.
+        :type port: int
+        :return: The ``(host, port)`` the service listens on.
+        :rtype: tuple
+        """
+        self.writes = asyncio.Queue(QUEUE_SIZE)
+        self.writer_task = asyncio.create_task(self.write_loop())
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        """
+        Stops listening and stops the writer task once the queued writes are done.
+        """
+        self.server.close()
+        await self.server.wait_closed()
+        await self.writes.join()
+        self.writer_task.cancel()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answers the requests of one client until it disconnects.
+
+        :param reader: The stream of requests.
+        :type reader: asyncio.StreamReader
+        :param writer: The stream of responses.
+        :type writer: asyncio.StreamWriter
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(json.dumps(await self.answer(line)).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, line):
+        """
+        Answers one request.
+
+        :param line: The request, a JSON object.
+        :type line: bytes
+        :return: The response.
+        :rtype: dict
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ServiceError("A request must be a JSON object")
+            request_id = request.get("id")
+            op = request.pop("op", None)
+            request.pop("id", None)
+            if op in WRITE_OPS:
+                done = asyncio.get_running_loop().create_future()
+                await self.writes.put((op, request, done))
+                result = await done
+            elif op in READ_OPS:
+                result = await getattr(self, op)(**request)
+            else:
+                raise ServiceError(f"Unknown operation: {op}")
+        except Exception as e:
+            # One bad request must not end the connection or the service
+            return {"id": request_id, "ok": False, "error": str(e) or type(e).__name__}
+        self.served += 1
+        return {"id": request_id, "ok": True, "result": result}
+
+    async def write_loop(self):
+        """
+        Applies the queued writes one at a time, in arrival order.
+        """
+        while True:
+            op, arguments, done = await self.writes.get()
+            try:
+                done.set_result(getattr(self, op)(**arguments))
+            except Exception as e:
+                done.set_exception(e)
+            finally:
+                self.writes.task_done()
+
+    def add_person(self, collection, kind, name, age, email, record_id):
+        """
+        Adds a student or an instructor after validating it like the GUI does.
+
+        :param collection: The collection to add to.
+        :type collection: registry.EntityIndex
+        :param kind: :class:`models.Student` or :class:`models.Instructor`.
+        :type kind: type
+        :param name: The name of the person.
+        :type name: str
+        :param age: The age of the person.
+        :type age: int
+        :param email: The email of the person.
+        :type email: str
+        :param record_id: The ID of the person.
+        :type record_id: str
+        :raises ServiceError: If the data is invalid or the ID is taken.
+        """
+        check_strings(name=name, email=email, id=record_id)
+        if record_id in collection:
+            raise ServiceError(f"{kind.__name__} ID {record_id} already exists")
+        if isinstance(age, str) and age.isnumeric():
+            age = int(age)
+        if not isinstance(age, int) or isinstance(age, bool) or not validate_age(age) or not validate_email(email):
+            raise ServiceError(f"Invalid {kind.__name__.lower()} data")
+        collection.add(kind(name, age, email, record_id))
+
+    def add_student(self, name, age, email, student_id):
+        """
+        Adds a student. The arguments are those of :class:`models.Student`.
+
+        :raises ServiceError: If the data is invalid or the ID is taken.
+        """
+        self.add_person(self.registry.students, Student, name, age, email, student_id)
+
+    def add_instructor(self, name, age, email, instructor_id):
+        """
+        Adds an instructor. The arguments are those of :class:`models.Instructor`.
+
+        :raises ServiceError: If the data is invalid or the ID is taken.
+        """
+        self.add_person(self.registry.instructors, Instructor, name, age, email, instructor_id)
+
+    def add_course(self, course_id, course_name, instructor_id=None):
+        """
+        Adds a course, optionally with its instructor.
+
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :param course_name: The name of the course.
+        :type course_name: str
+        :param instructor_id: The ID of its instructor.
+        :type instructor_id: str, optional
+        :raises ServiceError: If the ID is taken or the instructor is unknown.
+        """
+        check_strings(course_id=course_id, course_name=course_name)
+        if instructor_id is not None:
+            check_strings(instructor_id=instructor_id)
+        if course_id in self.registry.courses:
+            raise ServiceError(f"Course ID {course_id} already exists")
+        instructor = None
+        if instructor_id is not None:
+            instructor = self.registry.instructors.get(instructor_id)
+            if instructor is None:
+                raise ServiceError(f"Unknown instructor: {instructor_id}")
+        self.registry.courses.add(Course(course_id, course_name, instructor))
+
+    def register(self, student_id, course_id):
+        """
+        Registers a student for a course.
+
+        :param student_id: The ID of the student.
+        :type student_id: str
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :raises ServiceError: If either is unknown or the student is already registered.
+        """
+        check_strings(student_id=student_id, course_id=course_id)
+        student = self.registry.students.get(student_id)
+        course = self.registry.courses.get(course_id)
+        if student is None or course is None:
+            raise ServiceError("Invalid student or course")
+        if not course.enroll(student):
+            raise ServiceError(f"{student.name} is already registered for {course.course_name}")
+
+    def assign(self, course_id, instructor_id):
+        """
+        Assigns an instructor to a course.
+
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :param instructor_id: The ID of the instructor.
+        :type instructor_id: str
+        :raises ServiceError: If either is unknown.
+        """
+        check_strings(course_id=course_id, instructor_id=instructor_id)
+        course = self.registry.courses.get(course_id)
+        instructor = self.registry.instructors.get(instructor_id)
+        if course is None or instructor is None:
+            raise ServiceError("Invalid course or instructor")
+        if course.instructor is not instructor:
+            if course.instructor is not None:
+                course.instructor.assigned_courses.pop(course, None)
+            instructor.assigned_courses[course] = None
+            course.instructor = instructor
+
+    async def search(self, query, limit=1000):
+        """
+        Finds the records matching a query.
+
+        :param query: The text to look for in names and IDs.
+        :type query: str
+        :param limit: The maximum number of records to return.
+        :type limit: int
+        :return: The Type, Name, ID and Course cells of each match.
+        :rtype: list
+        """
+        check_strings(query=query)
+        if not isinstance(limit, int) or isinstance(limit, bool) or limit < 0:
+            raise ServiceError("limit must be a non-negative integer")
+        return [record_values(record) for record in self.registry.search(query, limit)]
+
+    async def records(self):
+        """
+        Returns the whole catalogue as the ``(section, record)`` pairs read by Load Data.
+
+        :rtype: list
+        """
+        pairs = [("students", {"name": s.name, "age": s.age, "email": s._email, "student_id": s.student_id}) for s in self.registry.students]
+        pairs += [("instructors", {"name": i.name, "age": i.age, "email": i._email, "instructor_id": i.instructor_id}) for i in self.registry.instructors]
+        pairs += [("courses", {"course_id": c.course_id, "course_name": c.course_name,
+                               "instructor_id": c.instructor.instructor_id if c.instructor is not None else None}) for c in self.registry.courses]
+        pairs += [("enrollments", {"course_id": c.course_id, "student_id": s.student_id}) for c in self.registry.courses for s in c.enrolled_students]
+        return pairs
+
+    async def stats(self):
+        """
+        Returns the size of the catalogue and the number of requests served.
+
+        :rtype: dict
+        """
+        return {"students": len(self.registry.students), "instructors": len(self.registry.instructors),
+                "courses": len(self.registry.courses), "served": self.served, "queued_writes": self.writes.qsize()}
+
+    async def export(self, filename, compression=None):
+        """
+        Exports the catalogue to a CSV file, as Export to CSV does.
+
+        The snapshot is taken between two writes and the file is written on
+        a thread, so requests keep being served meanwhile.
+
+        :param filename: The name of the file to write in the export
+            directory; clients cannot write anywhere else.
+        :type filename: str
+        :param compression: None, ``"gzip"`` or ``"lzma"``; taken from the extension if not given.
+        :type compression: str, optional
+        :return: The path of the file written.
+        :rtype: str
+        :raises ServiceError: If ``filename`` is not a bare file name.
+        """
+        check_strings(filename=filename)
+        if filename in ("", ".", "..") or os.path.basename(filename) != filename or os.path.isabs(filename):
+            raise ServiceError("filename must be a file name without a directory")
+        os.makedirs(self.export_directory, exist_ok=True)
+        path = os.path.join(self.export_directory, filename)
+        data = snapshot(self.registry)
+        await asyncio.get_running_loop().run_in_executor(None, lambda: export_catalogue(data, path, compression=compression))
+        return path
+
+
+class ServiceClient:
+    """
+    A blocking client of :class:`RegistrationService`.
+
+    :param host: The address of the service.
+    :type host: str
+    :param port: The port of the service.
+    :type port: int
+    :param timeout: The seconds to wait for a response.
+    :type timeout: float
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=10.0):
+        """
+        Connects to the service.
+
+        :param host: The address of the service.
+        :type host: str
+        :param port: The port of the service.
+        :type port: int
+        :param timeout: The seconds to wait for a response.
+        :type timeout: float
+        :raises OSError: If the service cannot be reached.
+        """
+        self.address = (host, port)
+        self.socket = socket.create_connection(self.address, timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.socket.makefile("rwb")
+
+    def call(self, op, **arguments):
+        """
+        Sends one request and waits for its response.
+
+        :param op: The operation.
+        :type op: str
+        :param arguments: The arguments of the operation.
+        :return: The result of the operation.
+        :raises ServiceError: If the service rejects the request.
+        :raises OSError: If the connection fails.
+        """
+        self.file.write(json.dumps({"op": op, **arguments}).encode("utf-8") + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The service closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise ServiceError(response["error"])
+        return response["result"]
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        self.file.close()
+        self.socket.close()
+
+
+def open_client(host, port, batch, progress=None, cancelled=None):
+    """
+    Connects to the service and fetches its catalogue, for a :class:`app_pyqt.PersistenceWorker`.
+
+    :param host: The address of the service.
+    :type host: str
+    :param port: The port of the service.
+    :type port: int
+    :param batch: Called once with the client and the ``(section, record)``
+        pairs returned by :meth:`RegistrationService.records`.
+    :type batch: callable
+    :param progress: Called as ``progress(done, total)`` when done.
+    :type progress: callable, optional
+    :param cancelled: Unused; a connection is not cancelled.
+    :type cancelled: threading.Event, optional
+    :raises OSError: If the service cannot be reached.
+    """
+    client = ServiceClient(host, port)
+    try:
+        records = client.call("records")
+    except BaseException:
+        client.close()
+        raise
+    batch((client, records))
+    if progress:
+        progress(1, 1)
+
+
+def send_request(client, op, arguments, batch, progress=None, cancelled=None):
+    """
+    Sends one request, for a :class:`app_pyqt.PersistenceWorker`.
+
+    A rejection is passed to ``batch``; only a failed connection raises.
+
+    :param client: The connection to the service.
+    :type client: ServiceClient
+    :param op: The operation.
+    :type op: str
+    :param arguments: The arguments of the operation.
+    :type arguments: dict
+    :param batch: Called once with ``(True, result)`` or ``(False, error)``.
+    :type batch: callable
+    :param progress: Called as ``progress(done, total)`` when done.
+    :type progress: callable, optional
+    :param cancelled: Unused; a request is not cancelled.
+    :type cancelled: threading.Event, optional
+    :raises OSError: If the connection fails or times out.
+    """
+    try:
+        result = client.call(op, **arguments)
+    except ServiceError as e:
+        batch((False, str(e)))
+    else:
+        batch((True, result))
+    if progress:
+        progress(1, 1)
+
+
+def close_client(client, progress=None, cancelled=None):
+    """
+    Closes a connection, for a :class:`app_pyqt.PersistenceWorker`.
+
+    :param client: The connection to close.
+    :type client: ServiceClient
+    :param progress: Unused.
+    :type progress: callable, optional
+    :param cancelled: Unused.
+    :type cancelled: threading.Event, optional
+    """
+    client.close()
+
+
+async def serve(host, port, filename=None, export_directory=DEFAULT_EXPORT_DIRECTORY):
+    """
+    Runs the service until it is interrupted.
+
+    :param host: The address to listen on.
+    :type host: str
+    :param port: The port to listen on, 0 for any free port.
+    :type port: int
+    :param filename: A catalogue to load first, in any format Load Data reads.
+    :type filename: str, optional
+    :param export_directory: The directory exports are written to.
+    :type export_directory: str
+    """
+    service = RegistrationService(export_directory=export_directory)
+    if filename:
+        from storage import load_catalogue
+
+        def batch(pairs):
+            for section, record in pairs:
+                try:
+                    if section == "students":
+                        service.add_student(record["name"], record["age"], record["email"], str(record["student_id"]))
+                    elif section == "instructors":
+                        service.add_instructor(record["name"], record["age"], record["email"], str(record["instructor_id"]))
+                    elif section == "courses":
+                        instructor_id = record.get("instructor_id")
+                        if "instructor_id" not in record:
+                            instructor = service.registry.instructors.find_by_name(record.get("instructor"))
+                            instructor_id = instructor.instructor_id if instructor is not None else None
+                        service.add_course(record["course_id"], record["course_name"], instructor_id)
+                    elif section == "enrollments":
+                        service.register(record["student_id"], record["course_id"])
+                    elif section == "delta":
+                        apply_delta(service.registry, record)
+                except (ServiceError, KeyError, TypeError, ValueError):
+                    continue
+
+        load_catalogue(filename, batch)
+    host, port = await service.start(host, port)
+    print(f"Serving on {host}:{port}", flush=True)
+    async with service.server:
+        await service.server.serve_forever()
+
+
+def main(argv=None):
+    """
+    Runs the service from the command line.
+
+    :param argv: The command line arguments. Defaults to ``sys.argv[1:]``.
+    :type argv: list, optional
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="the service has no authentication; keep it on the loopback address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--load", help="load this catalogue before serving")
+    parser.add_argument("--export-dir", default=DEFAULT_EXPORT_DIRECTORY, help="the directory exports are written to")
+    args = parser.parse_args(argv)
+    if args.host not in ("127.0.0.1", "::1", "localhost"):
+        print(f"Warning: listening on {args.host} lets anyone who can reach it change the catalogue", file=sys.stderr)
+    try:
+        asyncio.run(serve(args.host, args.port, args.load, args.export_dir))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1173 @@
+"""
+Pluggable storage backends for the School Management System.
+
+Every backend stores a whole catalogue through :meth:`StorageBackend.save`
+and streams it back through :meth:`StorageBackend.load`. Backends whose
+``supports_queries`` flag is set can also page, search and change records
+in place, so the GUI can work on a catalogue without loading all of it.
+A binary snapshot can be worked on the same way through
+:func:`open_snapshot`, which maps the file and keeps changes in memory.
+:func:`open_backend` picks the backend from the file name.
+
+Changes made since a save can be stored as a delta, built by
+:class:`changes.ChangeTracker`, instead of rewriting the whole file. Most
+backends append deltas to a ``.delta`` file next to the saved file, which
+:func:`load_catalogue` replays and the next full save removes; the SQLite
+backend applies them to its tables in place. Each delta is stamped with
+the size and modification time of the file it applies to, so deltas left
+behind by a full save that was interrupted before removing them are
+skipped instead of being replayed on the newer file.
+"""
+import codecs
+import csv
+import bisect
+import functools
+import json
+import locale
+import operator
+import os
+import shutil
+import sqlite3
+
+from binary_snapshot import SnapshotReader, read_snapshot, write_snapshot
+from persistence import PROGRESS_EVERY, check_cancelled, read_json, replace_when_done, write_json
+
+SECTIONS = ("students", "instructors", "courses")
+
+
+class StorageBackend:
+    """
+    The interface shared by all storage backends.
+
+    :param filename: The file the backend stores the catalogue in.
+    :type filename: str
+    """
+    supports_queries = False
+
+    def __init__(self, filename):
+        """
+        Constructs a backend for a file.
+
+        :param filename: The file the backend stores the catalogue in.
+        :type filename: str
+        """
+        self.filename = filename
+
+    def save(self, data, progress=None, cancelled=None):
+        """
+        Replaces the stored catalogue with a snapshot.
+
+        :param data: A snapshot returned by :func:`persistence.snapshot`.
+        :type data: dict
+        :param progress: Called as ``progress(done, total)`` while saving.
+        :type progress: callable, optional
+        :param cancelled: An event that stops the save when set.
+        :type cancelled: threading.Event, optional
+        """
+        raise NotImplementedError
+
+    def load(self, batch, progress=None, cancelled=None):
+        """
+        Streams the stored catalogue in batches of ``(section, record)`` pairs.
+
+        :param batch: Called with each list of pairs.
+        :type batch: callable
+        :param progress: Called as ``progress(done, total)`` while loading.
+        :type progress: callable, optional
+        :param cancelled: An event that stops the load when set.
+        :type cancelled: threading.Event, optional
+        """
+        raise NotImplementedError
+
+    def save_delta(self, delta, progress=None, cancelled=None):
+        """
+        Stores the changes made since the last save.
+
+        The delta is appended as one JSON line to the ``.delta`` file of the
+        stored catalogue, stamped under ``"base"`` with :func:`file_stamp`
+        of that catalogue, and synced to disk.
+
+        :param delta: A delta built by :meth:`changes.ChangeTracker.take_delta`.
+        :type delta: dict
+        :param progress: Called as ``progress(done, total)`` while saving.
+        :type progress: callable, optional
+        :param cancelled: An event that stops the save when set.
+        :type cancelled: threading.Event, optional
+        """
+        check_cancelled(cancelled)
+        with open(delta_filename(self.filename), 'a') as file:
+            file.write(json.dumps(dict(delta, base=file_stamp(self.filename))) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        if progress:
+            progress(1, 1)
+
+    def close(self):
+        """
+        Releases any resource held by the backend.
+        """
+
+
+class JsonBackend(StorageBackend):
+    """
+    Stores the catalogue in the JSON format written by Save Data.
+    """
+    def save(self, data, progress=None, cancelled=None):
+        write_json(data, self.filename, progress, cancelled)
+
+    def load(self, batch, progress=None, cancelled=None):
+        read_json(self.filename, batch, progress=progress, cancelled=cancelled)
+
+
+class BinarySnapshotBackend(StorageBackend):
+    """
+    Stores the catalogue in the memory-mapped binary snapshot format.
+    """
+    def save(self, data, progress=None, cancelled=None):
+        write_snapshot(data, self.filename, progress, cancelled)
+
+    def load(self, batch, progress=None, cancelled=None):
+        read_snapshot(self.filename, batch, progress=progress, cancelled=cancelled)
+
+
+class CsvBackend(StorageBackend):
+    """
+    Stores the catalogue as one CSV file of typed rows.
+
+    Each row starts with its type. Student and instructor rows hold the ID,
+    name, age and email, course rows hold the ID, name and instructor ID in
+    the ``Link`` column, and enrollment rows hold the course ID and the
+    student ID in the ``Link`` column.
+    """
+    HEADER = ["Type", "ID", "Name", "Age", "Email", "Link"]
+
+    def save(self, data, progress=None, cancelled=None):
+        total = len(data["students"]) + len(data["instructors"]) + len(data["courses"])
+
+        def rows():
+            for name, age, email, student_id in data["students"]:
+                yield ["Student", student_id, name, age, email, ""]
+            for name, age, email, instructor_id in data["instructors"]:
+                yield ["Instructor", instructor_id, name, age, email, ""]
+            for course_id, course_name, instructor, enrolled in data["courses"]:
+                yield ["Course", course_id, course_name, "", "", instructor[0] if instructor else ""]
+                for student_id, _ in enrolled:
+                    yield ["Enrollment", course_id, "", "", "", student_id]
+
+        def write(file):
+            writer = csv.writer(file)
+            writer.writerow(self.HEADER)
+            done = 0
+            for row in rows():
+                writer.writerow(row)
+                if row[0] != "Enrollment":
+                    done += 1
+                    if done % PROGRESS_EVERY == 0:
+                        check_cancelled(cancelled)
+                        if progress:
+                            progress(done, total)
+            if progress:
+                progress(total, total)
+
+        replace_when_done(self.filename, write, cancelled)
+
+    def load(self, batch, progress=None, cancelled=None):
+        size = os.path.getsize(self.filename)
+        consumed = 0
+        # The file is read as bytes so progress counts bytes like the size
+        # does, and decoded with the encoding save wrote it in
+        decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+
+        def lines(file):
+            nonlocal consumed
+            for line in file:
+                consumed += len(line)
+                yield decoder.decode(line)
+
+        with open(self.filename, 'rb') as file:
+            reader = csv.reader(lines(file))
+            next(reader, None)
+            pending = []
+            for row in reader:
+                kind, record_id, name, age, email, link = (row + [""] * 6)[:6]
+                if kind == "Student":
+                    pending.append(("students", {"name": name, "age": int(age), "email": email, "student_id": record_id}))
+                elif kind == "Instructor":
+                    pending.append(("instructors", {"name": name, "age": int(age), "email": email, "instructor_id": record_id}))
+                elif kind == "Course":
+                    pending.append(("courses", {"course_id": record_id, "course_name": name, "instructor_id": link or None}))
+                elif kind == "Enrollment":
+                    pending.append(("enrollments", {"course_id": record_id, "student_id": link}))
+                if len(pending) >= 2000:
+                    check_cancelled(cancelled)
+                    batch(pending)
+                    pending = []
+                    if progress:
+                        progress(consumed, size)
+            check_cancelled(cancelled)
+            if pending:
+                batch(pending)
+            if progress:
+                progress(size, size)
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Stores the catalogue in an SQLite database.
+
+    Students, instructors, courses and enrollments live in their own
+    tables, indexed on IDs and names. Besides whole-catalogue saves and
+    loads, the backend pages, searches and changes individual records.
+
+    The connection belongs to the thread that first uses the backend, so
+    each thread should open its own backend.
+    """
+    supports_queries = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS students (
+            student_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL COLLATE NOCASE,
+            age INTEGER,
+            email TEXT
+        );
+        CREATE INDEX IF NOT EXISTS students_name ON students (name);
+        CREATE TABLE IF NOT EXISTS instructors (
+            instructor_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL COLLATE NOCASE,
+            age INTEGER,
+            email TEXT
+        );
+        CREATE INDEX IF NOT EXISTS instructors_name ON instructors (name);
+        CREATE TABLE IF NOT EXISTS courses (
+            course_id TEXT PRIMARY KEY,
+            course_name TEXT NOT NULL COLLATE NOCASE,
+            instructor_id TEXT REFERENCES instructors (instructor_id) ON DELETE SET NULL
+        );
+        CREATE INDEX IF NOT EXISTS courses_name ON courses (course_name);
+        CREATE INDEX IF NOT EXISTS courses_instructor ON courses (instructor_id);
+        CREATE TABLE IF NOT EXISTS enrollments (
+            course_id TEXT NOT NULL REFERENCES courses (course_id) ON DELETE CASCADE,
+            student_id TEXT NOT NULL REFERENCES students (student_id) ON DELETE CASCADE,
+            PRIMARY KEY (course_id, student_id)
+        );
+        CREATE INDEX IF NOT EXISTS enrollments_student ON enrollments (student_id);
+    """
+
+    TABLES = {
+        "students": ("students", "student_id", "name", "Student"),
+        "instructors": ("instructors", "instructor_id", "name", "Instructor"),
+        "courses": ("courses", "course_id", "course_name", "Course"),
+    }
+
+    # Upserts update a row in place; INSERT OR REPLACE would delete it first
+    # and the foreign keys would take its enrollments with it
+    UPSERTS = {
+        "students": "INSERT INTO students VALUES (?, ?, ?, ?) ON CONFLICT (student_id) DO UPDATE SET name = excluded.name, age = excluded.age, email = excluded.email",
+        "instructors": "INSERT INTO instructors VALUES (?, ?, ?, ?) ON CONFLICT (instructor_id) DO UPDATE SET name = excluded.name, age = excluded.age, email = excluded.email",
+        "courses": "INSERT INTO courses VALUES (?, ?, ?) ON CONFLICT (course_id) DO UPDATE SET course_name = excluded.course_name, instructor_id = excluded.instructor_id",
+    }
+
+    def __init__(self, filename):
+        """
+        Opens the database, creating its tables if needed.
+
+        :param filename: The database file.
+        :type filename: str
+        """
+        super().__init__(filename)
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def save(self, data, progress=None, cancelled=None):
+        total = len(data["students"]) + len(data["instructors"]) + len(data["courses"])
+        with self.connection:
+            for table in ("enrollments", "courses", "students", "instructors"):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.connection.executemany("INSERT INTO students VALUES (?, ?, ?, ?)", ((i, n, a, e) for n, a, e, i in data["students"]))
+            self.connection.executemany("INSERT INTO instructors VALUES (?, ?, ?, ?)", ((i, n, a, e) for n, a, e, i in data["instructors"]))
+            check_cancelled(cancelled)
+            if progress:
+                progress(len(data["students"]) + len(data["instructors"]), total)
+            self.connection.executemany("INSERT INTO courses VALUES (?, ?, ?)", ((i, n, t[0] if t else None) for i, n, t, _ in data["courses"]))
+            self.connection.executemany("INSERT OR IGNORE INTO enrollments VALUES (?, ?)", ((course_id, student_id) for course_id, _, _, enrolled in data["courses"] for student_id, _ in enrolled))
+            check_cancelled(cancelled)
+        if progress:
+            progress(total, total)
+
+    def save_delta(self, delta, progress=None, cancelled=None):
+        """
+        Applies the changes made since the last save to the tables in place.
+
+        Changed rows are updated with upserts, which unlike ``INSERT OR
+        REPLACE`` keep the enrollments of the row, and only the enrollments
+        of changed courses are rewritten. Everything runs in one transaction.
+        """
+        with self.connection:
+            for section, record_ids in delta["deleted"].items():
+                table, id_column, _, _ = self.TABLES[section]
+                self.connection.executemany(f"DELETE FROM {table} WHERE {id_column} = ?", ((record_id,) for record_id in record_ids))
+            for section in ("students", "instructors"):
+                self.connection.executemany(self.UPSERTS[section], ((i, n, a, e) for n, a, e, i in delta[section]))
+            self.connection.executemany(self.UPSERTS["courses"], ((i, n, t) for i, n, t, _ in delta["courses"]))
+            self.connection.executemany("DELETE FROM enrollments WHERE course_id = ?", ((i,) for i, _, _, _ in delta["courses"]))
+            self.connection.executemany("INSERT OR IGNORE INTO enrollments SELECT ?, student_id FROM students WHERE student_id = ?",
+                                        ((i, student_id) for i, _, _, enrolled in delta["courses"] for student_id in enrolled))
+            check_cancelled(cancelled)
+        if progress:
+            progress(1, 1)
+
+    def load(self, batch, progress=None, cancelled=None):
+        queries = (
+            ("students", "SELECT name, age, email, student_id FROM students ORDER BY rowid", ("name", "age", "email", "student_id")),
+            ("instructors", "SELECT name, age, email, instructor_id FROM instructors ORDER BY rowid", ("name", "age", "email", "instructor_id")),
+            ("courses", "SELECT course_id, course_name, instructor_id FROM courses ORDER BY rowid", ("course_id", "course_name", "instructor_id")),
+            ("enrollments", "SELECT course_id, student_id FROM enrollments", ("course_id", "student_id")),
+        )
+        total = sum(self.count(section) for section in SECTIONS)
+        done = 0
+        for section, query, fields in queries:
+            cursor = self.connection.execute(query)
+            while True:
+                rows = cursor.fetchmany(2000)
+                if not rows:
+                    break
+                check_cancelled(cancelled)
+                batch([(section, dict(zip(fields, row))) for row in rows])
+                if section != "enrollments":
+                    done += len(rows)
+                    if progress:
+                        progress(done, total)
+        if progress:
+            progress(total, total)
+
+    def snapshot(self):
+        """
+        Reads the whole database into the tuples returned by :func:`persistence.snapshot`.
+
+        :return: A snapshot of the stored catalogue.
+        :rtype: dict
+        """
+        enrolled = {}
+        query = "SELECT e.course_id, s.student_id, s.name FROM enrollments e JOIN students s ON s.student_id = e.student_id"
+        for course_id, student_id, name in self.connection.execute(query):
+            enrolled.setdefault(course_id, []).append((student_id, name))
+        query = ("SELECT c.course_id, c.course_name, i.instructor_id, i.name FROM courses c "
+                 "LEFT JOIN instructors i ON i.instructor_id = c.instructor_id ORDER BY c.rowid")
+        return {
+            "students": self.connection.execute("SELECT name, age, email, student_id FROM students ORDER BY rowid").fetchall(),
+            "instructors": self.connection.execute("SELECT name, age, email, instructor_id FROM instructors ORDER BY rowid").fetchall(),
+            "courses": [(course_id, course_name, (instructor_id, name) if instructor_id is not None else None, enrolled.get(course_id, []))
+                        for course_id, course_name, instructor_id, name in self.connection.execute(query)],
+        }
+
+    def count(self, section):
+        """
+        Returns the number of records in a section.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :return: The number of records.
+        :rtype: int
+        """
+        table = self.TABLES[section][0]
+        return self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def page(self, section, after=0, limit=500, query=None):
+        """
+        Returns one page of a section as display rows.
+
+        Pages are read by rowid, so each page costs the same however far
+        into the table it is. With a query, only records whose name starts
+        with it, ignoring case, or whose ID equals it are returned; both
+        conditions are answered from indexes.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param after: The rowid of the last record of the previous page.
+        :type after: int
+        :param limit: The maximum number of rows to return.
+        :type limit: int
+        :param query: The search text, if any.
+        :type query: str, optional
+        :return: ``(rowid, type, name, id, details)`` tuples.
+        :rtype: list
+        """
+        table, id_column, name_column, kind = self.TABLES[section]
+        if section == "courses":
+            details = ("(SELECT group_concat(s.name, ', ') FROM enrollments e JOIN students s ON s.student_id = e.student_id "
+                       "WHERE e.course_id = courses.course_id)")
+        else:
+            details = "'N/A'"
+        sql = f"SELECT rowid, '{kind}', {name_column}, {id_column}, {details} FROM {table} WHERE rowid > ?"
+        parameters = [after]
+        if query:
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql = f"SELECT * FROM ({sql} AND {name_column} LIKE ? ESCAPE '\\' UNION SELECT rowid, '{kind}', {name_column}, {id_column}, {details} FROM {table} WHERE rowid > ? AND {id_column} = ?)"
+            parameters += [escaped + "%", after, query]
+        sql += " ORDER BY rowid LIMIT ?"
+        parameters.append(limit)
+        return [(rowid, kind, name, record_id, "" if details is None else details) for rowid, kind, name, record_id, details in self.connection.execute(sql, parameters)]
+
+    def add(self, section, records):
+        """
+        Inserts records, or updates them in place if their ID is taken, so
+        the enrollments of existing records are kept.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param records: Student and instructor records as ``(name, age,
+            email, id)`` tuples, course records as ``(course_id,
+            course_name, instructor_id)`` tuples.
+        :type records: list
+        """
+        with self.connection:
+            if section == "courses":
+                self.connection.executemany(self.UPSERTS["courses"], records)
+            else:
+                self.connection.executemany(self.UPSERTS[section], ((i, n, a, e) for n, a, e, i in records))
+
+    def rename(self, section, record_id, name):
+        """
+        Changes the name of a record.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param record_id: The ID of the record.
+        :type record_id: str
+        :param name: The new name.
+        :type name: str
+        """
+        table, id_column, name_column, _ = self.TABLES[section]
+        with self.connection:
+            self.connection.execute(f"UPDATE {table} SET {name_column} = ? WHERE {id_column} = ?", (name, record_id))
+
+    def delete(self, section, record_id):
+        """
+        Deletes a record along with its enrollments.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param record_id: The ID of the record.
+        :type record_id: str
+        :return: True if a record was deleted.
+        :rtype: bool
+        """
+        table, id_column, _, _ = self.TABLES[section]
+        with self.connection:
+            return self.connection.execute(f"DELETE FROM {table} WHERE {id_column} = ?", (record_id,)).rowcount > 0
+
+    def enroll(self, course_id, student_id):
+        """
+        Enrolls a student in a course.
+
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :param student_id: The ID of the student.
+        :type student_id: str
+        """
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO enrollments VALUES (?, ?)", (course_id, student_id))
+
+    def assign(self, course_id, instructor_id):
+        """
+        Assigns an instructor to a course.
+
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :param instructor_id: The ID of the instructor.
+        :type instructor_id: str
+        """
+        with self.connection:
+            self.connection.execute("UPDATE courses SET instructor_id = ? WHERE course_id = ?", (instructor_id, course_id))
+
+
+class SnapshotCatalogue:
+    """
+    Works on a binary snapshot in place, the way :class:`SqliteBackend`
+    works on a database.
+
+    Opening the catalogue only maps the file. Pages are decoded from the
+    mapped tables as they are shown, and changes are kept in memory over
+    them until the catalogue is written out with :meth:`snapshot`, so
+    records are only built for what is shown or changed. A course finds its
+    students by bisecting the enrollment table, which the snapshot stores
+    in course order.
+
+    The first lookup by ID reads the IDs of the section into an index, and
+    the first search reads its names into a sorted one; both take time
+    proportional to the section once. The page, count and edit methods
+    match those of :class:`SqliteBackend`.
+
+    :param filename: The snapshot file.
+    :type filename: str
+    :raises ValueError: If the file is not a snapshot.
+    """
+    supports_queries = True
+
+    KINDS = {"students": "Student", "instructors": "Instructor", "courses": "Course"}
+    # Positions of the ID and name among the unpacked fields of a record
+    FIELDS = {"students": (4, 0), "instructors": (4, 0), "courses": (0, 2)}
+
+    def __init__(self, filename):
+        """
+        Maps the snapshot without reading its records.
+
+        :param filename: The snapshot file.
+        :type filename: str
+        :raises ValueError: If the file is not a snapshot.
+        """
+        self.filename = filename
+        self.reader = SnapshotReader(filename)
+        self.tables = {"students": self.reader.students, "instructors": self.reader.instructors, "courses": self.reader.courses}
+        # Changed and added records by ID; removed IDs; IDs whose stored
+        # relations no longer apply because they were deleted at some point;
+        # enrollments of courses changed since opening
+        self.changed = {section: {} for section in SECTIONS}
+        self.added = {section: [] for section in SECTIONS}
+        self.removed = {section: set() for section in SECTIONS}
+        self.dropped = {section: set() for section in SECTIONS}
+        self.enrollments = {}
+        self._ids = {}
+        self._rows = {}
+        self._names = {}
+        self._search = None
+        self._users = [1]
+
+    def copy(self):
+        """
+        Returns a copy of the catalogue sharing the mapped file, for use on
+        another thread while this one keeps changing.
+
+        Each copy must be closed; the file is unmapped when the last one is.
+
+        :return: The copy.
+        :rtype: SnapshotCatalogue
+        """
+        other = SnapshotCatalogue.__new__(SnapshotCatalogue)
+        other.__dict__.update(self.__dict__)
+        other.changed = {section: dict(records) for section, records in self.changed.items()}
+        other.added = {section: list(record_ids) for section, record_ids in self.added.items()}
+        other.removed = {section: set(record_ids) for section, record_ids in self.removed.items()}
+        other.dropped = {section: set(record_ids) for section, record_ids in self.dropped.items()}
+        other.enrollments = {course_id: dict(students) for course_id, students in self.enrollments.items()}
+        other._search = None
+        self._users[0] += 1
+        return other
+
+    def close(self):
+        self._users[0] -= 1
+        if self._users[0] == 0:
+            self.reader.close()
+
+    def count(self, section):
+        """
+        Returns the number of records in a section.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :return: The number of records.
+        :rtype: int
+        """
+        return len(self.tables[section]) + len(self.added[section]) - len(self.removed[section])
+
+    def page(self, section, after=0, limit=500, query=None):
+        """
+        Returns one page of a section as display rows.
+
+        Rows are numbered in the order of the snapshot, followed by the
+        records added since it was opened. With a query, only records whose
+        name starts with it, ignoring case, or whose ID equals it are
+        returned; the matches are found in the sorted names and the ID
+        index, and kept until the next change.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param after: The row number of the last record of the previous page.
+        :type after: int
+        :param limit: The maximum number of rows to return.
+        :type limit: int
+        :param query: The search text, if any.
+        :type query: str, optional
+        :return: ``(row, type, name, id, details)`` tuples.
+        :rtype: list
+        """
+        if query:
+            folded = query.casefold()
+            rowids = self._matches(section, query)
+            rowids = rowids[bisect.bisect_right(rowids, after):]
+        else:
+            rowids = range(after + 1, len(self.tables[section]) + len(self.added[section]) + 1)
+        kind = self.KINDS[section]
+        rows = []
+        for rowid in rowids:
+            if len(rows) >= limit:
+                break
+            values = self._current(section, rowid)
+            if values is None:
+                continue
+            record_id, name = self._key(section, values)
+            if query and not (name.casefold().startswith(folded) or record_id == query):
+                continue
+            if section == "courses":
+                details = ", ".join(values[0] for values in self._students_of(record_id))
+            else:
+                details = "N/A"
+            rows.append((rowid, kind, name, record_id, details))
+        return rows
+
+    def snapshot(self):
+        """
+        Reads the catalogue with its changes into the tuples returned by
+        :func:`persistence.snapshot`.
+
+        :return: A snapshot of the catalogue.
+        :rtype: dict
+        """
+        data = {section: [values for _, values in self._records(section)] for section in ("students", "instructors")}
+        names = {section: {values[3]: values[0] for values in data[section]} for section in data}
+        student_ids = self._id_list("students")
+        enrolled = {}
+        for course_row, student_row in self.reader.enrollments:
+            enrolled.setdefault(course_row, []).append(student_ids[student_row])
+        courses = []
+        for row, (course_id, course_name, instructor_id) in self._records("courses"):
+            if course_id in self.enrollments:
+                ids = self.enrollments[course_id]
+            elif row is None or course_id in self.dropped["courses"]:
+                ids = ()
+            else:
+                ids = [student_id for student_id in enrolled.get(row, ()) if student_id not in self.dropped["students"]]
+            instructor = (instructor_id, names["instructors"][instructor_id]) if instructor_id in names["instructors"] else None
+            courses.append((course_id, course_name, instructor, [(student_id, names["students"][student_id]) for student_id in ids if student_id in names["students"]]))
+        data["courses"] = courses
+        return data
+
+    def add(self, section, records):
+        """
+        Adds records, or replaces the values of those whose ID is taken, so
+        the enrollments of existing records are kept.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param records: Student and instructor records as ``(name, age,
+            email, id)`` tuples, course records as ``(course_id,
+            course_name, instructor_id)`` tuples.
+        :type records: list
+        """
+        changed = self.changed[section]
+        for values in records:
+            values = tuple(values)
+            record_id = self._key(section, values)[0]
+            if record_id not in changed and record_id not in self.removed[section] and self._row_of(section, record_id) is None:
+                self.added[section].append(record_id)
+            self.removed[section].discard(record_id)
+            changed[record_id] = values
+        self._search = None
+
+    def rename(self, section, record_id, name):
+        """
+        Changes the name of a record.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param record_id: The ID of the record.
+        :type record_id: str
+        :param name: The new name.
+        :type name: str
+        """
+        values = self._values(section, record_id)
+        if values is None:
+            return
+        if section == "courses":
+            values = (values[0], name, values[2])
+        else:
+            values = (name, *values[1:])
+        self.changed[section][record_id] = values
+        self._search = None
+
+    def delete(self, section, record_id):
+        """
+        Deletes a record along with its enrollments.
+
+        :param section: ``"students"``, ``"instructors"`` or ``"courses"``.
+        :type section: str
+        :param record_id: The ID of the record.
+        :type record_id: str
+        :return: True if a record was deleted.
+        :rtype: bool
+        """
+        if self._values(section, record_id) is None:
+            return False
+        self.changed[section].pop(record_id, None)
+        self.removed[section].add(record_id)
+        self.dropped[section].add(record_id)
+        if section == "students":
+            for students in self.enrollments.values():
+                students.pop(record_id, None)
+        elif section == "instructors":
+            courses = self.changed["courses"]
+            for course_id, (_, course_name, instructor_id) in list(courses.items()):
+                if instructor_id == record_id:
+                    courses[course_id] = (course_id, course_name, None)
+        else:
+            self.enrollments.pop(record_id, None)
+        self._search = None
+        return True
+
+    def enroll(self, course_id, student_id):
+        """
+        Enrolls a student in a course.
+
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :param student_id: The ID of the student.
+        :type student_id: str
+        """
+        if self._values("courses", course_id) is None or self._values("students", student_id) is None:
+            return
+        if course_id not in self.enrollments:
+            self.enrollments[course_id] = {values[3]: None for values in self._students_of(course_id)}
+        self.enrollments[course_id][student_id] = None
+        self._search = None
+
+    def assign(self, course_id, instructor_id):
+        """
+        Assigns an instructor to a course.
+
+        :param course_id: The ID of the course.
+        :type course_id: str
+        :param instructor_id: The ID of the instructor.
+        :type instructor_id: str
+        """
+        values = self._values("courses", course_id)
+        if values is not None:
+            self.changed["courses"][course_id] = (values[0], values[1], instructor_id)
+
+    def apply_delta(self, delta):
+        """
+        Replays a delta saved by :meth:`changes.ChangeTracker.take_delta`.
+
+        Deleted records are removed first, then changed records are added
+        or replaced and the enrollments of changed courses are rewritten.
+
+        :param delta: The delta to replay.
+        :type delta: dict
+        """
+        for section, record_ids in delta["deleted"].items():
+            for record_id in record_ids:
+                self.delete(section, record_id)
+        for section in ("students", "instructors"):
+            self.add(section, delta[section])
+        for course_id, course_name, instructor_id, student_ids in delta["courses"]:
+            if instructor_id is not None and self._values("instructors", instructor_id) is None:
+                instructor_id = None
+            self.add("courses", [(course_id, course_name, instructor_id)])
+            self.enrollments[course_id] = {student_id: None for student_id in student_ids if self._values("students", student_id) is not None}
+
+    def _key(self, section, values):
+        """
+        Returns the ID and name of a record.
+        """
+        if section == "courses":
+            return values[0], values[1]
+        return values[3], values[0]
+
+    def _id_list(self, section):
+        """
+        Returns the IDs of the records stored in a section, by row.
+        """
+        ids = self._ids.get(section)
+        if ids is None:
+            ids = self._ids[section] = self.tables[section].strings(self.FIELDS[section][0])
+        return ids
+
+    def _row_of(self, section, record_id):
+        """
+        Returns the stored row of a record, or None if it is not stored.
+        """
+        rows = self._rows.get(section)
+        if rows is None:
+            rows = self._rows[section] = {record_id: row for row, record_id in enumerate(self._id_list(section))}
+        return rows.get(record_id)
+
+    def _stored(self, section, values):
+        """
+        Turns a stored record into the values used by the catalogue.
+
+        Courses refer to their instructor by ID instead of by row, and lose
+        it if it was deleted.
+        """
+        if section != "courses":
+            return values
+        course_id, course_name, instructor_row = values
+        instructor_id = self._id_list("instructors")[instructor_row] if instructor_row >= 0 else None
+        if instructor_id in self.dropped["instructors"]:
+            instructor_id = None
+        return (course_id, course_name, instructor_id)
+
+    def _current(self, section, rowid):
+        """
+        Returns the values of the record at a row number, or None if it was
+        deleted.
+        """
+        stored = len(self.tables[section])
+        if rowid > stored:
+            return self.changed[section].get(self.added[section][rowid - stored - 1])
+        values = self.tables[section][rowid - 1]
+        record_id = self._key(section, values)[0]
+        if record_id in self.changed[section]:
+            return self.changed[section][record_id]
+        if record_id in self.removed[section]:
+            return None
+        return self._stored(section, values)
+
+    def _values(self, section, record_id):
+        """
+        Returns the values of a record by ID, or None if there is none.
+        """
+        if record_id in self.changed[section]:
+            return self.changed[section][record_id]
+        if record_id in self.removed[section]:
+            return None
+        row = self._row_of(section, record_id)
+        if row is None:
+            return None
+        return self._stored(section, self.tables[section][row])
+
+    def _records(self, section):
+        """
+        Yields ``(row, values)`` for every record, with ``row`` None for
+        records added since the catalogue was opened.
+        """
+        changed, removed = self.changed[section], self.removed[section]
+        for row, values in enumerate(self.tables[section]):
+            record_id = self._key(section, values)[0]
+            if record_id in changed:
+                yield row, changed[record_id]
+            elif record_id not in removed:
+                yield row, self._stored(section, values)
+        for record_id in self.added[section]:
+            if record_id in changed:
+                yield None, changed[record_id]
+
+    def _students_of(self, course_id):
+        """
+        Returns the values of the students enrolled in a course.
+        """
+        if course_id in self.enrollments:
+            students = (self._values("students", student_id) for student_id in self.enrollments[course_id])
+            return [values for values in students if values is not None]
+        if course_id in self.dropped["courses"]:
+            return []
+        row = self._row_of("courses", course_id)
+        if row is None:
+            return []
+        enrollments = self.reader.enrollments
+        start = bisect.bisect_left(enrollments, row, key=operator.itemgetter(0))
+        end = bisect.bisect_right(enrollments, row, lo=start, key=operator.itemgetter(0))
+        students = []
+        for _, student_row in (enrollments[index] for index in range(start, end)):
+            values = self.tables["students"][student_row]
+            student_id = values[3]
+            if student_id in self.dropped["students"]:
+                continue
+            students.append(self.changed["students"].get(student_id, values))
+        return students
+
+    def _matches(self, section, query):
+        """
+        Returns the row numbers of the records that may match a search, in
+        order.
+        """
+        if self._search is not None and self._search[:2] == (section, query):
+            return self._search[2]
+        names = self._names.get(section)
+        if names is None:
+            folded = [name.casefold() for name in self.tables[section].strings(self.FIELDS[section][1])]
+            rows = sorted(range(len(folded)), key=folded.__getitem__)
+            names = self._names[section] = ([folded[row] for row in rows], rows)
+        sorted_names, rows = names
+        folded = query.casefold()
+        start = bisect.bisect_left(sorted_names, folded)
+        end = bisect.bisect_left(sorted_names, folded + "\U0010ffff", lo=start)
+        rowids = {row + 1 for row in rows[start:end]}
+        for record_id in [query, *self.changed[section]]:
+            row = self._row_of(section, record_id)
+            if row is not None:
+                rowids.add(row + 1)
+        stored = len(self.tables[section])
+        rowids.update(range(stored + 1, stored + len(self.added[section]) + 1))
+        rowids = sorted(rowids)
+        self._search = (section, query, rowids)
+        return rowids
+
+
+BACKENDS = {
+    ".json": JsonBackend,
+    ".sms": BinarySnapshotBackend,
+    ".csv": CsvBackend,
+    ".db": SqliteBackend,
+    ".sqlite": SqliteBackend,
+}
+
+
+def delta_filename(filename):
+    """
+    Returns the name of the file holding the deltas of a saved catalogue.
+
+    :param filename: The saved catalogue.
+    :type filename: str
+    :return: The name of its delta file.
+    :rtype: str
+    """
+    return filename + ".delta"
+
+
+def file_stamp(filename):
+    """
+    Identifies the version of a saved catalogue that deltas apply to.
+
+    Every full save replaces the file, which changes its modification time.
+
+    :param filename: The saved catalogue.
+    :type filename: str
+    :return: ``[size, mtime_ns]`` of the file, or None if it does not exist.
+    :rtype: list
+    """
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def open_backend(filename):
+    """
+    Opens the backend matching the extension of a file.
+
+    :param filename: The file to store the catalogue in.
+    :type filename: str
+    :return: The backend for the file.
+    :rtype: StorageBackend
+    :raises ValueError: If no backend handles the extension.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in BACKENDS:
+        raise ValueError(f"Unsupported file type: {extension or filename}")
+    return BACKENDS[extension](filename)
+
+
+def save_catalogue(data, filename, progress=None, cancelled=None):
+    """
+    Saves a snapshot with the backend matching the file name.
+
+    The backend is opened and closed on the calling thread, so this can run
+    on a worker. The deltas of the previous file are removed afterwards; if
+    that never happens, their stamps no longer match and loads skip them.
+
+    :param data: A snapshot returned by :func:`persistence.snapshot`.
+    :type data: dict
+    :param filename: The file to save to.
+    :type filename: str
+    :param progress: Called as ``progress(done, total)`` while saving.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the save when set.
+    :type cancelled: threading.Event, optional
+    """
+    backend = open_backend(filename)
+    try:
+        backend.save(data, progress, cancelled)
+    finally:
+        backend.close()
+    if os.path.exists(delta_filename(filename)):
+        os.remove(delta_filename(filename))
+
+
+def save_changes(delta, filename, progress=None, cancelled=None):
+    """
+    Saves a delta with the backend matching the file name.
+
+    :param delta: A delta built by :meth:`changes.ChangeTracker.take_delta`.
+    :type delta: dict
+    :param filename: The file last saved, which the delta applies to.
+    :type filename: str
+    :param progress: Called as ``progress(done, total)`` while saving.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the save when set.
+    :type cancelled: threading.Event, optional
+    """
+    backend = open_backend(filename)
+    try:
+        backend.save_delta(delta, progress, cancelled)
+    finally:
+        backend.close()
+
+
+def copy_catalogue(source, filename, progress=None, cancelled=None):
+    """
+    Copies a saved catalogue and its deltas to another file.
+
+    Each file is copied under a temporary name and renamed once complete,
+    and a delta file left over at the destination is removed when the
+    source has none. The copy keeps the modification time of the source,
+    so the stamps of the copied deltas still match it.
+
+    :param source: The saved catalogue.
+    :type source: str
+    :param filename: The file to copy it to, with the same extension.
+    :type filename: str
+    :param progress: Called as ``progress(done, total)`` while copying.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the copy when set.
+    :type cancelled: threading.Event, optional
+    """
+    def copy(source_file, file):
+        with open(source_file, 'rb') as original:
+            shutil.copyfileobj(original, file)
+        file.flush()
+        stat = os.stat(source_file)
+        os.utime(file.name, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    for source_file, target_file in ((source, filename), (delta_filename(source), delta_filename(filename))):
+        check_cancelled(cancelled)
+        if os.path.exists(source_file):
+            replace_when_done(target_file, functools.partial(copy, source_file), cancelled, mode='wb')
+        elif os.path.exists(target_file):
+            os.remove(target_file)
+    if progress:
+        progress(1, 1)
+
+
+def load_catalogue(filename, batch, progress=None, cancelled=None):
+    """
+    Streams a catalogue with the backend matching the file name.
+
+    Deltas saved since the file was written follow as ``("delta", delta)``
+    pairs, oldest first. Deltas stamped for another version of the file
+    are skipped.
+
+    :param filename: The file to load from.
+    :type filename: str
+    :param batch: Called with each list of ``(section, record)`` pairs.
+    :type batch: callable
+    :param progress: Called as ``progress(done, total)`` while loading.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the load when set.
+    :type cancelled: threading.Event, optional
+    """
+    stamp = file_stamp(filename)
+    backend = open_backend(filename)
+    try:
+        backend.load(batch, progress, cancelled)
+    finally:
+        backend.close()
+    for delta in read_deltas(filename, stamp, cancelled):
+        batch([("delta", delta)])
+
+
+def read_deltas(filename, stamp, cancelled=None):
+    """
+    Yields the deltas saved for a catalogue, oldest first.
+
+    Deltas stamped for another version of the file, and lines that are not
+    valid JSON, are skipped.
+
+    :param filename: The saved catalogue.
+    :type filename: str
+    :param stamp: The :func:`file_stamp` of the catalogue, taken before it
+        was read.
+    :type stamp: list
+    :param cancelled: An event that stops the reading when set.
+    :type cancelled: threading.Event, optional
+    """
+    try:
+        with open(delta_filename(filename), 'r') as file:
+            for line in file:
+                check_cancelled(cancelled)
+                try:
+                    delta = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if delta.get("base", stamp) != stamp:
+                    continue
+                yield delta
+    except FileNotFoundError:
+        return
+
+
+def open_snapshot(filename):
+    """
+    Opens a binary snapshot in place, with the deltas saved since it was
+    written replayed on it.
+
+    :param filename: The snapshot file.
+    :type filename: str
+    :return: The opened catalogue.
+    :rtype: SnapshotCatalogue
+    :raises ValueError: If the file is not a snapshot.
+    """
+    stamp = file_stamp(filename)
+    catalogue = SnapshotCatalogue(filename)
+    try:
+        for delta in read_deltas(filename, stamp):
+            catalogue.apply_delta(delta)
+    except BaseException:
+        catalogue.close()
+        raise
+    return catalogue
+
+
+def copy_database(database, filename, write, progress=None, cancelled=None):
+    """
+    Writes the catalogue stored in an SQLite database to another file.
+
+    :param database: The database file.
+    :type database: str
+    :param filename: The file to write.
+    :type filename: str
+    :param write: Called as ``write(data, filename, progress, cancelled)``,
+        such as :func:`save_catalogue` or :func:`persistence.write_csv`.
+    :type write: callable
+    :param progress: Called as ``progress(done, total)`` while writing.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the copy when set.
+    :type cancelled: threading.Event, optional
+    """
+    backend = SqliteBackend(database)
+    try:
+        data = backend.snapshot()
+    finally:
+        backend.close()
+    write(data, filename, progress, cancelled)
+
+
+def copy_snapshot(catalogue, filename, write, progress=None, cancelled=None):
+    """
+    Writes an opened snapshot, with its changes, to another file.
+
+    The catalogue is closed once it has been read, so it should be a
+    :meth:`SnapshotCatalogue.copy` made for the call.
+
+    :param catalogue: The opened snapshot.
+    :type catalogue: SnapshotCatalogue
+    :param filename: The file to write.
+    :type filename: str
+    :param write: Called as ``write(data, filename, progress, cancelled)``,
+        such as :func:`save_catalogue` or :func:`persistence.write_csv`.
+    :type write: callable
+    :param progress: Called as ``progress(done, total)`` while writing.
+    :type progress: callable, optional
+    :param cancelled: An event that stops the copy when set.
+    :type cancelled: threading.Event, optional
+    """
+    try:
+        data = catalogue.snapshot()
+    finally:
+        catalogue.close()
+    write(data, filename, progress, cancelled)
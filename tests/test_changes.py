@@ -0,0 +1,81 @@
+"""
+Tests for :mod:`changes`.
+
+Run with ``python -m unittest discover tests`` from the repository root.
+"""
+import os
+import tempfile
+import unittest
+
+from changes import ChangeTracker, apply_delta
+from models import Course, Instructor, Student
+from persistence import snapshot
+from registry import Registry
+from storage import load_catalogue, save_catalogue, save_changes
+
+
+def build_registry():
+    """
+    Returns a registry with one instructor teaching one course that one student takes.
+
+    :return: The registry.
+    :rtype: registry.Registry
+    """
+    registry = Registry()
+    student = registry.students.add(Student("Ann", 20, "ann@mail.aub.edu", "S1"))
+    instructor = registry.instructors.add(Instructor("Bob", 40, "bob@mail.aub.edu", "I1"))
+    course = registry.courses.add(Course("C1", "Math"))
+    course.enroll(student)
+    instructor.assign_course(course)
+    return registry
+
+
+def enrollments(registry):
+    return {course.course_id: [student.student_id for student in course.enrolled_students] for course in registry.courses}
+
+
+class DeltaRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "catalogue.json")
+        self.registry = build_registry()
+        self.tracker = ChangeTracker(self.registry)
+        save_catalogue(snapshot(self.registry), self.filename)
+        self.tracker.saved(self.filename, self.tracker.version)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def reload(self):
+        delta, version, hashes = self.tracker.take_delta()
+        save_changes(delta, self.filename)
+        self.tracker.saved(self.filename, version, hashes)
+        reloaded = build_registry()
+        deltas = []
+        load_catalogue(self.filename, lambda pairs: deltas.extend(record for section, record in pairs if section == "delta"))
+        for delta in deltas:
+            apply_delta(reloaded, delta)
+        return reloaded
+
+    def test_removed_and_added_again_keeps_no_enrollments(self):
+        self.registry.students.remove(self.registry.students.get("S1"))
+        self.registry.students.add(Student("Ann", 20, "ann@mail.aub.edu", "S1"))
+        delta, _, _ = self.tracker.take_delta()
+        self.assertEqual(delta["deleted"]["students"], ["S1"])
+        self.assertEqual(enrollments(self.reload()), {"C1": []})
+
+    def test_removal_marks_unlinked_records(self):
+        self.registry.instructors.remove(self.registry.instructors.get("I1"))
+        delta, _, _ = self.tracker.take_delta()
+        self.assertEqual([row[0] for row in delta["courses"]], ["C1"])
+        self.assertIsNone(self.reload().courses.get("C1").instructor)
+
+    def test_course_removal_marks_its_students(self):
+        self.registry.courses.remove(self.registry.courses.get("C1"))
+        reloaded = self.reload()
+        self.assertNotIn("C1", reloaded.courses)
+        self.assertEqual(dict(reloaded.students.get("S1").registered_courses), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
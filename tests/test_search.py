@@ -0,0 +1,30 @@
+"""
+Tests for :mod:`search`.
+
+Run with ``python -m unittest discover tests`` from the repository root.
+"""
+import unittest
+
+from models import Student
+from registry import Registry
+
+
+class LimitedSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        for number in reversed(range(300)):
+            self.registry.students.add(Student(f"N{number:03d} zz", 20, "n@mail.aub.edu", f"S{number}"))
+
+    def test_limit_keeps_the_first_matches_by_name(self):
+        for query in ("zz", "N00", "n0", "z", ""):
+            names = [student.name for student in self.registry.student_search.search(query, 5)]
+            expected = sorted(student.name for student in self.registry.students if query.casefold() in student.name.casefold() or query.casefold() in student.student_id.casefold())[:5]
+            self.assertEqual(names, expected, query)
+
+    def test_registry_limit_spans_collections_in_order(self):
+        results = self.registry.search("zz", 3)
+        self.assertEqual([student.name for student in results], ["N000 zz", "N001 zz", "N002 zz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for :mod:`storage`.
+
+Run with ``python -m unittest discover tests`` from the repository root.
+"""
+import os
+import tempfile
+import unittest
+
+from changes import ChangeTracker
+from models import Course, Instructor, Student
+from persistence import snapshot
+from registry import Registry
+from storage import SqliteBackend, open_snapshot, save_catalogue, save_changes
+
+
+def build_registry():
+    """
+    Returns a registry of three students, two instructors and two courses.
+
+    :return: The registry.
+    :rtype: registry.Registry
+    """
+    registry = Registry()
+    students = [registry.students.add(Student(name, 20, f"{name.lower()}@mail.aub.edu", f"S{number}"))
+                for number, name in enumerate(("Ann", "Amal", "Bilal"), 1)]
+    instructors = [registry.instructors.add(Instructor(name, 40, f"{name.lower()}@mail.aub.edu", f"I{number}"))
+                   for number, name in enumerate(("Bob", "Dana"), 1)]
+    math = registry.courses.add(Course("C1", "Math"))
+    physics = registry.courses.add(Course("C2", "Physics"))
+    for student in students:
+        math.enroll(student)
+    for student in students[1:]:
+        physics.enroll(student)
+    instructors[0].assign_course(math)
+    instructors[1].assign_course(physics)
+    return registry
+
+
+def normalized(data):
+    """
+    Sorts the records of a snapshot so two catalogues can be compared.
+    """
+    return {
+        "students": sorted(data["students"], key=lambda values: values[3]),
+        "instructors": sorted(data["instructors"], key=lambda values: values[3]),
+        "courses": sorted((course_id, course_name, instructor, sorted(enrolled)) for course_id, course_name, instructor, enrolled in data["courses"]),
+    }
+
+
+def shown(backend, section, query=None):
+    """
+    Returns every display row of a section without its row number.
+    """
+    return sorted((kind, name, record_id, ", ".join(sorted(details.split(", ")))) for _, kind, name, record_id, details in backend.page(section, 0, 100, query))
+
+
+class SnapshotCatalogueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "catalogue.sms")
+        data = snapshot(build_registry())
+        save_catalogue(data, self.filename)
+        self.database = SqliteBackend(os.path.join(self.directory.name, "catalogue.db"))
+        self.database.save(data)
+        self.catalogue = open_snapshot(self.filename)
+
+    def tearDown(self):
+        self.catalogue.close()
+        self.database.close()
+        self.directory.cleanup()
+
+    def change(self, method, *args):
+        getattr(self.catalogue, method)(*args)
+        getattr(self.database, method)(*args)
+
+    def assertSameAsDatabase(self):
+        self.assertEqual(normalized(self.catalogue.snapshot()), normalized(self.database.snapshot()))
+        for section in ("students", "instructors", "courses"):
+            self.assertEqual(self.catalogue.count(section), self.database.count(section))
+            for query in (None, "a", "AM", "S3", "zz"):
+                self.assertEqual(shown(self.catalogue, section, query), shown(self.database, section, query))
+
+    def test_opened_snapshot_matches_database(self):
+        self.assertSameAsDatabase()
+
+    def test_changes_match_database(self):
+        self.change("rename", "students", "S2", "Zeina")
+        self.change("add", "students", [("Adam", 21, "adam@mail.aub.edu", "S4")])
+        self.change("enroll", "C2", "S4")
+        self.change("delete", "students", "S3")
+        self.change("delete", "instructors", "I1")
+        self.change("assign", "C2", "I2")
+        self.change("add", "courses", [("C3", "Art", "I2")])
+        self.change("enroll", "C3", "S1")
+        self.assertSameAsDatabase()
+
+    def test_deleted_and_added_again_keeps_no_relations(self):
+        self.change("delete", "students", "S2")
+        self.change("add", "students", [("Amal", 20, "amal@mail.aub.edu", "S2")])
+        self.change("delete", "courses", "C1")
+        self.change("add", "courses", [("C1", "Math", None)])
+        self.assertSameAsDatabase()
+
+    def test_pages_continue_after_the_last_row(self):
+        self.change("add", "students", [("Ali", 22, "ali@mail.aub.edu", "S4")])
+        first = self.catalogue.page("students", 0, 2, "a")
+        rest = self.catalogue.page("students", first[-1][0], 10, "a")
+        self.assertEqual([row[3] for row in first + rest], ["S1", "S2", "S4"])
+
+    def test_saved_changes_are_replayed_on_open(self):
+        registry = build_registry()
+        tracker = ChangeTracker(registry)
+        tracker.saved(self.filename, tracker.version)
+        registry.students.rename(registry.students.get("S1"), "Anna")
+        registry.students.remove(registry.students.get("S3"))
+        registry.courses.get("C2").enroll(registry.students.add(Student("Adam", 21, "adam@mail.aub.edu", "S4")))
+        delta, _, _ = tracker.take_delta()
+        save_changes(delta, self.filename)
+        catalogue = open_snapshot(self.filename)
+        try:
+            self.assertEqual(normalized(catalogue.snapshot()), normalized(snapshot(registry)))
+        finally:
+            catalogue.close()
+
+
+if __name__ == "__main__":
+    unittest.main()